@@ -0,0 +1,41 @@
+"""Per-request latency with and without pooled keep-alive connections.
+
+Run with the library on the path, e.g. ``PYTHONPATH=src python benchmarks/bench_connection_pool.py``.
+"""
+import argparse
+import time
+from blockex.tradeapi import BlockExTradeApi
+from stub_server import StubTradeApiServer
+
+
+def measure(api_url, keep_alive, requests_count):
+    with BlockExTradeApi(api_url, 'StubApiID', 'StubUsername', 'StubPassword', keep_alive=keep_alive) as trade_api:
+        trade_api.login()
+        trade_api.get_market_orders(1, max_count=10)
+        latencies = []
+        for _ in range(requests_count):
+            start = time.perf_counter()
+            trade_api.get_market_orders(1, max_count=10)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with StubTradeApiServer() as server:
+        print('{0:<24}{1:>12}{2:>12}{3:>12}'.format('mode', 'mean (us)', 'p50 (us)', 'p99 (us)'))
+        for name, keep_alive in (('new connection per call', False), ('pooled keep-alive', True)):
+            latencies = measure(server.url, keep_alive, args.requests)
+            print('{0:<24}{1:>12.1f}{2:>12.1f}{3:>12.1f}'.format(
+                name,
+                sum(latencies) / len(latencies) * 1e6,
+                latencies[len(latencies) // 2] * 1e6,
+                latencies[int(len(latencies) * 0.99)] * 1e6))
+
+
+if __name__ == '__main__':
+    main()
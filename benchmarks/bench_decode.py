@@ -0,0 +1,51 @@
+"""Decode and number conversion time of market order payloads with the available JSON decoders.
+
+Run with the library on the path, e.g. ``PYTHONPATH=src python benchmarks/bench_decode.py``.
+"""
+import argparse
+import decimal
+import json
+import time
+from blockex import decoding
+from blockex.decoding import JsonDecoder
+from blockex.decoding import OrjsonDecoder
+from blockex.tradeapi import convert_orders
+from stub_server import make_orders
+
+
+def measure(decoder, payload, repeat):
+    best_decode = best_total = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        orders = decoder.decode(payload)
+        decoded_time = time.perf_counter()
+        convert_orders(orders)
+        end_time = time.perf_counter()
+        best_decode = min(best_decode, decoded_time - start_time)
+        best_total = min(best_total, end_time - start_time)
+    return best_decode, best_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    decoders = [
+        ('json', JsonDecoder()),
+        ('json+Decimal', JsonDecoder(parse_float=decimal.Decimal)),
+    ]
+    if decoding.orjson is not None:
+        decoders.append(('orjson', OrjsonDecoder()))
+
+    print('{0:>8}  {1:<14}{2:>14}{3:>18}'.format('orders', 'decoder', 'decode (ms)', 'decode+conv (ms)'))
+    for size in args.sizes:
+        payload = json.dumps(make_orders(size)).encode()
+        for name, decoder in decoders:
+            decode_time, total_time = measure(decoder, payload, args.repeat)
+            print('{0:>8}  {1:<14}{2:>14.2f}{3:>18.2f}'.format(size, name, decode_time * 1e3, total_time * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""End to end throughput of BlockExTradeApi clients trading on the mock exchange.
+
+Each thread is a trader with its own client placing crossing limit orders, reading its orders and the market orders
+and cancelling its open orders, so the matching engine fills orders while the clients run. Pass --url to trade on a
+mock exchange served by ``python -m blockex.mockexchange`` in another process, so the server does not compete with
+the clients for the interpreter.
+
+Run with the library on the path, e.g. ``PYTHONPATH=src python benchmarks/bench_mock_exchange.py``.
+"""
+import argparse
+import threading
+import time
+from blockex.mockexchange import MockExchange
+from blockex.mockexchange import MockExchangeServer
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderType
+
+
+def trade(api_url, index, stop_time, counts, errors):
+    try:
+        with BlockExTradeApi(api_url, 'MockApiID', 'Trader{0}'.format(index), 'MockPassword') as trade_api:
+            step = 0
+            while time.perf_counter() < stop_time:
+                offer_type = OfferType.BID if (index + step) % 2 else OfferType.ASK
+                trade_api.create_order(offer_type, OrderType.LIMIT, 1, 100 + (step % 5) * 0.05, 1)
+                trade_api.get_market_orders(1, max_count=20)
+                trade_api.get_orders(max_count=20)
+                requests_count = 3
+                if step % 10 == 9:
+                    trade_api.cancel_all_orders(1)
+                    requests_count += 1
+                counts[index] += requests_count
+                step += 1
+    except Exception as err:
+        errors.append(err)
+
+
+def run(api_url, threads_count, duration):
+    stop_time = time.perf_counter() + duration
+    counts = [0] * threads_count
+    errors = []
+    threads = [
+        threading.Thread(target=trade, args=(api_url, index, stop_time, counts, errors))
+        for index in range(threads_count)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+    if errors:
+        raise errors[0]
+    return sum(counts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=2.0, help='Seconds per thread count')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--url', help='API URL of a running mock exchange, by default one is started in process')
+    args = parser.parse_args()
+
+    server = None
+    api_url = args.url
+    if api_url is None:
+        exchange = MockExchange()
+        exchange.seed(100)
+        server = MockExchangeServer(exchange).start()
+        api_url = server.url
+    try:
+        print('{0:>8}{1:>14}'.format('threads', 'requests/s'))
+        for threads_count in args.threads:
+            print('{0:>8}{1:>14.0f}'.format(threads_count, run(api_url, threads_count, args.duration)))
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Memory and time of decoding a large orders payload into dicts and into slotted models.
+
+Run with the library on the path, e.g. ``PYTHONPATH=src python benchmarks/bench_models_memory.py``.
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from blockex.models import Order
+from blockex.tradeapi import convert_orders
+from stub_server import make_orders
+
+
+def measure(payload, order_factory):
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    orders = convert_orders(json.loads(payload), order_factory)
+    elapsed = time.perf_counter() - start_time
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del orders
+    return elapsed, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100000)
+    args = parser.parse_args()
+
+    payload = json.dumps(make_orders(args.orders))
+    print('{0} orders, {1:.1f} MB payload'.format(args.orders, len(payload) / 1e6))
+    print('{0:<10}{1:>12}{2:>16}{3:>14}'.format('output', 'time (ms)', 'retained (MB)', 'peak (MB)'))
+    for name, order_factory in (('dict', None), ('Order', Order.from_dict)):
+        elapsed, retained, peak = measure(payload, order_factory)
+        print('{0:<10}{1:>12.0f}{2:>16.1f}{3:>14.1f}'.format(name, elapsed * 1e3, retained / 1e6, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main()
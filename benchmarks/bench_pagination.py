@@ -0,0 +1,47 @@
+"""Time to page through a large order list with and without prefetching the next page.
+
+The stub adds a fixed latency to every response and the consumer spends a fixed time per order, so prefetching
+hides the round trips of the next pages behind the processing of the current ones.
+
+Run with the library on the path, e.g. ``PYTHONPATH=src python benchmarks/bench_pagination.py``.
+"""
+import argparse
+import time
+from blockex.tradeapi import BlockExTradeApi
+from stub_server import StubTradeApiServer
+
+
+def consume(orders, work_per_order):
+    count = 0
+    for _ in orders:
+        deadline = time.perf_counter() + work_per_order
+        while time.perf_counter() < deadline:
+            pass
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--work', type=float, default=20e-6, help='seconds spent on every order')
+    args = parser.parse_args()
+
+    with StubTradeApiServer(order_count=args.orders, latency=args.latency) as server:
+        with BlockExTradeApi(server.url, 'StubApiID', 'StubUsername', 'StubPassword') as trade_api:
+            trade_api.get_market_orders(1, max_count=args.orders)
+
+            print('{0:<12}{1:>10}{2:>12}'.format('prefetch', 'orders', 'time (ms)'))
+            for prefetch in (False, True):
+                start_time = time.perf_counter()
+                count = consume(
+                    trade_api.iter_all_market_orders(1, page_size=args.page_size, prefetch=prefetch),
+                    args.work)
+                print('{0:<12}{1:>10}{2:>12.1f}'.format(
+                    str(prefetch), count, (time.perf_counter() - start_time) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
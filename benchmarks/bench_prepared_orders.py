@@ -0,0 +1,65 @@
+"""Client-side overhead of placing an order with create_order() and with a prepared order.
+
+The session of the client is replaced by one answering at once from memory, so the timings are the time the client
+spends building and checking each request, without the network and the server.
+
+Run with the library on the path, e.g. ``PYTHONPATH=src python benchmarks/bench_prepared_orders.py``.
+"""
+import argparse
+import time
+from requests import Response
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderType
+
+
+class InstantSession(object):
+    """Session answering every request with the same successful response"""
+
+    def __init__(self):
+        self.response = Response()
+        self.response.status_code = 200
+
+    def get(self, url, **kwargs):
+        return self.response
+
+    def post(self, url, **kwargs):
+        return self.response
+
+    def close(self):
+        pass
+
+
+def measure(place_order, count):
+    start_time = time.perf_counter()
+    for index in range(count):
+        place_order(100 + (index % 100) * 0.05, 1.5)
+    return (time.perf_counter() - start_time) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100000, help='orders placed per method')
+    args = parser.parse_args()
+
+    trade_api = BlockExTradeApi('https://api.url/', 'BenchApiID', 'BenchUsername', 'BenchPassword')
+    trade_api.session = InstantSession()
+    trade_api.get_access_token = lambda: {'access_token': 'BenchAccessToken', 'expires_in': 86399}
+    trade_api.login()
+
+    prepared_order = trade_api.prepare_order(OfferType.BID, OrderType.LIMIT, 1)
+    results = [
+        ('create_order', measure(
+            lambda price, quantity: trade_api.create_order(OfferType.BID, OrderType.LIMIT, 1, price, quantity),
+            args.orders)),
+        ('prepared send', measure(prepared_order.send, args.orders)),
+        ('cancel_order', measure(lambda price, quantity: trade_api.cancel_order(32598), args.orders)),
+    ]
+
+    print('{0:<16}{1:>14}'.format('method', 'us per order'))
+    for name, duration in results:
+        print('{0:<16}{1:>14.2f}'.format(name, duration * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Time to first order and peak memory of get_market_orders() and iter_market_orders() on a large response.
+
+Run with the library on the path, e.g. ``PYTHONPATH=src python benchmarks/bench_streaming.py``.
+"""
+import argparse
+import time
+import tracemalloc
+from blockex.tradeapi import BlockExTradeApi
+from stub_server import StubTradeApiServer
+
+
+def measure(get_orders):
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    first_order_time = None
+    count = 0
+    for _ in get_orders():
+        if first_order_time is None:
+            first_order_time = time.perf_counter() - start_time
+        count += 1
+    total_time = time.perf_counter() - start_time
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, first_order_time, total_time, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100000)
+    args = parser.parse_args()
+
+    with StubTradeApiServer(order_count=args.orders) as server:
+        with BlockExTradeApi(server.url, 'StubApiID', 'StubUsername', 'StubPassword') as trade_api:
+            # Warms up the connection and the cached response body of the stub
+            trade_api.get_market_orders(1, max_count=args.orders)
+
+            print('{0:<22}{1:>10}{2:>16}{3:>14}{4:>12}'.format(
+                'method', 'orders', 'first (ms)', 'total (ms)', 'peak (MB)'))
+            for name, get_orders in (
+                    ('get_market_orders', lambda: trade_api.get_market_orders(1, max_count=args.orders)),
+                    ('iter_market_orders', lambda: trade_api.iter_market_orders(1, max_count=args.orders))):
+                count, first_order_time, total_time, peak = measure(get_orders)
+                print('{0:<22}{1:>10}{2:>16.1f}{3:>14.1f}{4:>12.1f}'.format(
+                    name, count, first_order_time * 1e3, total_time * 1e3, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main()
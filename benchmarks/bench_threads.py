@@ -0,0 +1,61 @@
+"""Throughput of one BlockExTradeApi instance shared by a growing number of threads.
+
+Run with the library on the path, e.g. ``PYTHONPATH=src python benchmarks/bench_threads.py``.
+"""
+import argparse
+import threading
+import time
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderType
+from stub_server import StubTradeApiServer
+
+
+def run(trade_api, threads_count, duration):
+    stop_time = time.perf_counter() + duration
+    counts = [0] * threads_count
+    errors = []
+
+    def work(index):
+        try:
+            while time.perf_counter() < stop_time:
+                trade_api.get_orders(max_count=10)
+                trade_api.create_order(OfferType.BID, OrderType.LIMIT, 1, 10.5, 1)
+                counts[index] += 2
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(threads_count)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+    if errors:
+        raise errors[0]
+    return sum(counts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=2.0, help='Seconds per thread count')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--latency', type=float, default=0.005, help='Emulated round trip in seconds')
+    args = parser.parse_args()
+
+    with StubTradeApiServer(order_count=10, latency=args.latency) as server:
+        with BlockExTradeApi(
+                server.url,
+                'StubApiID',
+                'StubUsername',
+                'StubPassword',
+                pool_maxsize=max(args.threads)) as trade_api:
+            print('{0:>8}{1:>14}'.format('threads', 'requests/s'))
+            for threads_count in args.threads:
+                print('{0:>8}{1:>14.0f}'.format(threads_count, run(trade_api, threads_count, args.duration)))
+        print('logins: {0}'.format(server.login_count))
+
+
+if __name__ == '__main__':
+    main()
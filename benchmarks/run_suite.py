@@ -0,0 +1,160 @@
+"""Benchmark suite of the client methods, the JSON decoding and the number conversion.
+
+Every BlockExTradeApi method is called against the in-process stub of the Trade API and its ops/s and p50/p99
+latency are reported, followed by the decoding and the conversion of order payloads of several sizes. The results
+are saved as JSON, by default to benchmarks/results/<commit>.json, and can be compared with the saved results of
+another commit to spot regressions.
+
+Run with the library on the path, e.g.:
+
+    PYTHONPATH=src python benchmarks/run_suite.py
+    PYTHONPATH=src python benchmarks/run_suite.py --compare benchmarks/results/1633228.json
+"""
+from timeit import default_timer
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderType
+from blockex.tradeapi import convert_orders
+from stub_server import StubTradeApiServer
+from stub_server import make_orders
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def get_commit():
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=devnull).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def get_percentile(sorted_values, percentile):
+    index = min(len(sorted_values) - 1, int(round(percentile / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(durations):
+    durations = sorted(durations)
+    return {
+        'ops_per_second': len(durations) / sum(durations),
+        'p50_ms': get_percentile(durations, 50) * 1e3,
+        'p99_ms': get_percentile(durations, 99) * 1e3,
+    }
+
+
+def measure(operation, iterations, warmup=5, setup=None):
+    """Times the calls of an operation. The optional setup is called untimed before each call."""
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        operation()
+
+    durations = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        start_time = default_timer()
+        operation()
+        durations.append(default_timer() - start_time)
+    return summarize(durations)
+
+
+def run_client_benchmarks(trade_api, iterations):
+    # The login is timed with the token deleted before each call, the other methods reuse the token
+    return [
+        ('login', measure(trade_api.login, iterations, setup=lambda: trade_api.token_manager.clear())),
+        ('get_orders', measure(trade_api.get_orders, iterations)),
+        ('get_market_orders', measure(lambda: trade_api.get_market_orders(1), iterations)),
+        ('create_order', measure(
+            lambda: trade_api.create_order(OfferType.BID, OrderType.LIMIT, 1, 13.4, 1.5), iterations)),
+        ('cancel_order', measure(lambda: trade_api.cancel_order(100000), iterations)),
+        ('cancel_all_orders', measure(lambda: trade_api.cancel_all_orders(1), iterations)),
+        ('get_trader_instruments', measure(trade_api.get_trader_instruments, iterations)),
+        ('get_partner_instruments', measure(trade_api.get_partner_instruments, iterations)),
+    ]
+
+
+def run_payload_benchmarks(json_decoder, sizes, iterations):
+    results = []
+    for size in sizes:
+        payload = json.dumps(make_orders(size)).encode()
+        # Fewer rounds for the large payloads keep the suite quick
+        rounds = max(5, iterations * 100 // size)
+        results.append(('decode[{0}]'.format(size), measure(lambda: json_decoder.decode(payload), rounds)))
+
+        decoded = []
+        results.append(('convert_orders[{0}]'.format(size), measure(
+            lambda: convert_orders(decoded[-1]),
+            rounds,
+            setup=lambda: decoded.append(json_decoder.decode(payload)))))
+        del decoded[:]
+    return results
+
+
+def print_results(results, baseline=None):
+    header = '{0:<28}{1:>12}{2:>12}{3:>12}'.format('benchmark', 'ops/s', 'p50 (ms)', 'p99 (ms)')
+    if baseline is not None:
+        header += '{0:>14}'.format('ops/s change')
+    print(header)
+    for name, result in results:
+        line = '{0:<28}{1:>12.1f}{2:>12.3f}{3:>12.3f}'.format(
+            name, result['ops_per_second'], result['p50_ms'], result['p99_ms'])
+        if baseline is not None:
+            if name in baseline:
+                change = result['ops_per_second'] / baseline[name]['ops_per_second'] - 1
+                line += '{0:>13.1f}%'.format(change * 100)
+            else:
+                line += '{0:>14}'.format('new')
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200, help='timed calls per client method')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='orders per payload')
+    parser.add_argument('--orders', type=int, default=100, help='orders returned by the stub')
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every stub response')
+    parser.add_argument('--output', help='file to save the results to, by default results/<commit>.json')
+    parser.add_argument('--compare', help='saved results to compare with')
+    args = parser.parse_args()
+
+    with StubTradeApiServer(order_count=args.orders, latency=args.latency) as server:
+        with BlockExTradeApi(server.url, 'StubApiID', 'StubUsername', 'StubPassword') as trade_api:
+            results = run_client_benchmarks(trade_api, args.iterations)
+            results += run_payload_benchmarks(trade_api.json_decoder, args.sizes, args.iterations)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+    print_results(results, baseline)
+
+    commit = get_commit()
+    output = args.output or os.path.join(RESULTS_DIRECTORY, '{0}.json'.format(commit))
+    output_directory = os.path.dirname(os.path.abspath(output))
+    if not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+    with open(output, 'w') as output_file:
+        json.dump({
+            'commit': commit,
+            'date': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'results': dict(results),
+        }, output_file, indent=2, sort_keys=True)
+    print('Results saved to {0}'.format(output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""In-process HTTP stub of the BlockEx Trade API used by the benchmarks"""
+import json
+import threading
+import time
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from six.moves.BaseHTTPServer import HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import parse_qs
+from six.moves.urllib.parse import urlsplit
+
+
+def make_orders(count, instrument_id=1):
+    """Builds a list of order dicts shaped like the getMarketOrders response."""
+    orders = []
+    for index in range(count):
+        orders.append({
+            'orderID': str(100000 + index),
+            'price': '{0:.2f}'.format(100 + (index % 500) * 0.05),
+            'initialQuantity': '{0:.2f}'.format(1 + index % 7),
+            'quantity': '{0:.2f}'.format(1 + index % 7),
+            'dateCreated': '2017-10-09T09:32:24.735659+00:00',
+            'offerType': 1 + index % 2,
+            'type': 1,
+            'status': 20,
+            'instrumentID': instrument_id,
+            'trades': None,
+        })
+    return orders
+
+
+def make_instruments(count):
+    """Builds a list of instrument dicts shaped like the instruments responses."""
+    instruments = []
+    for index in range(count):
+        instruments.append({
+            'id': index + 1,
+            'description': 'Instrument {0}'.format(index + 1),
+            'name': 'INS{0}/EUR'.format(index + 1),
+            'baseCurrencyID': 40 + index,
+            'quoteCurrencyID': 2,
+            'minOrderAmount': '0.020000000000',
+            'commissionFeePercent': 0.02,
+        })
+    return instruments
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        path = url.path.lstrip('/')
+        stub = self.server.stub
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        if method == 'POST' and path == 'oauth/token':
+            stub.count_login()
+            self._send(200, {'access_token': 'StubAccessToken', 'expires_in': stub.token_lifetime})
+        elif method == 'POST' and path == 'oauth/logout':
+            self._send(200, {})
+        elif method == 'GET' and path in ('api/orders/get', 'api/orders/getMarketOrders'):
+            max_count = int(query.get('maxCount', [stub.order_count])[0])
+            self._send_body(200, stub.orders_body(max_count))
+        elif method == 'POST' and path in ('api/orders/create', 'api/orders/cancel', 'api/orders/cancelall'):
+            self._send_body(200, b'')
+        elif method == 'GET' and path in ('api/orders/traderinstruments', 'api/orders/partnerinstruments'):
+            self._send_body(200, stub.instruments_body)
+        else:
+            self._send(404, {'message': 'No HTTP resource was found that matches the request URI.'})
+
+    def _send(self, status, content):
+        self._send_body(status, json.dumps(content).encode())
+
+    def _send_body(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubTradeApiServer(object):
+    """Serves canned Trade API responses on a local port from a background thread.
+
+    Use it as a context manager; the url attribute holds the API URL to pass to BlockExTradeApi. The latency
+    argument adds a delay in seconds to every response to emulate the round trip to a remote server.
+    """
+
+    def __init__(
+            self,
+            order_count=100,
+            instrument_count=4,
+            token_lifetime=86399,
+            latency=0,
+            host='127.0.0.1',
+            port=0):
+        self.order_count = order_count
+        self.latency = latency
+        self.token_lifetime = token_lifetime
+        self.instruments_body = json.dumps(make_instruments(instrument_count)).encode()
+        self.login_count = 0
+        self.__orders_bodies = {}
+        self.__lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), StubRequestHandler)
+        self.server.stub = self
+        self.url = 'http://{0}:{1}/'.format(*self.server.server_address[:2])
+        self.__thread = None
+
+    def count_login(self):
+        with self.__lock:
+            self.login_count += 1
+
+    def orders_body(self, max_count):
+        count = min(max_count, self.order_count)
+        with self.__lock:
+            if count not in self.__orders_bodies:
+                self.__orders_bodies[count] = json.dumps(make_orders(count)).encode()
+            return self.__orders_bodies[count]
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.server.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.__thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
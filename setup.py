@@ -16,9 +16,12 @@ setup(
         'Programming Language :: Python :: 3',
     ],
     keywords='api client blockex trade api',
-    install_requires=['enum34', 'six', 'requests'],
+    install_requires=['enum34', 'six', 'requests', 'futures; python_version < "3"'],
     extras_require={
         'test': ['mock'],
+        'async': ['aiohttp'],
+        'numpy': ['numpy'],
+        'orjson': ['orjson'],
     },
     project_urls={
         'Bug Reports': '',
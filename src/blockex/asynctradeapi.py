@@ -0,0 +1,435 @@
+"""BlockEx Trade API asyncio client library"""
+from timeit import default_timer
+import asyncio
+import datetime
+import json
+import aiohttp
+from requests import RequestException
+from six.moves.urllib.parse import urlencode
+from yarl import URL
+from blockex.decoding import create_default_json_decoder
+from blockex.tradeapi import BatchResult
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import DEFAULT_POOL_MAXSIZE
+from blockex.tradeapi import convert_instruments
+from blockex.tradeapi import convert_orders
+from blockex.tradeapi import create_order_data
+from blockex.tradeapi import get_error_message
+from blockex.tradeapi import get_market_orders_data
+from blockex.tradeapi import get_orders_data
+from blockex.tradeapi import is_unauthorized_response
+
+DEFAULT_CONNECTION_LIMIT = 100
+DEFAULT_KEEPALIVE_TIMEOUT = 15
+
+
+class AsyncResponse(object):
+    """Fully read response of an asynchronous request.
+
+    It exposes the same status_code and json() interface as requests.Response, so the response helpers of the
+    synchronous client can be reused.
+    """
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+
+class AsyncBlockExTradeApi(object):
+    """Asyncio implementation of the methods needed to access the BlockEx Trade API.
+
+    The methods have the same arguments and results as the ones of BlockExTradeApi, but are coroutines. All requests
+    share one pooled connector, so many requests can be in flight at once over kept alive connections.
+    """
+    LOGIN_PATH = BlockExTradeApi.LOGIN_PATH
+    LOGOUT_PATH = BlockExTradeApi.LOGOUT_PATH
+    GET_ORDERS_PATH = BlockExTradeApi.GET_ORDERS_PATH
+    GET_MARKET_ORDERS_PATH = BlockExTradeApi.GET_MARKET_ORDERS_PATH
+    CREATE_ORDER_PATH = BlockExTradeApi.CREATE_ORDER_PATH
+    CANCEL_ORDER_PATH = BlockExTradeApi.CANCEL_ORDER_PATH
+    CANCEL_ALL_ORDERS_PATH = BlockExTradeApi.CANCEL_ALL_ORDERS_PATH
+    GET_TRADER_INSTRUMENTS_PATH = BlockExTradeApi.GET_TRADER_INSTRUMENTS_PATH
+    GET_PARTNER_INSTRUMENTS_PATH = BlockExTradeApi.GET_PARTNER_INSTRUMENTS_PATH
+
+    def __init__(
+            self,
+            api_url,
+            api_id,
+            username,
+            password,
+            limit=DEFAULT_CONNECTION_LIMIT,
+            limit_per_host=DEFAULT_POOL_MAXSIZE,
+            keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+            order_factory=None,
+            instrument_factory=None,
+            json_decoder=None):
+        """Creates an asyncio Trade API client.
+
+        The HTTP session is created on the first request. Call close() or use the client as an asynchronous context
+        manager to release the pooled connections.
+
+        :param limit: Maximum number of simultaneous connections. Optional.
+        :type limit: int
+        :param limit_per_host: Maximum number of simultaneous connections per host. 0 means no limit. Optional.
+        :type limit_per_host: int
+        :param keepalive_timeout: Seconds to keep an idle connection alive. Optional.
+        :type keepalive_timeout: float
+        :param order_factory: Callable creating the returned order objects from the decoded order dicts. Optional.
+        :type order_factory: callable
+        :param instrument_factory: Callable creating the returned instrument objects from the decoded instrument
+            dicts. Optional.
+        :type instrument_factory: callable
+        :param json_decoder: Decoder of the response bodies. See BlockExTradeApi. Optional.
+        :type json_decoder: blockex.decoding.JsonDecoder
+        """
+        assert api_url
+        assert api_id
+        assert username
+        assert password
+
+        self.api_url = api_url
+        self.api_id = api_id
+        self.username = username
+        self.password = password
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.order_factory = order_factory
+        self.instrument_factory = instrument_factory
+        self.json_decoder = json_decoder or create_default_json_decoder()
+        self.access_token = None
+        self.access_token_expiry_time = None
+        self.session = None
+        # Created on first use, like the session, so it belongs to the loop running the requests
+        self.__login_lock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Closes the HTTP session and all of its pooled connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_access_token(self):
+        """Gets the access token."""
+        data = {
+            'grant_type': 'password',
+            'username': self.username,
+            'password': self.password,
+            'client_id': self.api_id
+        }
+
+        response = await self.__send_request('post', self.api_url + self.LOGIN_PATH, data=data)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            exception_message = 'Login failed. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+
+    async def login(self):
+        """Performs a login and stores the received access token.
+
+        :returns: The access token of the logged in trader
+        :rtype: dict
+        :raises: RequestException
+        """
+
+        access_token = await self.get_access_token()
+        self.access_token = access_token['access_token']
+        self.access_token_expiry_time = datetime.datetime.now() +\
+            datetime.timedelta(seconds=access_token['expires_in'])
+        return self.access_token
+
+    async def logout(self):
+        """Performs a logout when logged in and deletes the stored access token.
+
+        :raises: RequestException
+        """
+
+        if self.access_token is not None:
+            headers = {'Authorization': 'Bearer ' + self.access_token}
+            response = await self.__send_request(
+                'post',
+                self.api_url + self.LOGOUT_PATH,
+                headers=headers)
+            if response.status_code == 200:
+                self.access_token = None
+            else:
+                exception_message = 'Logout failed. {error_message}'.format(
+                    error_message=get_error_message(response))
+                raise RequestException(exception_message)
+
+    async def get_orders(
+            self,
+            instrument_id=None,
+            order_type=None,
+            offer_type=None,
+            status=None,
+            load_executions=None,
+            max_count=None,
+            order_factory=None):
+        """Gets the orders of the trader with the ability to apply filters. See BlockExTradeApi.get_orders().
+
+        :raises: RequestException
+        """
+        query_string = urlencode(get_orders_data(
+            instrument_id, order_type, offer_type, status, load_executions, max_count))
+        response = await self.__make_authorized_request(
+            'get',
+            self.api_url + self.GET_ORDERS_PATH + query_string)
+
+        if response.status_code == 200:
+            orders = self.json_decoder.decode(response.content)
+            return convert_orders(orders, order_factory or self.order_factory)
+        else:
+            exception_message = 'Failed to get the orders. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+
+    async def get_market_orders(
+            self,
+            instrument_id,
+            order_type=None,
+            offer_type=None,
+            status=None,
+            max_count=None,
+            order_factory=None):
+        """Gets the market orders with the ability to apply filters. See BlockExTradeApi.get_market_orders().
+
+        :raises: RequestException
+        """
+        query_string = urlencode(get_market_orders_data(
+            self.api_id, instrument_id, order_type, offer_type, status, max_count))
+        response = await self.__send_request(
+            'get',
+            self.api_url + self.GET_MARKET_ORDERS_PATH + query_string)
+        if response.status_code == 200:
+            orders = self.json_decoder.decode(response.content)
+            return convert_orders(orders, order_factory or self.order_factory)
+        else:
+            exception_message = 'Failed to get the market orders. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+
+    async def create_order(
+            self,
+            offer_type,
+            order_type,
+            instrument_id,
+            price,
+            quantity):
+        """Places an order. See BlockExTradeApi.create_order().
+
+        :raises: RequestException
+        """
+        query_string = urlencode(create_order_data(
+            offer_type, order_type, instrument_id, price, quantity))
+        response = await self.__make_authorized_request(
+            'post',
+            self.api_url + self.CREATE_ORDER_PATH + query_string)
+
+        if response.status_code != 200:
+            exception_message = 'Failed to create an order. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+
+    async def create_orders(self, specs, max_in_flight=DEFAULT_CONNECTION_LIMIT):
+        """Places many orders concurrently. See BlockExTradeApi.create_orders().
+
+        :rtype: list of BatchResult
+        :raises: RequestException when the login fails
+        """
+        await self.__get_valid_access_token()
+        return await self.__run_batch(self.__create_order_result, specs, max_in_flight)
+
+    async def cancel_order(self, order_id):
+        """Cancels a specific order.
+
+        :param order_id: Order identifier
+        :type order_id: int
+        :raises: RequestException
+        """
+        data = {'orderID': order_id}
+        query_string = urlencode(data)
+        response = await self.__make_authorized_request(
+            'post',
+            self.api_url + self.CANCEL_ORDER_PATH + query_string)
+
+        if response.status_code != 200:
+            exception_message = 'Failed to cancel the order. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+
+    async def cancel_orders(self, order_ids, max_in_flight=DEFAULT_CONNECTION_LIMIT):
+        """Cancels many orders concurrently. See BlockExTradeApi.cancel_orders().
+
+        :rtype: list of BatchResult
+        :raises: RequestException when the login fails
+        """
+        await self.__get_valid_access_token()
+        return await self.__run_batch(self.__cancel_order_result, order_ids, max_in_flight)
+
+    async def cancel_all_orders(self, instrument_id):
+        """Cancels all the orders of the trader for a specific instrument.
+
+        :param instrument_id: Instrument identifier. Use get_trader_instruments() to retrieve them.
+        :type instrument_id: int
+        :raises: RequestException
+        """
+        data = {'instrumentID': instrument_id}
+        query_string = urlencode(data)
+        response = await self.__make_authorized_request(
+            'post',
+            self.api_url + self.CANCEL_ALL_ORDERS_PATH + query_string)
+
+        if response.status_code != 200:
+            exception_message = 'Failed to cancel all orders. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+
+    async def get_trader_instruments(self, instrument_factory=None):
+        """Gets the available instruments for the trader. See BlockExTradeApi.get_trader_instruments().
+
+        :raises: RequestException
+        """
+        response = await self.__make_authorized_request(
+            'get',
+            self.api_url + self.GET_TRADER_INSTRUMENTS_PATH)
+        if response.status_code == 200:
+            instruments = self.json_decoder.decode(response.content)
+            return convert_instruments(instruments, instrument_factory or self.instrument_factory)
+        else:
+            exception_message = 'Failed to get the trader instruments. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+
+    async def get_partner_instruments(self, instrument_factory=None):
+        """Gets the available instruments for the partner. See BlockExTradeApi.get_partner_instruments().
+
+        :raises: RequestException
+        """
+        data = {'apiID': self.api_id}
+        query_string = urlencode(data)
+        response = await self.__send_request(
+            'get',
+            self.api_url + self.GET_PARTNER_INSTRUMENTS_PATH + query_string)
+        if response.status_code == 200:
+            instruments = self.json_decoder.decode(response.content)
+            return convert_instruments(instruments, instrument_factory or self.instrument_factory)
+        else:
+            exception_message = 'Failed to get the partner instruments. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+
+    async def __make_authorized_request(self, request_type, url):
+        request_type = request_type.lower()
+        assert request_type in ('get', 'post')
+
+        bearer = await self.__get_valid_access_token()
+        response = await self.__send_request(
+            request_type, url, headers={'Authorization': 'Bearer ' + bearer})
+
+        if is_unauthorized_response(response):
+            bearer = await self.__refresh_access_token(bearer)
+            response = await self.__send_request(
+                request_type, url, headers={'Authorization': 'Bearer ' + bearer})
+
+        return response
+
+    async def __get_valid_access_token(self):
+        # Not logged in or the access token has expired
+        if self.access_token is None or self.access_token_expiry_time < datetime.datetime.now():
+            return await self.__refresh_access_token(self.access_token)
+        return self.access_token
+
+    async def __refresh_access_token(self, stale_access_token):
+        # Concurrent callers wait for a single login instead of each performing its own
+        if self.__login_lock is None:
+            self.__login_lock = asyncio.Lock()
+        async with self.__login_lock:
+            if self.access_token is None or self.access_token == stale_access_token or\
+                    self.access_token_expiry_time < datetime.datetime.now():
+                await self.login()
+            return self.access_token
+
+    async def __run_batch(self, get_result, items, max_in_flight):
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def get_limited_result(item):
+            async with semaphore:
+                return await get_result(item)
+
+        return list(await asyncio.gather(*[get_limited_result(item) for item in items]))
+
+    async def __create_order_result(self, spec):
+        async def send_request():
+            if isinstance(spec, dict):
+                data = create_order_data(**spec)
+            else:
+                data = create_order_data(*spec)
+            return await self.__make_authorized_request(
+                'post',
+                self.api_url + self.CREATE_ORDER_PATH + urlencode(data))
+
+        return await get_batch_result(spec, send_request, 'Failed to create an order.')
+
+    async def __cancel_order_result(self, order_id):
+        async def send_request():
+            return await self.__make_authorized_request(
+                'post',
+                self.api_url + self.CANCEL_ORDER_PATH + urlencode({'orderID': order_id}))
+
+        return await get_batch_result(order_id, send_request, 'Failed to cancel the order.')
+
+    async def __send_request(self, request_type, url, headers=None, data=None):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout)
+            self.session = aiohttp.ClientSession(connector=connector)
+
+        # The query strings are already encoded
+        async with self.session.request(
+                request_type, URL(url, encoded=True), headers=headers, data=data) as response:
+            content = await response.read()
+            return AsyncResponse(response.status, content)
+
+
+async def get_batch_result(item, send_request, failure_message):
+    """Makes the request of a batch item and converts its outcome to a BatchResult instead of raising.
+
+    :param item: The batch item.
+    :param send_request: Coroutine function making the request and returning the response.
+    :param failure_message: Message prefix of the error when the response is unsuccessful.
+    :rtype: BatchResult
+    """
+    result = BatchResult(item)
+    start_time = default_timer()
+    try:
+        response = await send_request()
+        result.status_code = response.status_code
+        if response.status_code != 200:
+            result.message = get_error_message(response)
+            result.error = RequestException('{failure_message} {error_message}'.format(
+                failure_message=failure_message, error_message=result.message))
+    except asyncio.CancelledError:
+        raise
+    except Exception as err:
+        # Any error, e.g. a TypeError of a malformed spec, is kept with its item, so the results of the other items
+        # that were already sent are not lost
+        result.error = err
+    result.elapsed = default_timer() - start_time
+    return result
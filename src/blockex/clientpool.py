@@ -0,0 +1,198 @@
+"""Pool of the BlockEx Trade API clients of many trader accounts under one partner API ID"""
+from concurrent.futures import ThreadPoolExecutor
+from timeit import default_timer
+import threading
+from blockex.metrics import MetricsRegistry
+from blockex.ratelimit import RateLimiter
+from blockex.tradeapi import DEFAULT_POOL_MAXSIZE
+from blockex.tradeapi import BatchResult
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import create_session
+
+DEFAULT_LOGIN_RATE = 2.0
+DEFAULT_REFRESH_SPREAD = 300
+DEFAULT_LOGIN_IN_FLIGHT = 4
+
+# BlockExTradeApi arguments set by the pool itself, besides the ones of its own parameters
+POOL_CLIENT_ARGUMENTS = ('username', 'password', 'session', 'token_refresh_spread')
+
+
+class ClientPool(object):
+    """Clients of many trader accounts sharing one HTTP session, one login schedule and one metrics sink.
+
+    All the clients send their requests over the same pooled connections, so the number of open connections
+    depends on the number of concurrent requests instead of the number of accounts. The logins of all the accounts
+    go through a rate limiter, so the accounts logging in together at startup are spread out instead of hitting the
+    login endpoint at once. Each client refreshes its access token before expiry after a random extra margin of up
+    to refresh_spread seconds, at most a quarter of the lifetime of the token, so the tokens obtained together are
+    not all refreshed together either. The metrics
+    of all the clients are reported to the same sink, so they are aggregated over the accounts.
+
+    The clients are looked up by username, e.g. pool['trader'].get_orders(). The pool is safe to share between
+    threads.
+    """
+
+    def __init__(
+            self,
+            api_url,
+            api_id,
+            accounts=None,
+            pool_maxsize=DEFAULT_POOL_MAXSIZE,
+            pool_block=False,
+            keep_alive=True,
+            login_rate=DEFAULT_LOGIN_RATE,
+            login_burst=None,
+            refresh_spread=DEFAULT_REFRESH_SPREAD,
+            rate_limiter=None,
+            metrics=None,
+            **client_kwargs):
+        """Creates a pool.
+
+        :param api_url: The API URL of all the clients.
+        :type api_url: string
+        :param api_id: The partner API ID of all the clients.
+        :type api_id: string
+        :param accounts: Passwords by username of the accounts to add. Optional.
+        :type accounts: dict
+        :param pool_maxsize: Maximum number of connections kept alive, shared by all the accounts. Optional.
+        :type pool_maxsize: int
+        :param pool_block: Sets whether to wait for a free connection instead of opening a new one when all
+            pool_maxsize connections are in use. Optional.
+        :type pool_block: boolean
+        :param keep_alive: Sets whether to keep the connections alive between requests. Optional.
+        :type keep_alive: boolean
+        :param login_rate: Logins per second allowed for all the accounts together. Optional.
+        :type login_rate: float
+        :param login_burst: Number of logins allowed at once for all the accounts together. Defaults to login_rate.
+            Optional.
+        :type login_burst: float
+        :param refresh_spread: Maximum number of seconds randomly added to the token refresh margin of each account,
+            at most a quarter of the lifetime of the token. Optional.
+        :type refresh_spread: float
+        :param rate_limiter: Limiter shared by all the clients, e.g. to limit the other endpoints as well. It replaces
+            the login limit of login_rate and login_burst. Optional.
+        :type rate_limiter: blockex.ratelimit.RateLimiter
+        :param metrics: Sink of the metrics of all the clients. By default a new MetricsRegistry. Optional.
+        :type metrics: blockex.metrics.MetricsRegistry
+        :param client_kwargs: Other BlockExTradeApi arguments passed to all the clients, e.g. retry_policy. The
+            arguments of POOL_CLIENT_ARGUMENTS are set by the pool and cannot be passed.
+        :raises: ValueError
+        """
+        if refresh_spread < 0:
+            raise ValueError('refresh_spread must not be negative')
+        pool_arguments = sorted(set(client_kwargs).intersection(POOL_CLIENT_ARGUMENTS))
+        if pool_arguments:
+            raise ValueError('{arguments} cannot be passed to the clients of a pool, the pool sets them'.format(
+                arguments=', '.join(pool_arguments)))
+
+        self.api_url = api_url
+        self.api_id = api_id
+        self.refresh_spread = refresh_spread
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(
+            endpoint_limits={'login': (login_rate, login_burst)})
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.client_kwargs = client_kwargs
+        # The clients of all the accounts request the same host
+        self.session = create_session(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive)
+        self.__clients = {}
+        self.__lock = threading.Lock()
+        for username, password in (accounts or {}).items():
+            self.add_account(username, password)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.__clients)
+
+    def __contains__(self, username):
+        return username in self.__clients
+
+    def __iter__(self):
+        return iter(list(self.__clients))
+
+    def __getitem__(self, username):
+        """Gets the client of an account.
+
+        :raises: KeyError when the account is not in the pool
+        """
+        return self.__clients[username]
+
+    def add_account(self, username, password):
+        """Adds an account. It logs in on its first request or with login_all().
+
+        :param username: The trader's username
+        :type username: string
+        :param password: The trader's password
+        :type password: string
+        :returns: The client of the account.
+        :rtype: BlockExTradeApi
+        :raises: ValueError when the account is already in the pool
+        """
+        client = BlockExTradeApi(
+            self.api_url,
+            self.api_id,
+            username,
+            password,
+            rate_limiter=self.rate_limiter,
+            metrics=self.metrics,
+            session=self.session,
+            token_refresh_spread=self.refresh_spread,
+            **self.client_kwargs)
+
+        with self.__lock:
+            if username in self.__clients:
+                raise ValueError('Account {0} is already in the pool'.format(username))
+            self.__clients[username] = client
+        return client
+
+    def remove_account(self, username):
+        """Removes an account. Its access token is not revoked.
+
+        :raises: KeyError when the account is not in the pool
+        """
+        with self.__lock:
+            del self.__clients[username]
+
+    def login_all(self, max_in_flight=DEFAULT_LOGIN_IN_FLIGHT):
+        """Logs in the accounts without a valid access token, at the pace allowed by the login limit.
+
+        A failed login does not abort the others. Each account gets its own result instead.
+
+        :param max_in_flight: Maximum number of logins in flight at the same time. Optional.
+        :type max_in_flight: int
+        :returns: The results by username. The item of each result is the username.
+        :rtype: dict of BatchResult
+        """
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+
+        clients = list(self.__clients.items())
+        if not clients:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_in_flight, len(clients))) as executor:
+            results = executor.map(lambda item: login(*item), clients)
+            return dict((result.item, result) for result in results)
+
+    def close(self):
+        """Closes the shared HTTP session and all of its pooled connections."""
+        self.session.close()
+
+
+def login(username, client):
+    """Makes sure a client has a valid access token and converts the outcome to a BatchResult instead of raising."""
+    result = BatchResult(username)
+    start_time = default_timer()
+    try:
+        client.token_manager.get_valid_access_token()
+    except Exception as err:
+        result.error = err
+    result.elapsed = default_timer() - start_time
+    return result
@@ -0,0 +1,109 @@
+"""Coalescing of identical concurrent BlockEx Trade API reads"""
+import collections
+import threading
+from blockex.tradeapi import monotonic
+
+
+class InFlightCall(object):
+    """Load shared by the callers asking for the same key at the same time"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.generation = None
+
+
+class RequestCoalescer(object):
+    """Shares one load and its result between the concurrent callers asking for the same key.
+
+    The first caller asking for a key performs the load and the callers asking for the same key before it completes
+    wait for it and get the same result or error. With a ttl the result is also kept for ttl seconds, so the calls
+    of a burst that arrive just after the load completed do not repeat it. The expired results are dropped when a new
+    one is kept, so the loads of ever changing keys, e.g. paginated URLs, do not pile up. The errors are never kept.
+
+    The results are shared between the callers and must not be modified.
+    """
+
+    def __init__(self, ttl=0):
+        """Creates a coalescer.
+
+        :param ttl: Seconds to keep a result after its load completed. By default only the loads in flight are
+            shared. Optional.
+        :type ttl: float
+        """
+        self.ttl = ttl
+        self.__calls = {}
+        # Kept in the order of their expiry, since all the results are kept for the same ttl
+        self.__results = collections.OrderedDict()
+        # Incremented by invalidate(), so the loads started before are not kept
+        self.__generation = 0
+        self.__lock = threading.Lock()
+
+    def get(self, key, load):
+        """Gets the result of the load of a key, sharing a load in flight or a kept result.
+
+        :param key: The key identifying the load, e.g. the URL of a request.
+        :type key: hashable
+        :param load: Callable performing the load and returning its result.
+        :type load: callable
+        :returns: The result of the load
+        :raises: The error of the load
+        """
+        with self.__lock:
+            kept_result = self.__results.get(key)
+            if kept_result is not None:
+                result, expiry_deadline = kept_result
+                if expiry_deadline > monotonic():
+                    return result
+                del self.__results[key]
+
+            call = self.__calls.get(key)
+            is_owner = call is None
+            if is_owner:
+                call = InFlightCall()
+                call.generation = self.__generation
+                self.__calls[key] = call
+
+        if not is_owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = load()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+                if call.error is None and self.ttl > 0 and call.generation == self.__generation:
+                    now = monotonic()
+                    self.__drop_expired_results(now)
+                    self.__results.pop(key, None)
+                    self.__results[key] = (call.result, now + self.ttl)
+            call.done.set()
+        return call.result
+
+    def get_kept_count(self):
+        """Gets the number of the kept results, including the expired ones not dropped yet.
+
+        :rtype: int
+        """
+        with self.__lock:
+            return len(self.__results)
+
+    def invalidate(self):
+        """Drops the kept results, so the next calls perform new loads. The loads in flight are still shared."""
+        with self.__lock:
+            self.__generation += 1
+            self.__results.clear()
+
+    def __drop_expired_results(self, now):
+        while self.__results:
+            key, (_, expiry_deadline) = next(iter(self.__results.items()))
+            if expiry_deadline > now:
+                break
+            del self.__results[key]
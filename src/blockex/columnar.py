@@ -0,0 +1,39 @@
+"""Columnar NumPy representation of the BlockEx Trade API orders
+
+The module requires NumPy. It can be easily installed by running ``pip install numpy``.
+"""
+import numpy
+
+# Field name, NumPy type and conversion of the decoded value
+ORDER_COLUMNS = (
+    ('orderID', numpy.int64, int),
+    ('price', numpy.float64, float),
+    ('quantity', numpy.float64, float),
+    ('initialQuantity', numpy.float64, float),
+    ('offerType', numpy.int8, int),
+    ('type', numpy.int8, int),
+    ('status', numpy.int16, int),
+    ('instrumentID', numpy.int32, int),
+)
+
+ORDER_DTYPE = numpy.dtype([(name, dtype) for name, dtype, _ in ORDER_COLUMNS])
+
+
+def orders_to_array(orders):
+    """Converts decoded orders to a NumPy structured array.
+
+    The values are converted column by column from the dicts of the JSON decoder. The decoder still creates a dict
+    per order, but their number fields are not converted to Decimal and no model objects are created. The prices
+    and quantities are converted to 64-bit floats.
+
+    :param orders: The decoded orders
+    :type orders: list of dict
+    :returns: The orders with the fields orderID, price, quantity, initialQuantity, offerType, type, status and
+        instrumentID. A column is accessed by its field name, e.g. array['price'].
+    :rtype: numpy.ndarray
+    """
+    count = len(orders)
+    array = numpy.empty(count, dtype=ORDER_DTYPE)
+    for name, dtype, convert in ORDER_COLUMNS:
+        array[name] = numpy.fromiter((convert(order[name]) for order in orders), dtype, count)
+    return array
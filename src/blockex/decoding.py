@@ -0,0 +1,61 @@
+"""JSON decoders of the BlockEx Trade API responses"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonDecoder(object):
+    """Decodes JSON with the standard library.
+
+    With parse_float=decimal.Decimal the JSON numbers with fractions are decoded straight to Decimal, so they do not
+    lose precision on a round trip through float.
+    """
+
+    def __init__(self, parse_float=None):
+        """Creates a decoder.
+
+        :param parse_float: Callable converting the string of a JSON number with a fraction, e.g. decimal.Decimal.
+            Optional.
+        :type parse_float: callable
+        """
+        self.parse_float = parse_float
+        self.__decoder = json.JSONDecoder(parse_float=parse_float)
+
+    def decode(self, content):
+        """Decodes a response body.
+
+        :param content: The UTF-8 encoded JSON
+        :type content: bytes
+        :raises: ValueError
+        """
+        return self.__decoder.decode(content.decode('utf-8'))
+
+
+class OrjsonDecoder(object):
+    """Decodes JSON with orjson, which is several times faster than the standard library.
+
+    The JSON numbers with fractions are decoded to float, exactly as the standard library does.
+    """
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('OrjsonDecoder requires orjson. It can be installed by running: pip install orjson')
+
+    def decode(self, content):
+        """Decodes a response body.
+
+        :param content: The UTF-8 encoded JSON
+        :type content: bytes
+        :raises: ValueError
+        """
+        return orjson.loads(content)
+
+
+def create_default_json_decoder():
+    """Creates the fastest available decoder: OrjsonDecoder when orjson is installed, otherwise JsonDecoder."""
+    if orjson is not None:
+        return OrjsonDecoder()
+    return JsonDecoder()
@@ -0,0 +1,144 @@
+"""Cache of the instruments of the BlockEx Trade API"""
+import logging
+import threading
+from blockex.tradeapi import monotonic
+
+DEFAULT_INSTRUMENTS_TTL = 300
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentCache(object):
+    """Caches the instruments returned by a BlockExTradeApi with lookups by id and name.
+
+    The instruments are loaded on first use and reloaded on the first use after ttl seconds. With background_refresh
+    they are instead reloaded every ttl seconds by a background thread, so lookups never wait for a request. The
+    cached instruments are shared between callers and must not be modified. When the client has an
+    instrument_factory, e.g. blockex.models.Instrument.from_dict, the cache holds the created instrument objects.
+    """
+
+    def __init__(self, trade_api, ttl=DEFAULT_INSTRUMENTS_TTL, partner=False, background_refresh=False):
+        """Creates an instrument cache.
+
+        :param trade_api: The client used to load the instruments.
+        :type trade_api: BlockExTradeApi
+        :param ttl: Seconds after which the instruments are reloaded. Optional.
+        :type ttl: float
+        :param partner: Sets whether to cache the partner instruments instead of the trader instruments. Optional.
+        :type partner: boolean
+        :param background_refresh: Sets whether to reload the instruments in a background thread. Optional.
+        :type background_refresh: boolean
+        """
+        self.trade_api = trade_api
+        self.ttl = ttl
+        self.partner = partner
+        self.__instruments = None
+        self.__instruments_by_id = {}
+        self.__instruments_by_name = {}
+        self.__expiry_deadline = None
+        self.__lock = threading.Lock()
+        self.__closed = threading.Event()
+        self.__thread = None
+        if background_refresh:
+            self.__thread = threading.Thread(target=self.__refresh_in_background)
+            self.__thread.daemon = True
+            self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Stops the background refresh."""
+        self.__closed.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def get_instruments(self):
+        """Gets the cached instruments, loading them first when they are missing or expired.
+
+        :returns: The list of instruments as returned by get_trader_instruments() or get_partner_instruments().
+        :rtype: list of dict
+        :raises: RequestException
+        """
+        instruments = self.__instruments
+        if instruments is None or self.__is_stale():
+            with self.__lock:
+                # Another caller may have loaded the instruments while this one was waiting
+                if self.__instruments is None or self.__is_stale():
+                    self.__load()
+                instruments = self.__instruments
+        return instruments
+
+    def get_by_id(self, instrument_id):
+        """Gets an instrument by its identifier.
+
+        :param instrument_id: Instrument identifier
+        :type instrument_id: int
+        :returns: The instrument or None when there is no such instrument.
+        :rtype: dict
+        :raises: RequestException
+        """
+        self.get_instruments()
+        return self.__instruments_by_id.get(instrument_id)
+
+    def get_by_name(self, name):
+        """Gets an instrument by its name, e.g. BTC/EUR.
+
+        :param name: Instrument name
+        :type name: string
+        :returns: The instrument or None when there is no such instrument.
+        :rtype: dict
+        :raises: RequestException
+        """
+        self.get_instruments()
+        return self.__instruments_by_name.get(name)
+
+    def refresh(self):
+        """Reloads the instruments.
+
+        :returns: The list of instruments.
+        :rtype: list of dict
+        :raises: RequestException
+        """
+        with self.__lock:
+            self.__load()
+            return self.__instruments
+
+    def invalidate(self):
+        """Drops the cached instruments, so they are reloaded on next use."""
+        with self.__lock:
+            self.__instruments = None
+
+    def __is_stale(self):
+        # With a background refresh the readers keep using the loaded instruments until they are replaced
+        return self.__thread is None and self.__expiry_deadline <= monotonic()
+
+    def __load(self):
+        if self.partner:
+            instruments = self.trade_api.get_partner_instruments()
+        else:
+            instruments = self.trade_api.get_trader_instruments()
+
+        self.__instruments_by_id = dict((get_field(instrument, 'id'), instrument) for instrument in instruments)
+        self.__instruments_by_name = dict((get_field(instrument, 'name'), instrument) for instrument in instruments)
+        self.__instruments = instruments
+        self.__expiry_deadline = monotonic() + self.ttl
+
+    def __refresh_in_background(self):
+        while not self.__closed.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logger.warning('Background refresh of the instruments failed.', exc_info=True)
+            self.__closed.wait(self.ttl)
+
+
+def get_field(instrument, name):
+    """Gets a field of an instrument dict or of an instrument object created by an instrument factory."""
+    if isinstance(instrument, dict):
+        return instrument[name]
+    return getattr(instrument, name)
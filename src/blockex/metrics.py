@@ -0,0 +1,220 @@
+"""Metrics of the BlockEx Trade API client with an export in the Prometheus text format
+
+The client reports its metrics to a sink, i.e. any object with the methods observe(name, value, labels) and
+increment(name, labels, amount). The labels are tuples of (name, value) pairs. MetricsRegistry is a sink keeping
+the metrics in memory, and generate_prometheus_text() and start_prometheus_server() export them.
+"""
+import bisect
+import threading
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from six.moves.BaseHTTPServer import HTTPServer
+
+# Histograms, observed in seconds
+REQUEST_DURATION = 'blockex_request_duration_seconds'
+DECODE_DURATION = 'blockex_decode_duration_seconds'
+CONVERT_DURATION = 'blockex_convert_duration_seconds'
+THROTTLED_DURATION = 'blockex_throttled_seconds'
+
+# Counters
+LOGINS = 'blockex_logins_total'
+REAUTHENTICATIONS = 'blockex_reauthentications_total'
+ERRORS = 'blockex_errors_total'
+
+DESCRIPTIONS = {
+    REQUEST_DURATION: 'Duration of the Trade API requests by endpoint and status code.',
+    DECODE_DURATION: 'Duration of decoding the JSON response bodies.',
+    CONVERT_DURATION: 'Duration of converting the decoded orders and instruments.',
+    THROTTLED_DURATION: 'Time the requests held back by the rate limiter waited by endpoint.',
+    LOGINS: 'Number of logins.',
+    REAUTHENTICATIONS: 'Number of requests repeated after a new login because the access token was rejected.',
+    ERRORS: 'Number of requests that failed with an error response or a connection error by endpoint.',
+}
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram(object):
+    """Counts of the observed values by bucket with their sum"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # The last count is of the values above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get_cumulative_counts(self):
+        cumulative_counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            cumulative_counts.append(total)
+        return cumulative_counts
+
+
+class MetricsRegistry(object):
+    """Keeps the histograms and counters reported by the clients in memory. Safe to share between threads."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Creates an empty registry.
+
+        :param buckets: Upper bounds of the histogram buckets in ascending order. Optional.
+        :type buckets: tuple of float
+        """
+        self.buckets = tuple(buckets)
+        self.__histograms = {}
+        self.__counters = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, name, value, labels=()):
+        """Adds a value to a histogram.
+
+        :param name: Metric name
+        :type name: string
+        :param value: Observed value
+        :type value: float
+        :param labels: Label names and values
+        :type labels: tuple of tuple
+        """
+        key = (name, labels)
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if histogram is None:
+                histogram = self.__histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def increment(self, name, labels=(), amount=1):
+        """Increments a counter.
+
+        :param name: Metric name
+        :type name: string
+        :param labels: Label names and values
+        :type labels: tuple of tuple
+        :param amount: Amount added to the counter
+        :type amount: float
+        """
+        key = (name, labels)
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + amount
+
+    def get_histogram(self, name, labels=()):
+        """Gets a histogram or None when nothing was observed."""
+        with self.__lock:
+            return self.__histograms.get((name, labels))
+
+    def get_counter(self, name, labels=()):
+        """Gets the value of a counter."""
+        with self.__lock:
+            return self.__counters.get((name, labels), 0)
+
+    def get_metrics(self):
+        """Gets copies of the histograms and the counters.
+
+        :returns: The histograms and the counters, both by (name, labels).
+        :rtype: tuple of dict
+        """
+        with self.__lock:
+            histograms = {}
+            for key, histogram in self.__histograms.items():
+                histograms[key] = copy = Histogram(histogram.buckets)
+                copy.counts = list(histogram.counts)
+                copy.sum = histogram.sum
+                copy.count = histogram.count
+            return histograms, dict(self.__counters)
+
+
+def generate_prometheus_text(registry):
+    """Formats the metrics of a registry in the Prometheus text exposition format.
+
+    :param registry: The registry
+    :type registry: MetricsRegistry
+    :rtype: string
+    """
+    histograms, counters = registry.get_metrics()
+    lines = []
+
+    for name in sorted(set(name for name, _ in histograms)):
+        append_header(lines, name, 'histogram')
+        for (metric_name, labels), histogram in sorted(histograms.items()):
+            if metric_name != name:
+                continue
+            cumulative_counts = histogram.get_cumulative_counts()
+            bounds = [format_value(bucket) for bucket in histogram.buckets] + ['+Inf']
+            for bound, count in zip(bounds, cumulative_counts):
+                lines.append('{name}_bucket{labels} {count}'.format(
+                    name=name, labels=format_labels(labels + (('le', bound),)), count=count))
+            lines.append('{name}_sum{labels} {sum}'.format(
+                name=name, labels=format_labels(labels), sum=format_value(histogram.sum)))
+            lines.append('{name}_count{labels} {count}'.format(
+                name=name, labels=format_labels(labels), count=histogram.count))
+
+    for name in sorted(set(name for name, _ in counters)):
+        append_header(lines, name, 'counter')
+        for (metric_name, labels), value in sorted(counters.items()):
+            if metric_name == name:
+                lines.append('{name}{labels} {value}'.format(
+                    name=name, labels=format_labels(labels), value=format_value(value)))
+
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def start_prometheus_server(registry, port, host=''):
+    """Serves the metrics of a registry for Prometheus from a background thread.
+
+    :param registry: The registry
+    :type registry: MetricsRegistry
+    :param port: Port to listen on. 0 picks a free port.
+    :type port: int
+    :param host: Address to listen on. By default all the addresses. Optional.
+    :type host: string
+    :returns: The server. Its server_address holds the address and the port, shutdown() stops it.
+    :rtype: HTTPServer
+    """
+    server = HTTPServer((host, port), PrometheusRequestHandler)
+    server.registry = registry
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+class PrometheusRequestHandler(BaseHTTPRequestHandler):
+    """Answers any GET request with the metrics of the registry of the server"""
+
+    def do_GET(self):
+        body = generate_prometheus_text(self.server.registry).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def append_header(lines, name, metric_type):
+    if name in DESCRIPTIONS:
+        lines.append('# HELP {name} {description}'.format(name=name, description=DESCRIPTIONS[name]))
+    lines.append('# TYPE {name} {metric_type}'.format(name=name, metric_type=metric_type))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{0}="{1}"'.format(name, escape_label_value(value)) for name, value in labels) + '}'
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
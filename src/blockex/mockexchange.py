@@ -0,0 +1,721 @@
+"""In-process mock of the BlockEx Trade API backed by a matching engine
+
+MockExchange issues the access tokens, keeps the orders of the traders and matches them by price and time priority,
+so the orders get filled and produce trades like on the exchange. MockExchangeServer serves it over HTTP on a local
+port with the paths of BlockExTradeApi, so a client can be load tested end to end without the live API:
+
+    with MockExchangeServer(MockExchange()) as server:
+        trade_api = BlockExTradeApi(server.url, 'MockApiID', 'MockUsername', 'MockPassword')
+
+The server can also be run on its own, e.g. ``python -m blockex.mockexchange --port 8080 --seed-orders 100``.
+"""
+import argparse
+import bisect
+import collections
+import datetime
+import decimal
+import itertools
+import json
+import threading
+import uuid
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from six.moves.BaseHTTPServer import HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import parse_qs
+from six.moves.urllib.parse import urlsplit
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderStatus
+from blockex.tradeapi import OrderType
+from blockex.tradeapi import monotonic
+
+DEFAULT_TOKEN_LIFETIME = 86399
+DEFAULT_MAX_COUNT = 100
+DEFAULT_CLOSED_ORDER_LIMIT = 10000
+
+# The requests name the offer and order types, the responses represent them with integers
+BID = 1
+ASK = 2
+OFFER_TYPE_CODES = {OfferType.BID.value: BID, OfferType.ASK.value: ASK}
+ORDER_TYPE_CODES = {OrderType.LIMIT.value: 1, OrderType.MARKET.value: 2, OrderType.STOP.value: 3}
+OPEN_STATUSES = (OrderStatus.PLACED.value, OrderStatus.PARTIALLY_EXECUTED.value)
+
+UNAUTHORIZED_MESSAGE = 'Authorization has been denied for this request.'
+
+
+def create_instruments(count):
+    """Builds instrument dicts shaped like the instruments responses.
+
+    :param count: Number of instruments. Their identifiers start from 1.
+    :type count: int
+    :rtype: list of dict
+    """
+    instruments = []
+    for index in range(count):
+        instruments.append({
+            'id': index + 1,
+            'description': 'Instrument {0}'.format(index + 1),
+            'name': 'INS{0}/EUR'.format(index + 1),
+            'baseCurrencyID': 40 + index,
+            'quoteCurrencyID': 2,
+            'minOrderAmount': '0.010000000000',
+            'commissionFeePercent': 0.002,
+        })
+    return instruments
+
+
+class MockOrder(object):
+    """Order kept by the mock exchange"""
+    __slots__ = (
+        'order_id',
+        'trader',
+        'instrument',
+        'offer_type',
+        'order_type',
+        'price',
+        'initial_quantity',
+        'quantity',
+        'status',
+        'date_created',
+        'trades',
+    )
+
+    def __init__(self, order_id, trader, instrument, offer_type, order_type, price, quantity, date_created):
+        self.order_id = order_id
+        self.trader = trader
+        self.instrument = instrument
+        self.offer_type = offer_type
+        self.order_type = order_type
+        self.price = price
+        self.initial_quantity = quantity
+        self.quantity = quantity
+        self.status = OrderStatus.PENDING.value
+        self.date_created = date_created
+        # Tuples of (trade identifier, price, quantity, trade date)
+        self.trades = []
+
+    @property
+    def is_open(self):
+        return self.status in OPEN_STATUSES
+
+    def to_dict(self, load_executions=False):
+        """Builds the order dict of the responses."""
+        trades = None
+        if load_executions:
+            trades = [{
+                'tradeID': trade_id,
+                'price': price,
+                'totalPrice': price * quantity,
+                'quantity': quantity,
+                'tradeDate': trade_date,
+                'currencyID': self.instrument['baseCurrencyID'],
+                'quoteCurrencyID': self.instrument['quoteCurrencyID'],
+                'instrumentID': self.instrument['id'],
+                'offerType': self.offer_type,
+            } for trade_id, price, quantity, trade_date in self.trades]
+        return {
+            'orderID': str(self.order_id),
+            'price': self.price,
+            'initialQuantity': self.initial_quantity,
+            'quantity': self.quantity,
+            'dateCreated': self.date_created,
+            'offerType': self.offer_type,
+            'type': self.order_type,
+            'status': self.status,
+            'instrumentID': self.instrument['id'],
+            'trades': trades,
+        }
+
+
+class PriceLevels(object):
+    """Resting orders of one side of a book. Each price holds its orders in the order they arrived."""
+
+    def __init__(self, descending):
+        self.descending = descending
+        # Sorted in ascending order
+        self.prices = []
+        self.queues = {}
+
+    def add(self, order):
+        queue = self.queues.get(order.price)
+        if queue is None:
+            bisect.insort(self.prices, order.price)
+            queue = self.queues[order.price] = collections.deque()
+        queue.append(order)
+
+    def remove(self, order):
+        queue = self.queues[order.price]
+        queue.remove(order)
+        if not queue:
+            self.remove_level(order.price)
+
+    def remove_level(self, price):
+        del self.prices[bisect.bisect_left(self.prices, price)]
+        del self.queues[price]
+
+    def best_price(self):
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.descending else self.prices[0]
+
+    def iter_orders(self):
+        """Iterates over the orders by price and time priority."""
+        prices = reversed(self.prices) if self.descending else iter(self.prices)
+        for price in prices:
+            for order in self.queues[price]:
+                yield order
+
+
+class Book(object):
+    """Resting bids and asks of an instrument"""
+
+    def __init__(self):
+        self.bids = PriceLevels(descending=True)
+        self.asks = PriceLevels(descending=False)
+
+    def get_side(self, offer_type):
+        return self.bids if offer_type == BID else self.asks
+
+
+class MockExchange(object):
+    """Mock of the BlockEx exchange matching the orders of its traders by price and time priority.
+
+    A limit order is first matched against the resting orders of the other side at its price or better, the best
+    price first and the oldest order first within a price. Each match executes at the price of the resting order
+    and adds a trade to both orders. The rest of a limit order rests in the book. The rest of a market order is
+    cancelled. Stop orders are not supported and rejected.
+
+    The methods raise ValueError with the message of the error response when a request is invalid. An instance is
+    safe to share between threads.
+    """
+
+    def __init__(
+            self,
+            instruments=None,
+            api_id=None,
+            traders=None,
+            token_lifetime=DEFAULT_TOKEN_LIFETIME,
+            closed_order_limit=DEFAULT_CLOSED_ORDER_LIMIT):
+        """Creates an exchange without orders.
+
+        :param instruments: Instrument dicts shaped like the instruments responses. By default 4 instruments with
+            the identifiers 1 to 4. Optional.
+        :type instruments: list of dict
+        :param api_id: The only API ID accepted. By default any. Optional.
+        :type api_id: string
+        :param traders: Passwords by username of the only traders allowed to log in. By default any trader can log in
+            with any password. Optional.
+        :type traders: dict
+        :param token_lifetime: Seconds until the issued access tokens expire. Optional.
+        :type token_lifetime: float
+        :param closed_order_limit: Maximum number of closed orders kept per trader. The oldest ones are dropped.
+            Optional.
+        :type closed_order_limit: int
+        """
+        self.instruments = instruments if instruments is not None else create_instruments(4)
+        self.api_id = api_id
+        self.traders = traders
+        self.token_lifetime = token_lifetime
+        self.closed_order_limit = closed_order_limit
+        # Replaceable in tests
+        self.clock = monotonic
+        self.__instruments = dict((instrument['id'], instrument) for instrument in self.instruments)
+        self.__min_order_amounts = dict(
+            (instrument['id'], decimal.Decimal(str(instrument['minOrderAmount']))) for instrument in self.instruments)
+        self.__books = dict((instrument['id'], Book()) for instrument in self.instruments)
+        # Expiry times and usernames by access token
+        self.__tokens = {}
+        self.__orders = {}
+        # Orders of each trader in the order they were created and identifiers of their closed orders
+        self.__trader_orders = {}
+        self.__closed_order_ids = {}
+        self.__order_ids = itertools.count(1)
+        self.__trade_ids = itertools.count(1)
+        self.__lock = threading.Lock()
+
+    def login(self, username, password, client_id):
+        """Issues an access token.
+
+        :returns: The access token response.
+        :rtype: dict
+        :raises: ValueError when the client identifier or the credentials are not accepted.
+        """
+        if not username or (self.traders is not None and self.traders.get(username) != password):
+            raise ValueError('The user name or password is incorrect.')
+        self.check_api_id(client_id)
+
+        access_token = uuid.uuid4().hex
+        with self.__lock:
+            self.__tokens[access_token] = (self.clock() + self.token_lifetime, username)
+        return {'access_token': access_token, 'token_type': 'bearer', 'expires_in': self.token_lifetime}
+
+    def logout(self, access_token):
+        """Revokes an access token."""
+        with self.__lock:
+            self.__tokens.pop(access_token, None)
+
+    def authenticate(self, access_token):
+        """Gets the username of the trader of an access token.
+
+        :returns: The username or None when the access token is unknown or expired.
+        :rtype: string
+        """
+        with self.__lock:
+            token = self.__tokens.get(access_token)
+            if token is None:
+                return None
+            expiry_time, username = token
+            if expiry_time <= self.clock():
+                del self.__tokens[access_token]
+                return None
+            return username
+
+    def check_api_id(self, api_id):
+        if self.api_id is not None and api_id != self.api_id:
+            raise ValueError('Invalid API ID.')
+
+    def get_instruments(self):
+        return self.instruments
+
+    def create_order(self, trader, offer_type, order_type, instrument_id, price, quantity):
+        """Places an order and matches it against the resting orders.
+
+        :param trader: Username of the trader
+        :type trader: string
+        :param offer_type: Offer type. Possible values 1 (Bid) and 2 (Ask).
+        :type offer_type: int
+        :param order_type: Order type. Possible values 1 (Limit) and 2 (Market).
+        :type order_type: int
+        :param instrument_id: Instrument identifier
+        :type instrument_id: int
+        :param price: Price. Ignored for market orders.
+        :type price: decimal.Decimal
+        :param quantity: Quantity
+        :type quantity: decimal.Decimal
+        :returns: The order
+        :rtype: MockOrder
+        :raises: ValueError
+        """
+        instrument = self.__instruments.get(instrument_id)
+        if instrument is None:
+            raise ValueError('Invalid instrument.')
+        if offer_type not in (BID, ASK):
+            raise ValueError('Invalid offer type.')
+        if order_type == ORDER_TYPE_CODES[OrderType.STOP.value]:
+            raise ValueError('Stop orders are not supported.')
+        if order_type not in ORDER_TYPE_CODES.values():
+            raise ValueError('Invalid order type.')
+        is_market_order = order_type == ORDER_TYPE_CODES[OrderType.MARKET.value]
+        if not is_market_order and price <= 0:
+            raise ValueError('The price must be greater than zero.')
+        if quantity < self.__min_order_amounts[instrument_id]:
+            raise ValueError('The quantity is less than the minimum order amount.')
+
+        date_created = get_date()
+        with self.__lock:
+            order = MockOrder(
+                next(self.__order_ids), trader, instrument, offer_type, order_type, price, quantity, date_created)
+            self.__orders[order.order_id] = order
+            self.__trader_orders.setdefault(trader, collections.OrderedDict())[order.order_id] = order
+
+            book = self.__books[instrument_id]
+            self.__match(book, order, is_market_order, date_created)
+            if order.quantity == 0:
+                self.__close(order, OrderStatus.EXECUTED.value)
+            elif is_market_order:
+                self.__close(order, OrderStatus.CANCELLED.value)
+            else:
+                if not order.trades:
+                    order.status = OrderStatus.PLACED.value
+                book.get_side(offer_type).add(order)
+        return order
+
+    def cancel_order(self, trader, order_id):
+        """Cancels an open order of a trader.
+
+        :raises: ValueError when the trader has no open order with the identifier.
+        """
+        with self.__lock:
+            order = self.__orders.get(order_id)
+            if order is None or order.trader != trader:
+                raise ValueError('The order was not found.')
+            if not order.is_open:
+                raise ValueError('The order is not open.')
+            self.__cancel(order)
+
+    def cancel_all_orders(self, trader, instrument_id):
+        """Cancels all the open orders of a trader for an instrument."""
+        if instrument_id not in self.__instruments:
+            raise ValueError('Invalid instrument.')
+        with self.__lock:
+            for order in list(self.__trader_orders.get(trader, {}).values()):
+                if order.is_open and order.instrument['id'] == instrument_id:
+                    self.__cancel(order)
+
+    def get_orders(
+            self,
+            trader,
+            instrument_id=None,
+            order_type=None,
+            offer_type=None,
+            statuses=None,
+            load_executions=False,
+            max_count=DEFAULT_MAX_COUNT):
+        """Gets the most recent orders of a trader, the newest first.
+
+        :returns: The order dicts
+        :rtype: list of dict
+        """
+        with self.__lock:
+            orders = self.__trader_orders.get(trader, collections.OrderedDict())
+            return self.__filter_orders(
+                (orders[order_id] for order_id in reversed(orders)),
+                instrument_id, order_type, offer_type, statuses, load_executions, max_count)
+
+    def get_market_orders(
+            self,
+            instrument_id,
+            order_type=None,
+            offer_type=None,
+            statuses=None,
+            max_count=DEFAULT_MAX_COUNT):
+        """Gets the resting orders of an instrument, the bids and then the asks by price and time priority.
+
+        :returns: The order dicts
+        :rtype: list of dict
+        """
+        book = self.__books.get(instrument_id)
+        if book is None:
+            raise ValueError('Invalid instrument.')
+        with self.__lock:
+            return self.__filter_orders(
+                itertools.chain(book.bids.iter_orders(), book.asks.iter_orders()),
+                None, order_type, offer_type, statuses, False, max_count)
+
+    def seed(self, order_count, mid_price=100, tick='0.05', quantity=1, trader='MockMarketMaker'):
+        """Places resting limit orders on both sides of every instrument, so the books are not empty.
+
+        :param order_count: Number of orders per instrument, split between the bids and the asks.
+        :type order_count: int
+        """
+        mid_price = decimal.Decimal(str(mid_price))
+        tick = decimal.Decimal(str(tick))
+        quantity = decimal.Decimal(str(quantity))
+        limit = ORDER_TYPE_CODES[OrderType.LIMIT.value]
+        for instrument_id in sorted(self.__instruments):
+            for index in range(order_count):
+                level = index // 2 + 1
+                if index % 2:
+                    self.create_order(trader, ASK, limit, instrument_id, mid_price + tick * level, quantity)
+                else:
+                    self.create_order(trader, BID, limit, instrument_id, mid_price - tick * level, quantity)
+
+    def __match(self, book, order, is_market_order, trade_date):
+        opposite_side = book.asks if order.offer_type == BID else book.bids
+        while order.quantity > 0:
+            price = opposite_side.best_price()
+            if price is None:
+                break
+            if not is_market_order and (price > order.price if order.offer_type == BID else price < order.price):
+                break
+
+            queue = opposite_side.queues[price]
+            resting_order = queue[0]
+            quantity = min(order.quantity, resting_order.quantity)
+            trade_id = next(self.__trade_ids)
+            self.__execute(order, trade_id, price, quantity, trade_date)
+            self.__execute(resting_order, trade_id, price, quantity, trade_date)
+            if resting_order.quantity == 0:
+                queue.popleft()
+                if not queue:
+                    opposite_side.remove_level(price)
+                self.__close(resting_order, OrderStatus.EXECUTED.value)
+
+    def __execute(self, order, trade_id, price, quantity, trade_date):
+        order.quantity -= quantity
+        order.trades.append((trade_id, price, quantity, trade_date))
+        order.status = OrderStatus.PARTIALLY_EXECUTED.value
+
+    def __cancel(self, order):
+        self.__books[order.instrument['id']].get_side(order.offer_type).remove(order)
+        self.__close(order, OrderStatus.CANCELLED.value)
+
+    def __close(self, order, status):
+        order.status = status
+        closed_order_ids = self.__closed_order_ids.setdefault(order.trader, collections.deque())
+        closed_order_ids.append(order.order_id)
+        if len(closed_order_ids) > self.closed_order_limit:
+            dropped_order_id = closed_order_ids.popleft()
+            del self.__orders[dropped_order_id]
+            del self.__trader_orders[order.trader][dropped_order_id]
+
+    @staticmethod
+    def __filter_orders(orders, instrument_id, order_type, offer_type, statuses, load_executions, max_count):
+        filtered_orders = []
+        for order in orders:
+            if len(filtered_orders) >= max_count:
+                break
+            if instrument_id is not None and order.instrument['id'] != instrument_id:
+                continue
+            if order_type is not None and order.order_type != order_type:
+                continue
+            if offer_type is not None and order.offer_type != offer_type:
+                continue
+            if statuses is not None and order.status not in statuses:
+                continue
+            filtered_orders.append(order.to_dict(load_executions))
+        return filtered_orders
+
+
+class MockExchangeRequestHandler(BaseHTTPRequestHandler):
+    """Answers the Trade API requests from the exchange of the server"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.__dispatch('get')
+
+    def do_POST(self):
+        self.__dispatch('post')
+
+    def log_message(self, format, *args):
+        pass
+
+    def __dispatch(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = urlsplit(self.path)
+        route = ROUTES.get((method, url.path.lstrip('/')))
+        if route is None:
+            self.__send(404, {'message': 'No HTTP resource was found that matches the request URI.'})
+            return
+
+        handle, authorized = route
+        exchange = self.server.exchange
+        trader = None
+        if authorized:
+            authorization = self.headers.get('Authorization') or ''
+            if authorization.startswith('Bearer '):
+                trader = exchange.authenticate(authorization[len('Bearer '):])
+            if trader is None:
+                self.__send(401, {'message': UNAUTHORIZED_MESSAGE})
+                return
+
+        parameters = url.query if method == 'get' or url.query else body.decode('utf-8')
+        parameters = dict((name, values[-1]) for name, values in parse_qs(parameters).items())
+        try:
+            content = handle(exchange, trader, parameters, self.headers)
+        except ValueError as err:
+            self.__send(400, {'message': str(err)})
+            return
+        self.__send(200, content)
+
+    def __send(self, status_code, content):
+        body = b'' if content is None else json.dumps(content, default=str).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def handle_login(exchange, trader, parameters, headers):
+    if parameters.get('grant_type') != 'password':
+        raise ValueError('Unsupported grant type.')
+    return exchange.login(parameters.get('username'), parameters.get('password'), parameters.get('client_id'))
+
+
+def handle_logout(exchange, trader, parameters, headers):
+    exchange.logout(headers.get('Authorization')[len('Bearer '):])
+
+
+def handle_get_orders(exchange, trader, parameters, headers):
+    return exchange.get_orders(
+        trader,
+        parse_int(parameters, 'instrumentID'),
+        parse_code(parameters, 'orderType', ORDER_TYPE_CODES),
+        parse_code(parameters, 'offerType', OFFER_TYPE_CODES),
+        parse_statuses(parameters),
+        parameters.get('loadExecutions', '').lower() == 'true',
+        parse_int(parameters, 'maxCount', DEFAULT_MAX_COUNT))
+
+
+def handle_get_market_orders(exchange, trader, parameters, headers):
+    exchange.check_api_id(parameters.get('apiID'))
+    return exchange.get_market_orders(
+        parse_int(parameters, 'instrumentID', required=True),
+        parse_code(parameters, 'orderType', ORDER_TYPE_CODES),
+        parse_code(parameters, 'offerType', OFFER_TYPE_CODES),
+        parse_statuses(parameters),
+        parse_int(parameters, 'maxCount', DEFAULT_MAX_COUNT))
+
+
+def handle_create_order(exchange, trader, parameters, headers):
+    exchange.create_order(
+        trader,
+        parse_code(parameters, 'offerType', OFFER_TYPE_CODES, required=True),
+        parse_code(parameters, 'orderType', ORDER_TYPE_CODES, required=True),
+        parse_int(parameters, 'instrumentID', required=True),
+        parse_decimal(parameters, 'price'),
+        parse_decimal(parameters, 'quantity'))
+
+
+def handle_cancel_order(exchange, trader, parameters, headers):
+    exchange.cancel_order(trader, parse_int(parameters, 'orderID', required=True))
+
+
+def handle_cancel_all_orders(exchange, trader, parameters, headers):
+    exchange.cancel_all_orders(trader, parse_int(parameters, 'instrumentID', required=True))
+
+
+def handle_get_trader_instruments(exchange, trader, parameters, headers):
+    return exchange.get_instruments()
+
+
+def handle_get_partner_instruments(exchange, trader, parameters, headers):
+    exchange.check_api_id(parameters.get('apiID'))
+    return exchange.get_instruments()
+
+
+# Handlers by method and path, with whether they require an access token
+ROUTES = {
+    ('post', BlockExTradeApi.LOGIN_PATH): (handle_login, False),
+    ('post', BlockExTradeApi.LOGOUT_PATH): (handle_logout, True),
+    ('get', BlockExTradeApi.GET_ORDERS_PATH.rstrip('?')): (handle_get_orders, True),
+    ('get', BlockExTradeApi.GET_MARKET_ORDERS_PATH.rstrip('?')): (handle_get_market_orders, False),
+    ('post', BlockExTradeApi.CREATE_ORDER_PATH.rstrip('?')): (handle_create_order, True),
+    ('post', BlockExTradeApi.CANCEL_ORDER_PATH.rstrip('?')): (handle_cancel_order, True),
+    ('post', BlockExTradeApi.CANCEL_ALL_ORDERS_PATH.rstrip('?')): (handle_cancel_all_orders, True),
+    ('get', BlockExTradeApi.GET_TRADER_INSTRUMENTS_PATH): (handle_get_trader_instruments, True),
+    ('get', BlockExTradeApi.GET_PARTNER_INSTRUMENTS_PATH.rstrip('?')): (handle_get_partner_instruments, False),
+}
+
+
+def parse_int(parameters, name, default=None, required=False):
+    value = parameters.get(name)
+    if value is None:
+        if required:
+            raise ValueError('The {0} is required.'.format(name))
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('Invalid {0}.'.format(name))
+
+
+def parse_decimal(parameters, name):
+    value = parameters.get(name)
+    if value is None:
+        raise ValueError('The {0} is required.'.format(name))
+    try:
+        number = decimal.Decimal(value)
+    except decimal.InvalidOperation:
+        raise ValueError('Invalid {0}.'.format(name))
+    if not number.is_finite():
+        raise ValueError('Invalid {0}.'.format(name))
+    return number
+
+
+def parse_code(parameters, name, codes, required=False):
+    value = parameters.get(name)
+    if value is None:
+        if required:
+            raise ValueError('The {0} is required.'.format(name))
+        return None
+    if value not in codes:
+        raise ValueError('Invalid {0}.'.format(name))
+    return codes[value]
+
+
+def parse_statuses(parameters):
+    value = parameters.get('status')
+    if not value:
+        return None
+    try:
+        return frozenset(int(status) for status in value.split(','))
+    except ValueError:
+        raise ValueError('Invalid status.')
+
+
+def get_date():
+    return datetime.datetime.utcnow().isoformat() + '+00:00'
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # Many clients connect at once under load
+    request_queue_size = 128
+
+
+class MockExchangeServer(object):
+    """Serves a mock exchange over HTTP on a local port.
+
+    Use it as a context manager or call start() and stop() to serve from a background thread. The url attribute
+    holds the API URL to pass to BlockExTradeApi.
+    """
+
+    def __init__(self, exchange=None, host='127.0.0.1', port=0):
+        """Creates a server listening on a port.
+
+        :param exchange: The exchange. By default a new MockExchange. Optional.
+        :type exchange: MockExchange
+        :param host: Address to listen on. Optional.
+        :type host: string
+        :param port: Port to listen on. By default a free port. Optional.
+        :type port: int
+        """
+        self.exchange = exchange if exchange is not None else MockExchange()
+        self.server = ThreadingHTTPServer((host, port), MockExchangeRequestHandler)
+        self.server.exchange = self.exchange
+        self.url = 'http://{0}:{1}/'.format(*self.server.server_address[:2])
+        self.__thread = None
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.server.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.__thread.join()
+
+    def serve_forever(self):
+        """Serves from the calling thread until interrupted."""
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Serves a mock of the BlockEx Trade API with a matching engine.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on')
+    parser.add_argument('--instruments', type=int, default=4, help='number of instruments')
+    parser.add_argument('--api-id', help='the only API ID accepted, by default any')
+    parser.add_argument('--token-lifetime', type=float, default=DEFAULT_TOKEN_LIFETIME, help='seconds')
+    parser.add_argument('--seed-orders', type=int, default=0, help='resting orders placed per instrument')
+    args = parser.parse_args(args)
+
+    exchange = MockExchange(
+        create_instruments(args.instruments),
+        api_id=args.api_id,
+        token_lifetime=args.token_lifetime)
+    exchange.seed(args.seed_orders)
+    server = MockExchangeServer(exchange, args.host, args.port)
+    print('Serving the mock BlockEx Trade API on {0}'.format(server.url))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""Compact typed models of the BlockEx Trade API resources
+
+The models use __slots__, so they take considerably less memory than the decoded dicts. Pass their from_dict()
+factories to BlockExTradeApi, either per client or per call, to get them instead of dicts:
+
+    trade_api = BlockExTradeApi(api_url, api_id, username, password, order_factory=Order.from_dict)
+    instruments = trade_api.get_trader_instruments(instrument_factory=Instrument.from_dict)
+"""
+import decimal
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderStatus
+from blockex.tradeapi import OrderType
+
+# The API represents offer and order types with integers in the responses
+OFFER_TYPES = {1: OfferType.BID, 2: OfferType.ASK}
+ORDER_TYPES = {1: OrderType.LIMIT, 2: OrderType.MARKET, 3: OrderType.STOP}
+ORDER_STATUSES = dict((status.value, status) for status in OrderStatus)
+
+
+class Model(object):
+    """Base of the models with value equality and a readable representation"""
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{class_name}({fields})'.format(
+            class_name=type(self).__name__,
+            fields=', '.join('{0}={1!r}'.format(name, getattr(self, name)) for name in self.__slots__))
+
+
+class Trade(Model):
+    """Executed trade of an order"""
+    __slots__ = (
+        'trade_id',
+        'price',
+        'total_price',
+        'quantity',
+        'trade_date',
+        'currency_id',
+        'quote_currency_id',
+        'instrument_id',
+        'offer_type',
+    )
+
+    def __init__(
+            self,
+            trade_id,
+            price,
+            total_price,
+            quantity,
+            trade_date,
+            currency_id,
+            quote_currency_id,
+            instrument_id,
+            offer_type):
+        self.trade_id = trade_id
+        self.price = price
+        self.total_price = total_price
+        self.quantity = quantity
+        self.trade_date = trade_date
+        self.currency_id = currency_id
+        self.quote_currency_id = quote_currency_id
+        self.instrument_id = instrument_id
+        self.offer_type = offer_type
+
+    @classmethod
+    def from_dict(cls, trade):
+        """Creates a trade from a decoded trade dict.
+
+        :param trade: The decoded trade
+        :type trade: dict
+        :rtype: Trade
+        """
+        create_decimal = decimal.getcontext().create_decimal
+        offer_type = trade['offerType']
+        return cls(
+            trade['tradeID'],
+            create_decimal(trade['price']),
+            create_decimal(trade['totalPrice']),
+            create_decimal(trade['quantity']),
+            trade['tradeDate'],
+            trade['currencyID'],
+            trade['quoteCurrencyID'],
+            trade['instrumentID'],
+            OFFER_TYPES.get(offer_type, offer_type))
+
+
+class Order(Model):
+    """Order of a trader or of the market
+
+    The offer_type, order_type and status are mapped to OfferType, OrderType and OrderStatus. Values unknown to the
+    library are kept as integers.
+    """
+    __slots__ = (
+        'order_id',
+        'price',
+        'initial_quantity',
+        'quantity',
+        'date_created',
+        'offer_type',
+        'order_type',
+        'status',
+        'instrument_id',
+        'trades',
+    )
+
+    def __init__(
+            self,
+            order_id,
+            price,
+            initial_quantity,
+            quantity,
+            date_created,
+            offer_type,
+            order_type,
+            status,
+            instrument_id,
+            trades=None):
+        self.order_id = order_id
+        self.price = price
+        self.initial_quantity = initial_quantity
+        self.quantity = quantity
+        self.date_created = date_created
+        self.offer_type = offer_type
+        self.order_type = order_type
+        self.status = status
+        self.instrument_id = instrument_id
+        self.trades = trades
+
+    @classmethod
+    def from_dict(cls, order):
+        """Creates an order from a decoded order dict.
+
+        :param order: The decoded order
+        :type order: dict
+        :rtype: Order
+        """
+        create_decimal = decimal.getcontext().create_decimal
+        offer_type = order['offerType']
+        order_type = order['type']
+        status = order['status']
+        trades = order.get('trades')
+        return cls(
+            int(order['orderID']),
+            create_decimal(order['price']),
+            create_decimal(order['initialQuantity']),
+            create_decimal(order['quantity']),
+            order['dateCreated'],
+            OFFER_TYPES.get(offer_type, offer_type),
+            ORDER_TYPES.get(order_type, order_type),
+            ORDER_STATUSES.get(status, status),
+            order['instrumentID'],
+            [Trade.from_dict(trade) for trade in trades] if trades else None)
+
+
+class Instrument(Model):
+    """Instrument available for trading"""
+    __slots__ = (
+        'id',
+        'description',
+        'name',
+        'base_currency_id',
+        'quote_currency_id',
+        'min_order_amount',
+        'commission_fee_percent',
+    )
+
+    def __init__(
+            self,
+            id,
+            description,
+            name,
+            base_currency_id,
+            quote_currency_id,
+            min_order_amount,
+            commission_fee_percent):
+        self.id = id
+        self.description = description
+        self.name = name
+        self.base_currency_id = base_currency_id
+        self.quote_currency_id = quote_currency_id
+        self.min_order_amount = min_order_amount
+        self.commission_fee_percent = commission_fee_percent
+
+    @classmethod
+    def from_dict(cls, instrument):
+        """Creates an instrument from a decoded instrument dict.
+
+        :param instrument: The decoded instrument
+        :type instrument: dict
+        :rtype: Instrument
+        """
+        return cls(
+            instrument['id'],
+            instrument['description'],
+            instrument['name'],
+            instrument['baseCurrencyID'],
+            instrument['quoteCurrencyID'],
+            decimal.getcontext().create_decimal(instrument['minOrderAmount']),
+            instrument['commissionFeePercent'])
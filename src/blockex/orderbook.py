@@ -0,0 +1,289 @@
+"""Local order book of an instrument built from the market orders of the BlockEx Trade API"""
+import bisect
+import threading
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderStatus
+
+# The statuses of the orders that are in the book, the others are filled, cancelled or not placed yet
+BOOK_STATUSES = (OrderStatus.PLACED, OrderStatus.PARTIALLY_EXECUTED)
+# The status argument loading only the orders of the book
+BOOK_STATUS_FILTER = ','.join(str(status.value) for status in BOOK_STATUSES)
+
+
+class OrderBookDiff(object):
+    """Changes made to an order book by a snapshot.
+
+    :ivar added: The orders that were not in the book.
+    :ivar changed: The orders whose offer type, price or quantity changed, as they are in the snapshot.
+    :ivar removed: The orders of the book that are not in the snapshot, as they were in the book.
+    """
+
+    def __init__(self, added=None, changed=None, removed=None):
+        self.added = added or []
+        self.changed = changed or []
+        self.removed = removed or []
+
+    @property
+    def is_empty(self):
+        return not (self.added or self.changed or self.removed)
+
+    def __repr__(self):
+        return 'OrderBookDiff(added={added}, changed={changed}, removed={removed})'.format(
+            added=len(self.added), changed=len(self.changed), removed=len(self.removed))
+
+
+class BookSide(object):
+    """Price levels of one side of an order book, kept sorted by price in ascending order"""
+
+    def __init__(self, descending):
+        self.descending = descending
+        self.prices = []
+        self.quantities = {}
+        self.order_counts = {}
+
+    def add(self, price, quantity):
+        if price in self.order_counts:
+            self.order_counts[price] += 1
+            self.quantities[price] += quantity
+        else:
+            bisect.insort(self.prices, price)
+            self.order_counts[price] = 1
+            self.quantities[price] = quantity
+
+    def remove(self, price, quantity):
+        order_count = self.order_counts[price] - 1
+        if order_count:
+            self.order_counts[price] = order_count
+            self.quantities[price] -= quantity
+        else:
+            del self.prices[bisect.bisect_left(self.prices, price)]
+            del self.order_counts[price]
+            del self.quantities[price]
+
+    def best(self):
+        if not self.prices:
+            return None
+        price = self.prices[-1] if self.descending else self.prices[0]
+        return price, self.quantities[price]
+
+    def levels(self, depth=None):
+        prices = reversed(self.prices) if self.descending else iter(self.prices)
+        levels = []
+        for price in prices:
+            if depth is not None and len(levels) >= depth:
+                break
+            levels.append((price, self.quantities[price]))
+        return levels
+
+
+class OrderBook(object):
+    """Price levels of the bids and asks of an instrument.
+
+    The book is updated by applying snapshots of the market orders, e.g. the ones returned by get_market_orders().
+    Each snapshot is applied as a diff against the previous one, so only the price levels of the added, changed and
+    removed orders are updated. The best bid and ask are read in constant time and the quantity at a price in
+    constant time as well. The book is safe to share between threads.
+
+    Only the orders with one of BOOK_STATUSES are in the book, the other orders of a snapshot are left out. The
+    orders can be the dicts returned by the client or blockex.models.Order objects.
+    """
+
+    def __init__(self, trade_api, instrument_id, max_count=None):
+        """Creates an empty order book.
+
+        :param trade_api: The client used by refresh() to load the market orders. Can be None when the snapshots
+            are only applied with apply_snapshot().
+        :type trade_api: BlockExTradeApi
+        :param instrument_id: Instrument identifier
+        :type instrument_id: int
+        :param max_count: Maximum number of market orders loaded by refresh(). Optional.
+        :type max_count: int
+        """
+        self.trade_api = trade_api
+        self.instrument_id = instrument_id
+        self.max_count = max_count
+        self.__bids = BookSide(descending=True)
+        self.__asks = BookSide(descending=False)
+        self.__orders = {}
+        self.__entries = {}
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__orders)
+
+    def refresh(self):
+        """Loads the market orders of the instrument and applies them as a snapshot.
+
+        :returns: The changes made to the book.
+        :rtype: OrderBookDiff
+        :raises: RequestException
+        """
+        orders = self.trade_api.get_market_orders(
+            self.instrument_id,
+            status=BOOK_STATUS_FILTER,
+            max_count=self.max_count)
+        return self.apply_snapshot(orders)
+
+    def apply_snapshot(self, orders):
+        """Updates the book to contain exactly the given orders.
+
+        :param orders: All the market orders of the instrument. The ones without one of BOOK_STATUSES are left out.
+        :type orders: list of dict or list of blockex.models.Order
+        :returns: The changes made to the book.
+        :rtype: OrderBookDiff
+        :raises: ValueError when an order has an unknown offer type
+        """
+        entries = {}
+        snapshot = {}
+        for order in orders:
+            if not is_in_book(order):
+                continue
+            order_id, entry = get_order_entry(order)
+            entries[order_id] = entry
+            snapshot[order_id] = order
+
+        diff = OrderBookDiff()
+        with self.__lock:
+            for order_id, entry in self.__entries.items():
+                if order_id not in entries:
+                    self.__remove(entry)
+                    diff.removed.append(self.__orders[order_id])
+
+            for order_id, entry in entries.items():
+                previous_entry = self.__entries.get(order_id)
+                if previous_entry is None:
+                    self.__add(entry)
+                    diff.added.append(snapshot[order_id])
+                elif previous_entry != entry:
+                    self.__remove(previous_entry)
+                    self.__add(entry)
+                    diff.changed.append(snapshot[order_id])
+
+            self.__entries = entries
+            self.__orders = snapshot
+        return diff
+
+    def get_order(self, order_id):
+        """Gets an order of the book.
+
+        :param order_id: Order identifier
+        :type order_id: int
+        :returns: The order or None when it is not in the book.
+        """
+        return self.__orders.get(order_id)
+
+    def best_bid(self):
+        """Gets the highest bid price level.
+
+        :returns: The price and the total quantity of the level or None when there are no bids.
+        :rtype: tuple
+        """
+        with self.__lock:
+            return self.__bids.best()
+
+    def best_ask(self):
+        """Gets the lowest ask price level.
+
+        :returns: The price and the total quantity of the level or None when there are no asks.
+        :rtype: tuple
+        """
+        with self.__lock:
+            return self.__asks.best()
+
+    def spread(self):
+        """Gets the difference between the best ask and the best bid prices.
+
+        :returns: The spread or None when either side is empty.
+        :rtype: decimal.Decimal
+        """
+        with self.__lock:
+            best_bid = self.__bids.best()
+            best_ask = self.__asks.best()
+        if best_bid is None or best_ask is None:
+            return None
+        return best_ask[0] - best_bid[0]
+
+    def depth_at(self, offer_type, price):
+        """Gets the total quantity of the orders at a price.
+
+        :param offer_type: Side of the book. Possible values OfferType.BID and OfferType.ASK.
+        :type offer_type: OfferType
+        :param price: Price
+        :type price: decimal.Decimal
+        :returns: The total quantity or 0 when there are no orders at the price.
+        :rtype: decimal.Decimal
+        """
+        with self.__lock:
+            return self.__get_side(offer_type).quantities.get(price, 0)
+
+    def bids(self, depth=None):
+        """Gets the bid price levels from the highest price.
+
+        :param depth: Maximum number of levels returned. Optional.
+        :type depth: int
+        :returns: The price and the total quantity of each level.
+        :rtype: list of tuple
+        """
+        with self.__lock:
+            return self.__bids.levels(depth)
+
+    def asks(self, depth=None):
+        """Gets the ask price levels from the lowest price.
+
+        :param depth: Maximum number of levels returned. Optional.
+        :type depth: int
+        :returns: The price and the total quantity of each level.
+        :rtype: list of tuple
+        """
+        with self.__lock:
+            return self.__asks.levels(depth)
+
+    def __get_side(self, offer_type):
+        if not isinstance(offer_type, OfferType):
+            raise ValueError('offer_type must be of type OfferType')
+        return self.__bids if offer_type == OfferType.BID else self.__asks
+
+    def __add(self, entry):
+        is_bid, price, quantity = entry
+        (self.__bids if is_bid else self.__asks).add(price, quantity)
+
+    def __remove(self, entry):
+        is_bid, price, quantity = entry
+        (self.__bids if is_bid else self.__asks).remove(price, quantity)
+
+
+def is_in_book(order):
+    """Checks whether an order is open, i.e. whether it has one of BOOK_STATUSES.
+
+    :param order: A converted order dict or an order object created by blockex.models.Order.from_dict().
+    :rtype: boolean
+    """
+    status = order['status'] if isinstance(order, dict) else order.status
+    return any(status == book_status or status == book_status.value for book_status in BOOK_STATUSES)
+
+
+def get_order_entry(order):
+    """Gets the identifier and the book entry, i.e. whether it is a bid, the price and the quantity, of an order.
+
+    :param order: A converted order dict or an order object created by blockex.models.Order.from_dict().
+    :rtype: tuple
+    :raises: ValueError when the order has an unknown offer type
+    """
+    if isinstance(order, dict):
+        order_id = order['orderID']
+        offer_type = order['offerType']
+        price = order['price']
+        quantity = order['quantity']
+    else:
+        order_id = order.order_id
+        offer_type = order.offer_type
+        price = order.price
+        quantity = order.quantity
+
+    if offer_type == 1 or offer_type == OfferType.BID:
+        is_bid = True
+    elif offer_type == 2 or offer_type == OfferType.ASK:
+        is_bid = False
+    else:
+        raise ValueError('Unknown offer type {0!r} of order {1}'.format(offer_type, order_id))
+    return order_id, (is_bid, price, quantity)
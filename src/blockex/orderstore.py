@@ -0,0 +1,265 @@
+"""Local store of the orders of the trader synced from the BlockEx Trade API"""
+import logging
+import threading
+from blockex.models import OFFER_TYPES
+from blockex.models import ORDER_STATUSES
+from blockex.tradeapi import OrderStatus
+from blockex.tradeapi import convert_order_number_fields
+
+DEFAULT_SYNC_INTERVAL = 1.0
+DEFAULT_CLOSED_LOOKUP_COUNT = 100
+
+# The statuses of the orders kept in the store and the ones an order can end with
+OPEN_STATUSES = (OrderStatus.PENDING, OrderStatus.PLACED, OrderStatus.PARTIALLY_EXECUTED)
+CLOSED_STATUSES = (OrderStatus.FAILED, OrderStatus.REJECTED, OrderStatus.CANCELLED, OrderStatus.EXECUTED)
+
+logger = logging.getLogger(__name__)
+
+
+class OrderEvent(object):
+    """Change of an order found by a sync.
+
+    :ivar status: The status the order changed to, e.g. OrderStatus.PLACED for a new order or
+        OrderStatus.PARTIALLY_EXECUTED for an order whose quantity decreased. None when the order is no longer open,
+        but its final status was not found.
+    :ivar order: The order as it is now or, when the status is None, as it was in the store.
+    :ivar previous_order: The order as it was in the store or None for a new order.
+    """
+
+    def __init__(self, status, order, previous_order=None):
+        self.status = status
+        self.order = order
+        self.previous_order = previous_order
+
+    def __repr__(self):
+        return 'OrderEvent(status={status}, order={order!r})'.format(status=self.status, order=self.order)
+
+
+class OrderStore(object):
+    """Keeps the open orders of the trader with lookups by identifier, instrument, status and offer type.
+
+    A sync loads only the open orders through the status filter of get_orders(). The orders that left the open set
+    are then looked up among the most recent closed orders to find out how they ended. Only the orders whose
+    response changed are converted again. Each change is published to the listeners as an OrderEvent, so the
+    callers can react to the placed, executed and cancelled orders instead of comparing the lists themselves.
+
+    The lookups are local and do not wait for a request. With background_sync the store is synced every interval
+    seconds by a background thread. The stored orders are shared between callers and must not be modified.
+    """
+
+    def __init__(
+            self,
+            trade_api,
+            interval=DEFAULT_SYNC_INTERVAL,
+            closed_lookup_count=DEFAULT_CLOSED_LOOKUP_COUNT,
+            background_sync=False,
+            order_factory=None):
+        """Creates an empty order store. Call sync() to load the orders unless background_sync is set.
+
+        :param trade_api: The client used to load the orders.
+        :type trade_api: BlockExTradeApi
+        :param interval: Seconds between two background syncs. Optional.
+        :type interval: float
+        :param closed_lookup_count: Number of the most recent closed orders loaded to find how the orders that left
+            the open set ended. Optional.
+        :type closed_lookup_count: int
+        :param background_sync: Sets whether to sync the store in a background thread. Optional.
+        :type background_sync: boolean
+        :param order_factory: Callable creating the stored order objects from the decoded order dicts. Defaults to
+            the order_factory of the client. Optional.
+        :type order_factory: callable
+        """
+        self.trade_api = trade_api
+        self.interval = interval
+        self.closed_lookup_count = closed_lookup_count
+        self.order_factory = order_factory
+        self.__orders = {}
+        self.__responses = {}
+        self.__orders_by_instrument = {}
+        self.__orders_by_status = {}
+        self.__orders_by_offer_type = {}
+        self.__listeners = []
+        self.__lock = threading.Lock()
+        self.__sync_lock = threading.Lock()
+        self.__closed = threading.Event()
+        self.__thread = None
+        if background_sync:
+            self.__thread = threading.Thread(target=self.__sync_in_background)
+            self.__thread.daemon = True
+            self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.__orders)
+
+    def close(self):
+        """Stops the background sync."""
+        self.__closed.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def add_listener(self, listener):
+        """Adds a listener of the changes of the orders.
+
+        :param listener: Callable called with each OrderEvent. It is called from the thread performing the sync.
+        :type listener: callable
+        """
+        with self.__lock:
+            self.__listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Removes a listener added with add_listener()."""
+        with self.__lock:
+            self.__listeners.remove(listener)
+
+    def get_order(self, order_id):
+        """Gets an open order.
+
+        :param order_id: Order identifier
+        :type order_id: int
+        :returns: The order or None when there is no such open order.
+        """
+        return self.__orders.get(order_id)
+
+    def get_orders(self, instrument_id=None, status=None, offer_type=None):
+        """Gets the open orders matching the filters.
+
+        :param instrument_id: Instrument identifier. Optional.
+        :type instrument_id: int
+        :param status: Order status. Possible values OrderStatus.PENDING, OrderStatus.PLACED and
+            OrderStatus.PARTIALLY_EXECUTED. Optional.
+        :type status: OrderStatus
+        :param offer_type: Offer type. Possible values OfferType.BID and OfferType.ASK. Optional.
+        :type offer_type: OfferType
+        :returns: The list of orders.
+        :rtype: list
+        """
+        with self.__lock:
+            filters = []
+            if instrument_id is not None:
+                filters.append(self.__orders_by_instrument.get(instrument_id, {}))
+            if status is not None:
+                filters.append(self.__orders_by_status.get(status, {}))
+            if offer_type is not None:
+                filters.append(self.__orders_by_offer_type.get(offer_type, {}))
+            if not filters:
+                return list(self.__orders.values())
+
+            # Scans the smallest index and checks the others
+            filters.sort(key=len)
+            return [order for order_id, order in filters[0].items()
+                    if all(order_id in orders for orders in filters[1:])]
+
+    def sync(self):
+        """Loads the open orders and publishes their changes to the listeners.
+
+        :returns: The changes found by the sync.
+        :rtype: list of OrderEvent
+        :raises: RequestException
+        """
+        with self.__sync_lock:
+            events = self.__sync()
+
+        with self.__lock:
+            listeners = list(self.__listeners)
+        for event in events:
+            for listener in listeners:
+                try:
+                    listener(event)
+                except Exception:
+                    logger.exception('Order store listener failed.')
+        return events
+
+    def __sync(self):
+        # The decoded dicts are kept as they are, so the unchanged orders are not converted again
+        responses = self.__load_responses(
+            ','.join(str(status.value) for status in OPEN_STATUSES),
+            None)
+
+        events = []
+        orders = {}
+        for order_id, response in responses.items():
+            previous_response = self.__responses.get(order_id)
+            previous_order = self.__orders.get(order_id)
+            if response == previous_response:
+                orders[order_id] = previous_order
+                continue
+            order = self.__convert(response)
+            orders[order_id] = order
+            if previous_response is None or previous_response['status'] != response['status'] or\
+                    previous_response['quantity'] != response['quantity']:
+                events.append(OrderEvent(get_status(response), order, previous_order))
+
+        closed_order_ids = [order_id for order_id in self.__responses if order_id not in responses]
+        if closed_order_ids:
+            closed_responses = self.__load_responses(
+                ','.join(str(status.value) for status in CLOSED_STATUSES),
+                self.closed_lookup_count)
+            for order_id in closed_order_ids:
+                previous_order = self.__orders[order_id]
+                response = closed_responses.get(order_id)
+                if response is None:
+                    events.append(OrderEvent(None, previous_order, previous_order))
+                else:
+                    events.append(OrderEvent(get_status(response), self.__convert(response), previous_order))
+
+        self.__update(orders, responses)
+        return events
+
+    def __load_responses(self, status, max_count):
+        if max_count is None:
+            orders = self.trade_api.iter_all_orders(status=status, order_factory=get_decoded_order)
+        else:
+            orders = self.trade_api.get_orders(status=status, max_count=max_count, order_factory=get_decoded_order)
+        return dict((int(order['orderID']), order) for order in orders)
+
+    def __convert(self, response):
+        order_factory = self.order_factory or self.trade_api.order_factory
+        if order_factory is not None:
+            return order_factory(response)
+        order = dict(response)
+        convert_order_number_fields(order)
+        return order
+
+    def __update(self, orders, responses):
+        orders_by_instrument = {}
+        orders_by_status = {}
+        orders_by_offer_type = {}
+        for order_id, response in responses.items():
+            order = orders[order_id]
+            orders_by_instrument.setdefault(response['instrumentID'], {})[order_id] = order
+            orders_by_status.setdefault(get_status(response), {})[order_id] = order
+            offer_type = response['offerType']
+            orders_by_offer_type.setdefault(OFFER_TYPES.get(offer_type, offer_type), {})[order_id] = order
+
+        with self.__lock:
+            self.__orders = orders
+            self.__responses = responses
+            self.__orders_by_instrument = orders_by_instrument
+            self.__orders_by_status = orders_by_status
+            self.__orders_by_offer_type = orders_by_offer_type
+
+    def __sync_in_background(self):
+        while not self.__closed.is_set():
+            try:
+                self.sync()
+            except Exception:
+                logger.warning('Background sync of the orders failed.', exc_info=True)
+            self.__closed.wait(self.interval)
+
+
+def get_decoded_order(order):
+    """Order factory keeping the decoded order dicts as they are."""
+    return order
+
+
+def get_status(order):
+    """Gets the OrderStatus of a decoded order dict or its integer status when it is unknown."""
+    status = order['status']
+    return ORDER_STATUSES.get(status, status)
@@ -0,0 +1,89 @@
+"""Paging through the order lists of the BlockEx Trade API
+
+The API has no offset or cursor for the order lists, only the maxCount limit. A page is therefore fetched by
+requesting the list again with a larger maxCount and skipping the items returned by the previous pages. The limit
+grows geometrically, so a list of n items takes a logarithmic number of requests and transfers at most about
+growth / (growth - 1) times n items. The list is complete when a response has fewer items than requested.
+
+Items that move in the list between two requests, e.g. because newer orders are listed before them, can be missed
+or skipped as duplicates.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+# The default maxCount of the API
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_PAGE_GROWTH = 2
+
+
+def iter_pages(get_page, key, page_size=DEFAULT_PAGE_SIZE, growth=DEFAULT_PAGE_GROWTH, max_count=None, prefetch=True):
+    """Pages through a list limited only by a maximum count.
+
+    With prefetch the request of the next page is sent from a background thread as soon as the current page
+    arrives, so the network round trip of the next page overlaps with the processing of the current one.
+
+    :param get_page: Callable getting the first max_count items of the list.
+    :type get_page: callable
+    :param key: Callable getting the unique identifier of an item.
+    :type key: callable
+    :param page_size: Number of items requested by the first request.
+    :type page_size: int
+    :param growth: Factor by which the requested number of items grows from page to page.
+    :type growth: int
+    :param max_count: Maximum number of items returned in total. Optional.
+    :type max_count: int
+    :param prefetch: Sets whether to request the next page while the current one is consumed.
+    :type prefetch: boolean
+    :returns: Iterator of the pages. Each page is a list with the items not returned by the previous pages.
+    :raises: ValueError when an argument is invalid
+    """
+    if page_size < 1:
+        raise ValueError('page_size must be at least 1')
+    if growth < 2:
+        raise ValueError('growth must be at least 2')
+    if max_count is not None and max_count < 1:
+        raise ValueError('max_count must be at least 1')
+
+    return generate_pages(get_page, key, page_size, growth, max_count, prefetch)
+
+
+def generate_pages(get_page, key, page_size, growth, max_count, prefetch):
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    def request_page(count):
+        # Returns a callable waiting for the page
+        if executor is not None:
+            return executor.submit(get_page, count).result
+        return lambda: get_page(count)
+
+    seen_keys = set()
+    returned_count = 0
+    count = page_size if max_count is None else min(page_size, max_count)
+    wait_for_page = request_page(count)
+    try:
+        while True:
+            items = wait_for_page()
+            is_last_page = len(items) < count or count == max_count
+            if not is_last_page:
+                count *= growth
+                if max_count is not None:
+                    count = min(count, max_count)
+                wait_for_page = request_page(count)
+
+            page = []
+            for item in items:
+                item_key = key(item)
+                if item_key not in seen_keys:
+                    seen_keys.add(item_key)
+                    page.append(item)
+            if max_count is not None:
+                page = page[:max_count - returned_count]
+            returned_count += len(page)
+
+            if page:
+                yield page
+            if is_last_page:
+                return
+    finally:
+        # A prefetched page that is no longer needed is dropped without waiting for it
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,243 @@
+"""Adaptive polling of the market orders of the BlockEx Trade API"""
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import logging
+import threading
+from blockex.orderbook import BOOK_STATUS_FILTER
+from blockex.orderbook import OrderBook
+from blockex.tradeapi import monotonic
+
+DEFAULT_MIN_INTERVAL = 0.5
+DEFAULT_MAX_INTERVAL = 10.0
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# The interval of an instrument shrinks by this factor when its orders changed and grows by the other one when not
+INTERVAL_DECREASE_FACTOR = 0.5
+INTERVAL_INCREASE_FACTOR = 1.5
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(object):
+    """Polling state of an instrument"""
+
+    def __init__(self, order_book, interval):
+        self.order_book = order_book
+        self.interval = interval
+        self.validator = None
+        self.callbacks = []
+
+
+class MarketDataPoller(object):
+    """Polls the market orders of many instruments and notifies the subscribers when they change.
+
+    All the instruments are scheduled on one clock by a single scheduler thread and polled by a small pool of
+    threads. The interval of each instrument adapts to how often its orders change: it is halved, down to
+    min_interval, after a poll that found changes and grows by half, up to max_interval, after a poll that found
+    none. A quiet instrument is therefore polled rarely and a busy one often.
+
+    A poll sends the caching headers of the previous response and an unchanged body is detected before it is
+    decoded, see BlockExTradeApi.get_market_orders_if_changed(). Changed orders are applied to the OrderBook of the
+    instrument and the subscribers are called only when the book changed.
+    """
+
+    def __init__(
+            self,
+            trade_api,
+            min_interval=DEFAULT_MIN_INTERVAL,
+            max_interval=DEFAULT_MAX_INTERVAL,
+            max_count=None,
+            max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        """Creates a poller. Call start() to begin polling.
+
+        :param trade_api: The client used to load the market orders.
+        :type trade_api: BlockExTradeApi
+        :param min_interval: Minimum number of seconds between two polls of an instrument. Optional.
+        :type min_interval: float
+        :param max_interval: Maximum number of seconds between two polls of an instrument. Optional.
+        :type max_interval: float
+        :param max_count: Maximum number of market orders loaded per instrument. Optional.
+        :type max_count: int
+        :param max_in_flight: Maximum number of instruments polled at the same time. Optional.
+        :type max_in_flight: int
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError('The intervals must satisfy 0 < min_interval <= max_interval')
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+
+        self.trade_api = trade_api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_count = max_count
+        self.max_in_flight = max_in_flight
+        self.__subscriptions = {}
+        self.__schedule = []
+        self.__sequence = itertools.count()
+        self.__condition = threading.Condition()
+        self.__closed = False
+        self.__executor = None
+        self.__thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """Starts polling in the background.
+
+        :returns: The poller
+        :rtype: MarketDataPoller
+        """
+        self.__executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        self.__thread = threading.Thread(target=self.__run)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def close(self):
+        """Stops polling and waits for the polls in flight."""
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+
+    def subscribe(self, instrument_id, callback):
+        """Subscribes to the changes of the market orders of an instrument.
+
+        The first poll of a new instrument is scheduled immediately. The callback is called from a polling thread
+        with the OrderBook of the instrument and the OrderBookDiff of the changes.
+
+        :param instrument_id: Instrument identifier
+        :type instrument_id: int
+        :param callback: Callable called with the order book and the diff when the orders change.
+        :type callback: callable
+        """
+        with self.__condition:
+            subscription = self.__subscriptions.get(instrument_id)
+            if subscription is None:
+                subscription = Subscription(
+                    OrderBook(self.trade_api, instrument_id, max_count=self.max_count),
+                    self.min_interval)
+                self.__subscriptions[instrument_id] = subscription
+                self.__schedule_poll(instrument_id, subscription, monotonic())
+            subscription.callbacks.append(callback)
+
+    def unsubscribe(self, instrument_id, callback=None):
+        """Unsubscribes from the changes of an instrument. The instrument is no longer polled without subscribers.
+
+        :param instrument_id: Instrument identifier
+        :type instrument_id: int
+        :param callback: The callback to remove. By default all the callbacks of the instrument are removed.
+            Optional.
+        :type callback: callable
+        """
+        with self.__condition:
+            subscription = self.__subscriptions.get(instrument_id)
+            if subscription is None:
+                return
+            if callback is not None:
+                subscription.callbacks = [item for item in subscription.callbacks if item != callback]
+            if callback is None or not subscription.callbacks:
+                del self.__subscriptions[instrument_id]
+
+    def get_order_book(self, instrument_id):
+        """Gets the order book of a subscribed instrument.
+
+        :param instrument_id: Instrument identifier
+        :type instrument_id: int
+        :returns: The order book or None when the instrument is not subscribed.
+        :rtype: OrderBook
+        """
+        subscription = self.__subscriptions.get(instrument_id)
+        return subscription.order_book if subscription is not None else None
+
+    def get_interval(self, instrument_id):
+        """Gets the current polling interval of a subscribed instrument in seconds or None."""
+        subscription = self.__subscriptions.get(instrument_id)
+        return subscription.interval if subscription is not None else None
+
+    def poll(self, instrument_id):
+        """Polls an instrument now, notifies its subscribers of the changes and adapts its interval.
+
+        :param instrument_id: Instrument identifier
+        :type instrument_id: int
+        :returns: The changes or None when the orders did not change.
+        :rtype: OrderBookDiff
+        :raises: RequestException, KeyError when the instrument is not subscribed
+        """
+        return self.__poll(instrument_id, self.__subscriptions[instrument_id])
+
+    def __poll(self, instrument_id, subscription):
+        try:
+            orders, subscription.validator = self.trade_api.get_market_orders_if_changed(
+                instrument_id,
+                status=BOOK_STATUS_FILTER,
+                max_count=self.max_count,
+                validator=subscription.validator)
+        except Exception:
+            self.__adapt_interval(subscription, changed=False)
+            raise
+
+        diff = None
+        if orders is not None:
+            diff = subscription.order_book.apply_snapshot(orders)
+            if diff.is_empty:
+                diff = None
+        self.__adapt_interval(subscription, changed=diff is not None)
+
+        if diff is not None:
+            for callback in list(subscription.callbacks):
+                try:
+                    callback(subscription.order_book, diff)
+                except Exception:
+                    logger.exception('Market data callback of instrument %s failed.', instrument_id)
+        return diff
+
+    def __adapt_interval(self, subscription, changed):
+        if changed:
+            subscription.interval = max(self.min_interval, subscription.interval * INTERVAL_DECREASE_FACTOR)
+        else:
+            subscription.interval = min(self.max_interval, subscription.interval * INTERVAL_INCREASE_FACTOR)
+
+    def __schedule_poll(self, instrument_id, subscription, deadline):
+        heapq.heappush(self.__schedule, (deadline, next(self.__sequence), instrument_id, subscription))
+        self.__condition.notify_all()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while not self.__closed:
+                    if self.__schedule:
+                        timeout = self.__schedule[0][0] - monotonic()
+                        if timeout <= 0:
+                            break
+                    else:
+                        timeout = None
+                    self.__condition.wait(timeout)
+                if self.__closed:
+                    return
+                _, _, instrument_id, subscription = heapq.heappop(self.__schedule)
+                # The instrument was unsubscribed, possibly subscribed again with a new state, since it was scheduled
+                if self.__subscriptions.get(instrument_id) is not subscription:
+                    continue
+
+            self.__executor.submit(self.__poll_and_reschedule, instrument_id, subscription)
+
+    def __poll_and_reschedule(self, instrument_id, subscription):
+        try:
+            self.__poll(instrument_id, subscription)
+        except Exception:
+            logger.warning('Polling the market orders of instrument %s failed.', instrument_id, exc_info=True)
+
+        with self.__condition:
+            if not self.__closed and self.__subscriptions.get(instrument_id) is subscription:
+                self.__schedule_poll(instrument_id, subscription, monotonic() + subscription.interval)
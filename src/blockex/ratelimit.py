@@ -0,0 +1,202 @@
+"""Client side rate limiting of the BlockEx Trade API requests"""
+import itertools
+import threading
+from blockex.tradeapi import monotonic
+
+# Priorities of the requests. The waiting requests with a lower value are served first.
+HIGH_PRIORITY = 0
+NORMAL_PRIORITY = 1
+LOW_PRIORITY = 2
+
+# Cancelling goes ahead of everything else, reading the market data yields to everything else
+DEFAULT_PRIORITIES = {
+    'login': HIGH_PRIORITY,
+    'logout': HIGH_PRIORITY,
+    'cancel_order': HIGH_PRIORITY,
+    'cancel_all_orders': HIGH_PRIORITY,
+    'create_order': NORMAL_PRIORITY,
+    'get_orders': NORMAL_PRIORITY,
+    'get_trader_instruments': LOW_PRIORITY,
+    'get_partner_instruments': LOW_PRIORITY,
+    'get_market_orders': LOW_PRIORITY,
+}
+
+
+class TokenBucket(object):
+    """Allows rate requests per second on average and bursts of up to capacity requests.
+
+    The bucket is not thread safe; RateLimiter guards it.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """Creates a full bucket.
+
+        :param rate: Number of tokens added per second.
+        :type rate: float
+        :param capacity: Maximum number of tokens. Defaults to rate, i.e. a burst of one second. Optional.
+        :type capacity: float
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        if capacity is None:
+            capacity = max(rate, 1)
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.__update_time = monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.__update_time) * self.rate)
+        self.__update_time = now
+
+    def get_wait_time(self):
+        """Gets the number of seconds until a token is available after the last refill."""
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class Waiter(object):
+    """Request waiting for its tokens"""
+
+    def __init__(self, priority, sequence, buckets):
+        self.priority = priority
+        self.sequence = sequence
+        self.buckets = buckets
+
+
+class RateLimiter(object):
+    """Limits the rate of the requests with token buckets and serves the waiting requests by priority.
+
+    A request takes a token from the shared bucket, which limits all the requests together, and from the bucket of
+    its endpoint, when the endpoint has its own budget. When the requests have to wait, the ones with the highest
+    priority get the shared tokens first, so e.g. a cancellation is not queued behind market data polls. A waiting
+    request that is only held back by the budget of its own endpoint does not hold back the other requests.
+
+    A request waits only when the tokens are short, also for the waiters ahead of it. The time the requests spent
+    waiting is recorded per endpoint as the throttled time.
+    """
+
+    def __init__(self, rate=None, burst=None, endpoint_limits=None, priorities=None):
+        """Creates a rate limiter.
+
+        :param rate: Requests per second allowed for all the endpoints together. By default the requests are only
+            limited per endpoint. Optional.
+        :type rate: float
+        :param burst: Number of requests allowed at once for all the endpoints together. Defaults to rate. Optional.
+        :type burst: float
+        :param endpoint_limits: The requests per second and the burst allowed for an endpoint by endpoint name,
+            e.g. {'get_market_orders': (5, 10)}. The burst can be None. The endpoint names are the names of the
+            BlockExTradeApi methods and login and logout. Optional.
+        :type endpoint_limits: dict
+        :param priorities: The priority of the requests by endpoint name. Defaults to DEFAULT_PRIORITIES. The
+            endpoints without a priority have NORMAL_PRIORITY. Optional.
+        :type priorities: dict
+        """
+        self.priorities = DEFAULT_PRIORITIES if priorities is None else priorities
+        self.__bucket = TokenBucket(rate, burst) if rate is not None else None
+        self.__endpoint_buckets = dict(
+            (endpoint, TokenBucket(endpoint_rate, endpoint_burst))
+            for endpoint, (endpoint_rate, endpoint_burst) in (endpoint_limits or {}).items())
+        self.__waiters = []
+        self.__sequence = itertools.count()
+        self.__condition = threading.Condition()
+        self.__throttled_times = {}
+        self.__throttled_counts = {}
+
+    def acquire(self, endpoint, priority=None):
+        """Waits until a request to an endpoint is allowed and takes its tokens.
+
+        :param endpoint: Endpoint name, e.g. get_market_orders.
+        :type endpoint: string
+        :param priority: Priority of the request. Defaults to the priority of the endpoint. Optional.
+        :type priority: int
+        :returns: Seconds spent waiting.
+        :rtype: float
+        """
+        if priority is None:
+            priority = self.priorities.get(endpoint, NORMAL_PRIORITY)
+        buckets = []
+        if endpoint in self.__endpoint_buckets:
+            buckets.append(self.__endpoint_buckets[endpoint])
+        if self.__bucket is not None:
+            buckets.append(self.__bucket)
+        if not buckets:
+            return 0.0
+
+        start_time = monotonic()
+        with self.__condition:
+            waiter = Waiter(priority, next(self.__sequence), buckets)
+            self.__waiters.append(waiter)
+            self.__waiters.sort(key=lambda item: (item.priority, item.sequence))
+            waited = False
+            try:
+                while True:
+                    wait_time = self.__get_wait_time(waiter)
+                    if wait_time == 0:
+                        break
+                    waited = True
+                    self.__condition.wait(wait_time)
+            finally:
+                self.__waiters.remove(waiter)
+                # Lets the waiters behind this one check whether they can proceed
+                self.__condition.notify_all()
+
+            for bucket in buckets:
+                bucket.tokens -= 1
+
+            if not waited:
+                return 0.0
+            throttled_time = monotonic() - start_time
+            self.__throttled_times[endpoint] = self.__throttled_times.get(endpoint, 0.0) + throttled_time
+            self.__throttled_counts[endpoint] = self.__throttled_counts.get(endpoint, 0) + 1
+        return throttled_time
+
+    def get_throttled_time(self, endpoint=None):
+        """Gets the total number of seconds the requests spent waiting.
+
+        :param endpoint: Endpoint name. By default the time of all the endpoints is returned. Optional.
+        :type endpoint: string
+        :rtype: float
+        """
+        with self.__condition:
+            if endpoint is not None:
+                return self.__throttled_times.get(endpoint, 0.0)
+            return sum(self.__throttled_times.values())
+
+    def get_throttled_count(self, endpoint=None):
+        """Gets the number of requests that had to wait.
+
+        :param endpoint: Endpoint name. By default the requests of all the endpoints are counted. Optional.
+        :type endpoint: string
+        :rtype: int
+        """
+        with self.__condition:
+            if endpoint is not None:
+                return self.__throttled_counts.get(endpoint, 0)
+            return sum(self.__throttled_counts.values())
+
+    def __get_wait_time(self, waiter):
+        now = monotonic()
+        for bucket in waiter.buckets:
+            bucket.refill(now)
+        wait_time = max(bucket.get_wait_time() for bucket in waiter.buckets)
+
+        if self.__bucket is not None:
+            # The shared tokens go to the waiters ahead first, unless the budget of their endpoint holds them back.
+            # The waiter proceeds at once when enough tokens are left for all of them, so it only waits when the
+            # tokens are short.
+            ready_count = 0
+            for other_waiter in self.__waiters:
+                if other_waiter is waiter:
+                    break
+                other_buckets = [bucket for bucket in other_waiter.buckets if bucket is not self.__bucket]
+                for bucket in other_buckets:
+                    bucket.refill(now)
+                if all(bucket.get_wait_time() == 0 for bucket in other_buckets):
+                    ready_count += 1
+            if ready_count and self.__bucket.tokens < ready_count + 1:
+                # Woken up when a waiter ahead takes its tokens
+                return max(wait_time, (ready_count + 1 - self.__bucket.tokens) / self.__bucket.rate, 1e-3)
+        return wait_time
@@ -0,0 +1,229 @@
+"""Retrying of the failed BlockEx Trade API requests with backoff and circuit breaking"""
+import random
+import threading
+import time
+from requests import RequestException
+from requests.exceptions import ConnectTimeout
+from blockex.tradeapi import monotonic
+
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 0.1
+DEFAULT_MAX_DELAY = 2.0
+DEFAULT_DEADLINE = 10.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+TOO_MANY_REQUESTS = 429
+RETRY_STATUS_CODES = (TOO_MANY_REQUESTS, 500, 502, 503, 504)
+
+# Retry rules of the endpoints
+RETRY_ALWAYS = 'always'
+# The request is retried only when it surely did not reach the API, i.e. the connection was not established or
+# the request was rejected with 429 Too Many Requests
+RETRY_IF_NOT_PROCESSED = 'if_not_processed'
+RETRY_NEVER = 'never'
+
+# The reads and the cancellations can be repeated safely, placing an order twice would place two orders
+DEFAULT_RETRY_RULES = {
+    'login': RETRY_ALWAYS,
+    'logout': RETRY_ALWAYS,
+    'get_orders': RETRY_ALWAYS,
+    'get_market_orders': RETRY_ALWAYS,
+    'get_trader_instruments': RETRY_ALWAYS,
+    'get_partner_instruments': RETRY_ALWAYS,
+    'cancel_order': RETRY_ALWAYS,
+    'cancel_all_orders': RETRY_ALWAYS,
+    'create_order': RETRY_IF_NOT_PROCESSED,
+}
+
+# Circuit breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RequestException):
+    """Raised instead of sending a request to an endpoint whose circuit breaker is open"""
+
+
+class CircuitBreaker(object):
+    """Stops the requests to an endpoint that keeps failing.
+
+    After failure_threshold consecutive failures the breaker opens and the requests fail immediately with
+    CircuitOpenError. After reset_timeout seconds a single trial request is let through: its success closes the
+    breaker and its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.__failure_count = 0
+        self.__open_deadline = None
+        self.__lock = threading.Lock()
+
+    def before_request(self, endpoint):
+        """Checks whether a request may be sent.
+
+        :raises: CircuitOpenError when the breaker is open
+        """
+        with self.__lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and self.__open_deadline <= monotonic():
+                self.state = HALF_OPEN
+                return
+            raise CircuitOpenError('The requests to {endpoint} are failing, retry later.'.format(endpoint=endpoint))
+
+    def record_success(self):
+        with self.__lock:
+            self.state = CLOSED
+            self.__failure_count = 0
+
+    def record_failure(self):
+        with self.__lock:
+            self.__failure_count += 1
+            if self.state == HALF_OPEN or self.__failure_count >= self.failure_threshold:
+                self.state = OPEN
+                self.__open_deadline = monotonic() + self.reset_timeout
+
+
+class RetryPolicy(object):
+    """Retries the failed requests by the rules of their endpoints.
+
+    A request is retried when it raised a RequestException, e.g. a connection error or a timeout, or when its
+    response has one of RETRY_STATUS_CODES. The delay before a retry is drawn at random between zero and an
+    exponentially growing limit, so the clients that failed together do not retry together. A Retry-After header is
+    honoured. The retries stop after max_attempts attempts or when the next one would start after deadline seconds;
+    the last response is then returned or the last error raised.
+
+    Each endpoint has its own CircuitBreaker, so an outage of the API fails the requests fast instead of piling up
+    retries. Only connection errors and 5xx responses count as failures of the breaker.
+    """
+
+    def __init__(
+            self,
+            max_attempts=DEFAULT_MAX_ATTEMPTS,
+            base_delay=DEFAULT_BASE_DELAY,
+            max_delay=DEFAULT_MAX_DELAY,
+            deadline=DEFAULT_DEADLINE,
+            rules=None,
+            failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+            reset_timeout=DEFAULT_RESET_TIMEOUT):
+        """Creates a retry policy.
+
+        :param max_attempts: Maximum number of attempts of a request, including the first one. Optional.
+        :type max_attempts: int
+        :param base_delay: Limit of the delay before the first retry in seconds. It doubles for each next retry.
+            Optional.
+        :type base_delay: float
+        :param max_delay: Maximum delay before a retry in seconds. Optional.
+        :type max_delay: float
+        :param deadline: Seconds after the first attempt when no more retries are started. Optional.
+        :type deadline: float
+        :param rules: The retry rules by endpoint name, i.e. RETRY_ALWAYS, RETRY_IF_NOT_PROCESSED or RETRY_NEVER.
+            Defaults to DEFAULT_RETRY_RULES. The endpoints without a rule have RETRY_IF_NOT_PROCESSED. Optional.
+        :type rules: dict
+        :param failure_threshold: Number of consecutive failures of an endpoint opening its circuit breaker. None
+            disables the circuit breakers. Optional.
+        :type failure_threshold: int
+        :param reset_timeout: Seconds after which an open circuit breaker lets a trial request through. Optional.
+        :type reset_timeout: float
+        """
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.rules = DEFAULT_RETRY_RULES if rules is None else rules
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.sleep = time.sleep
+        self.__circuit_breakers = {}
+        self.__lock = threading.Lock()
+
+    def get_circuit_breaker(self, endpoint):
+        """Gets the circuit breaker of an endpoint or None when they are disabled."""
+        if self.failure_threshold is None:
+            return None
+        with self.__lock:
+            circuit_breaker = self.__circuit_breakers.get(endpoint)
+            if circuit_breaker is None:
+                circuit_breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self.__circuit_breakers[endpoint] = circuit_breaker
+            return circuit_breaker
+
+    def call(self, endpoint, send_request):
+        """Sends a request, retrying it when it fails.
+
+        :param endpoint: Endpoint name, e.g. get_orders.
+        :type endpoint: string
+        :param send_request: Callable sending the request and returning its response.
+        :type send_request: callable
+        :returns: The response
+        :raises: RequestException, CircuitOpenError
+        """
+        rule = self.rules.get(endpoint, RETRY_IF_NOT_PROCESSED)
+        circuit_breaker = self.get_circuit_breaker(endpoint)
+        deadline = monotonic() + self.deadline
+        attempt = 1
+        while True:
+            if circuit_breaker is not None:
+                circuit_breaker.before_request(endpoint)
+
+            try:
+                response = send_request()
+            except RequestException as err:
+                if circuit_breaker is not None:
+                    circuit_breaker.record_failure()
+                delay = self.__get_delay(attempt, deadline, rule, err)
+                if delay is None:
+                    raise
+            except BaseException:
+                # Not retried, but the breaker must not be left half open with its trial request never finished
+                if circuit_breaker is not None:
+                    circuit_breaker.record_failure()
+                raise
+            else:
+                if circuit_breaker is not None:
+                    if response.status_code >= 500:
+                        circuit_breaker.record_failure()
+                    else:
+                        circuit_breaker.record_success()
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                delay = self.__get_delay(attempt, deadline, rule, response=response)
+                if delay is None:
+                    return response
+                # The discarded response of a streamed request still holds its pooled connection
+                response.close()
+
+            self.sleep(delay)
+            attempt += 1
+
+    def __get_delay(self, attempt, deadline, rule, error=None, response=None):
+        # Gets the delay before the next attempt or None when the request must not be retried
+        if attempt >= self.max_attempts or rule == RETRY_NEVER:
+            return None
+        if rule == RETRY_IF_NOT_PROCESSED:
+            if response is not None and response.status_code != TOO_MANY_REQUESTS:
+                return None
+            if error is not None and not isinstance(error, ConnectTimeout):
+                return None
+
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if response is not None:
+            delay = max(delay, get_retry_after(response))
+        if monotonic() + delay > deadline:
+            return None
+        return delay
+
+
+def get_retry_after(response):
+    """Gets the seconds of the Retry-After header of a response or 0 when it has none or it is a date."""
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', 0)))
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,89 @@
+"""Incremental parsing of the BlockEx Trade API responses"""
+import codecs
+import json
+
+DEFAULT_STREAM_CHUNK_SIZE = 65536
+
+# Consumed text is dropped from the buffer once it grows past this size
+BUFFER_COMPACTION_SIZE = 65536
+
+WHITESPACE = ' \t\n\r'
+
+# Parser states
+EXPECT_ARRAY = 0
+EXPECT_FIRST_ELEMENT = 1
+EXPECT_ELEMENT = 2
+FINISHED = 3
+
+
+def iter_json_array(chunks, parse_float=None):
+    """Parses a JSON array incrementally, yielding each element as soon as it is complete.
+
+    Only the text of the elements that are not yet complete is kept in memory, so the memory use does not grow with
+    the size of the array.
+
+    :param chunks: The UTF-8 encoded JSON array in chunks of any size, e.g. response.iter_content(chunk_size).
+    :type chunks: iterable of bytes
+    :param parse_float: Callable converting the string of a JSON number with a fraction, e.g. decimal.Decimal.
+        Optional.
+    :type parse_float: callable
+    :raises: ValueError when the content is not a JSON array
+    """
+    decoder = json.JSONDecoder(parse_float=parse_float)
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    state = EXPECT_ARRAY
+
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        while state != FINISHED:
+            position = skip_whitespace(buffer, position)
+            if position == len(buffer):
+                break
+
+            if state == EXPECT_ARRAY:
+                if buffer[position] != '[':
+                    raise ValueError('Expected a JSON array at position {0}'.format(position))
+                position += 1
+                state = EXPECT_FIRST_ELEMENT
+                continue
+
+            if state == EXPECT_FIRST_ELEMENT and buffer[position] == ']':
+                position += 1
+                state = FINISHED
+                continue
+
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The element is not complete yet
+                break
+
+            # A number may continue in the next chunk, e.g. 4 followed by .5, so an element is complete only once
+            # its separator arrived. Invalid content is reported as incomplete when the chunks end.
+            separator_position = skip_whitespace(buffer, end)
+            if separator_position == len(buffer) or buffer[separator_position] not in ',]':
+                break
+
+            position = separator_position + 1
+            state = EXPECT_ELEMENT if buffer[separator_position] == ',' else FINISHED
+            yield element
+
+        if position > BUFFER_COMPACTION_SIZE:
+            buffer = buffer[position:]
+            position = 0
+
+    buffer += text_decoder.decode(b'', final=True)
+    if state != FINISHED:
+        raise ValueError('Incomplete JSON array')
+    if skip_whitespace(buffer, position) != len(buffer):
+        raise ValueError('Extra data after the JSON array at position {0}'.format(position))
+
+
+def skip_whitespace(text, position):
+    """Gets the position of the first non-whitespace character at or after position."""
+    length = len(text)
+    while position < length and text[position] in WHITESPACE:
+        position += 1
+    return position
@@ -0,0 +1,128 @@
+"""Access token store of the BlockEx Trade API shared by processes through files
+
+A FileTokenStore passed as the token_store of BlockExTradeApi lets the processes of the same trader account, e.g.
+prefork workers or a restarted process, reuse a valid access token instead of logging in:
+
+    trade_api = BlockExTradeApi(api_url, api_id, username, password, token_store=FileTokenStore('/var/run/blockex'))
+"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# os.rename() replaces the target atomically on POSIX, but not on Windows, where Python 2 lacks os.replace()
+replace_file = getattr(os, 'replace', os.rename)
+
+
+class FileTokenStore(object):
+    """Keeps the access token of each account in a file of a directory.
+
+    A token is written to a temporary file that then replaces the file of the account, so the readers see either
+    the previous or the new token and never a partial write. lock() holds an exclusive lock on a separate lock file
+    of the account, so the processes refreshing the token of the same account do it one at a time and the ones that
+    waited find the new token. Without fcntl, i.e. on Windows, the lock only coordinates the threads of the process.
+
+    The expiry time is stored as a wall clock timestamp, since the monotonic clocks of processes are not comparable.
+    The files hold valid access tokens, so the directory must be readable only by the users allowed to trade with
+    them. The files are created with the 0600 permissions.
+    """
+
+    def __init__(self, directory):
+        """Creates a store.
+
+        :param directory: The directory of the token files. It is created when missing.
+        :type directory: string
+        """
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.__locks = {}
+        self.__locks_lock = threading.Lock()
+
+    def load(self, key):
+        """Gets the stored access token of an account.
+
+        :param key: The key of the account
+        :type key: string
+        :returns: The access token and its expiry time as a timestamp, or None when no token is stored.
+        :rtype: tuple
+        """
+        try:
+            with open(self.__get_path(key)) as token_file:
+                token = json.load(token_file)
+        except (IOError, OSError, ValueError):
+            return None
+        if token.get('key') != key:
+            return None
+        return token['access_token'], token['expiry_time']
+
+    def save(self, key, access_token, expiry_time):
+        """Stores the access token of an account, replacing the previous one.
+
+        :param key: The key of the account
+        :type key: string
+        :param access_token: The access token
+        :type access_token: string
+        :param expiry_time: The expiry time of the access token as a timestamp.
+        :type expiry_time: float
+        """
+        path = self.__get_path(key)
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(descriptor, 'w') as token_file:
+                json.dump({'key': key, 'access_token': access_token, 'expiry_time': expiry_time}, token_file)
+                token_file.flush()
+                os.fsync(token_file.fileno())
+            replace_file(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def delete(self, key, access_token=None):
+        """Deletes the stored access token of an account.
+
+        :param key: The key of the account
+        :type key: string
+        :param access_token: When given, the stored token is deleted only if it is still this one. Optional.
+        :type access_token: string
+        """
+        if access_token is not None:
+            token = self.load(key)
+            if token is None or token[0] != access_token:
+                return
+        try:
+            os.remove(self.__get_path(key))
+        except OSError:
+            pass
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        """Holds an exclusive lock of an account, shared by the threads and the processes using the directory.
+
+        :param key: The key of the account
+        :type key: string
+        """
+        with self.__locks_lock:
+            thread_lock = self.__locks.setdefault(key, threading.Lock())
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.__get_path(key) + '.lock', 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def __get_path(self, key):
+        # The key holds the username and the URL, so the file name is a digest of it
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'token-{digest}.json'.format(digest=digest))
@@ -1,10 +1,41 @@
 """BlockEx Trade API client library"""
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from timeit import default_timer
 import datetime
 import decimal
+import hashlib
+import logging
+import random
+import threading
+import time
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
+from six.moves.urllib.parse import quote_plus
 from six.moves.urllib.parse import urlencode
+from blockex.decoding import create_default_json_decoder
+from blockex.metrics import CONVERT_DURATION
+from blockex.metrics import DECODE_DURATION
+from blockex.metrics import ERRORS
+from blockex.metrics import LOGINS
+from blockex.metrics import REAUTHENTICATIONS
+from blockex.metrics import REQUEST_DURATION
+from blockex.metrics import THROTTLED_DURATION
+from blockex.pagination import DEFAULT_PAGE_SIZE
+from blockex.pagination import iter_pages
+from blockex.streaming import DEFAULT_STREAM_CHUNK_SIZE
+from blockex.streaming import iter_json_array
+
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_TOKEN_REFRESH_MARGIN = 60
+# Seconds before a failed background refresh is retried, doubled after each consecutive failure
+BACKGROUND_REFRESH_BACKOFF = 1
+
+monotonic = getattr(time, 'monotonic', time.time)
+logger = logging.getLogger(__name__)
 
 
 class OrderType(Enum):
@@ -20,8 +51,329 @@ class OfferType(Enum):
     ASK = 'Ask'
 
 
+class OrderStatus(Enum):
+    """Order status enumeration"""
+    PENDING = 10
+    FAILED = 15
+    PLACED = 20
+    REJECTED = 30
+    CANCELLED = 40
+    PARTIALLY_EXECUTED = 50
+    EXECUTED = 60
+
+
+class BatchResult(object):
+    """Outcome of a single request of a batch operation.
+
+    :ivar item: The batch item the request was made for, i.e. an order specification or an order identifier.
+    :ivar success: Whether the request succeeded.
+    :ivar status_code: The HTTP status code of the response or None when no response was received.
+    :ivar message: The error message of the response as returned by get_error_message(). Empty on success.
+    :ivar error: The exception describing the failure or None on success.
+    :ivar elapsed: Seconds spent on the request.
+    """
+
+    def __init__(self, item, status_code=None, message='', error=None, elapsed=0.0):
+        self.item = item
+        self.status_code = status_code
+        self.message = message
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __repr__(self):
+        return 'BatchResult(item={item!r}, success={success}, status_code={status_code}, message={message!r})'.format(
+            item=self.item, success=self.success, status_code=self.status_code, message=self.message)
+
+
+class CacheValidator(object):
+    """Identifies the version of a response for conditional requests.
+
+    :ivar etag: The ETag header of the response or None.
+    :ivar last_modified: The Last-Modified header of the response or None.
+    :ivar digest: Digest of the response body, used to detect an unchanged body when the server sends no caching
+        headers.
+    """
+
+    def __init__(self, etag=None, last_modified=None, digest=None):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+
+    @classmethod
+    def from_response(cls, response):
+        return cls(
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            hashlib.sha1(response.content).hexdigest())
+
+    def get_headers(self):
+        """Gets the headers making a request conditional on the response having changed."""
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def __repr__(self):
+        return 'CacheValidator(etag={etag!r}, last_modified={last_modified!r}, digest={digest!r})'.format(
+            etag=self.etag, last_modified=self.last_modified, digest=self.digest)
+
+
+class PreparedOrder(object):
+    """Order of an instrument and offer type prepared by BlockExTradeApi.prepare_order() to be placed many times.
+
+    The URL of the request is built once up to the price and the quantity, so placing an order only appends them.
+    """
+
+    def __init__(self, send_request, url_prefix, offer_type, order_type, instrument_id, order_validator=None):
+        self.url_prefix = url_prefix
+        self.offer_type = offer_type
+        self.order_type = order_type
+        self.instrument_id = instrument_id
+        self.order_validator = order_validator
+        self.__send_request = send_request
+
+    def send(self, price, quantity):
+        """Places the order with a price and a quantity.
+
+        :param price: Price
+        :type price: float
+        :param quantity: Quantity
+        :type quantity: float
+        :raises: RequestException
+        """
+        if self.order_validator is not None:
+            price, quantity = self.order_validator.validate(
+                self.offer_type, self.order_type, self.instrument_id, price, quantity)
+        # Same encoding as urlencode() in create_order()
+        response = self.__send_request(
+            self.url_prefix + 'price=' + quote_plus(str(price)) + '&quantity=' + quote_plus(str(quantity)))
+
+        if response.status_code != 200:
+            exception_message = 'Failed to create an order. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+
+    def __repr__(self):
+        return 'PreparedOrder(offer_type={offer_type}, order_type={order_type}, instrument_id={instrument_id})'.format(
+            offer_type=self.offer_type, order_type=self.order_type, instrument_id=self.instrument_id)
+
+
+class AccessTokenManager(object):
+    """Keeps an access token valid for concurrent callers.
+
+    The expiry of the token is tracked with a monotonic clock. A caller that finds the token within refresh_margin
+    seconds of its expiry starts a refresh in a background thread and keeps using the still valid token, so no
+    request waits for a login while a token is usable. The margin is at most half of the lifetime of the token, so a
+    token living shorter than the margin is not refreshed on every request. A random part of refresh_spread, at most
+    a quarter of the lifetime, is added to the margin, so the tokens of many managers obtained together are not
+    refreshed together either. After a failed background refresh the next one waits for a backoff doubled after
+    each failure, but at most half of the time left before expiry.
+
+    A caller that finds the token missing, expired or rejected waits for a refresh. Only one refresh is in flight at
+    a time and all callers waiting for it share its result.
+
+    With a token store the refreshes of the processes sharing the store are coordinated as well. A refresh holds the
+    lock of the account in the store and first looks for a token stored by another process that is neither the
+    stale one nor within refresh_margin of its expiry. Only when there is none it logs in and stores the new token.
+    """
+
+    def __init__(
+            self,
+            get_access_token,
+            refresh_margin=DEFAULT_TOKEN_REFRESH_MARGIN,
+            token_store=None,
+            token_key=None,
+            refresh_spread=0):
+        """Creates a token manager.
+
+        :param get_access_token: Callable performing the login request and returning its response as a dict
+            with access_token and expires_in.
+        :type get_access_token: callable
+        :param refresh_margin: Seconds before the expiry of the token when it is refreshed in the background.
+        :type refresh_margin: float
+        :param token_store: Store sharing the token with other processes, e.g. a blockex.tokenstore.FileTokenStore.
+            Optional.
+        :type token_store: blockex.tokenstore.FileTokenStore
+        :param token_key: The key of the account in the token store. Required with a token store.
+        :type token_key: string
+        :param refresh_spread: Maximum number of seconds randomly added to the refresh margin. Optional.
+        :type refresh_spread: float
+        """
+        if refresh_spread < 0:
+            raise ValueError('refresh_spread must not be negative')
+
+        self.get_access_token = get_access_token
+        self.refresh_margin = refresh_margin
+        self.refresh_spread = refresh_spread
+        # The same part of the spread is used for every token, so the managers stay spread out after each refresh
+        self.__spread_fraction = random.random()
+        self.token_store = token_store
+        self.token_key = token_key
+        self.access_token = None
+        self.access_token_expiry_time = None
+        self.__expiry_deadline = None
+        self.__lifetime = None
+        self.__refreshing = False
+        self.__background_failures = 0
+        self.__background_refresh_deadline = None
+        self.__condition = threading.Condition()
+
+    def get_valid_access_token(self):
+        """Gets an access token that has not expired, refreshing it first when needed.
+
+        :returns: The access token
+        :rtype: string
+        :raises: RequestException
+        """
+        with self.__condition:
+            access_token = self.access_token
+            if access_token is not None and not self.__is_expired():
+                if self.__is_within_refresh_margin() and not self.__refreshing and\
+                        not self.__is_background_refresh_delayed():
+                    self.__refreshing = True
+                    thread = threading.Thread(target=self.__refresh_in_background)
+                    thread.daemon = True
+                    thread.start()
+                return access_token
+
+        return self.refresh(stale_access_token=access_token)
+
+    def refresh(self, stale_access_token=None, force=False):
+        """Refreshes the access token unless another caller already did it.
+
+        :param stale_access_token: The token the caller found unusable. A different valid token is returned as is.
+        :type stale_access_token: string
+        :param force: Sets whether to replace the current token even when it is valid. A refresh that is in flight
+            when the call is made is shared instead. With a token store a different valid token stored by another
+            process is used instead of logging in.
+        :type force: boolean
+        :returns: The access token
+        :rtype: string
+        :raises: RequestException
+        """
+        with self.__condition:
+            waited = False
+            while self.__refreshing:
+                waited = True
+                self.__condition.wait()
+
+            if (waited or not force) and self.access_token is not None and\
+                    self.access_token != stale_access_token and not self.__is_expired():
+                return self.access_token
+
+            self.__refreshing = True
+
+        return self.__refresh(stale_access_token, force)
+
+    def clear(self, access_token=None):
+        """Deletes the stored access token.
+
+        :param access_token: When given, the stored token is deleted only if it is still this one, so a token
+            obtained by another thread in the meantime is kept.
+        :type access_token: string
+        """
+        with self.__condition:
+            if access_token is not None and access_token != self.access_token:
+                return
+            cleared_access_token = self.access_token
+            self.access_token = None
+            self.access_token_expiry_time = None
+            self.__expiry_deadline = None
+
+        if self.token_store is not None and cleared_access_token is not None:
+            with self.token_store.lock(self.token_key):
+                self.token_store.delete(self.token_key, cleared_access_token)
+
+    def __refresh(self, stale_access_token=None, force=False, background=False):
+        try:
+            if self.token_store is None:
+                access_token = self.get_access_token()
+            else:
+                access_token = self.__refresh_with_store(stale_access_token, force)
+        except Exception:
+            with self.__condition:
+                if background:
+                    self.__delay_background_refresh()
+                self.__refreshing = False
+                self.__condition.notify_all()
+            raise
+
+        with self.__condition:
+            self.access_token = access_token['access_token']
+            self.access_token_expiry_time = datetime.datetime.now() +\
+                datetime.timedelta(seconds=access_token['expires_in'])
+            self.__expiry_deadline = monotonic() + access_token['expires_in']
+            self.__lifetime = access_token['expires_in']
+            self.__background_failures = 0
+            self.__background_refresh_deadline = None
+            self.__refreshing = False
+            self.__condition.notify_all()
+            return self.access_token
+
+    def __refresh_with_store(self, stale_access_token, force):
+        # Until the lifetime of the tokens is known the stored token must outlive the whole refresh margin
+        refresh_margin = self.refresh_margin if self.__lifetime is None else\
+            min(self.refresh_margin, self.__lifetime / 2.0)
+        with self.token_store.lock(self.token_key):
+            stored_token = self.token_store.load(self.token_key)
+            if stored_token is not None:
+                stored_access_token, expiry_time = stored_token
+                expires_in = expiry_time - time.time()
+                # A forced refresh only takes a token that replaces the current one
+                if stored_access_token != stale_access_token and expires_in > refresh_margin and\
+                        not (force and stored_access_token == self.access_token):
+                    return {'access_token': stored_access_token, 'expires_in': expires_in}
+
+            access_token = self.get_access_token()
+            try:
+                self.token_store.save(
+                    self.token_key, access_token['access_token'], time.time() + access_token['expires_in'])
+            except (IOError, OSError):
+                # The login succeeded, so the token is used even though the other processes cannot share it
+                logger.warning('Failed to store the access token.', exc_info=True)
+            return access_token
+
+    def __refresh_in_background(self):
+        try:
+            self.__refresh(stale_access_token=self.access_token, background=True)
+        except Exception:
+            # The token is still valid, so the failure is only logged. The next caller after expiry retries.
+            logger.warning('Background refresh of the access token failed.', exc_info=True)
+
+    def __delay_background_refresh(self):
+        # The next background refresh waits for a growing backoff, but at most half of the time left, so an outage
+        # of the login endpoint does not get a login from every request within the margin
+        now = monotonic()
+        backoff = BACKGROUND_REFRESH_BACKOFF * 2 ** self.__background_failures
+        self.__background_failures += 1
+        time_left = max(0.0, self.__expiry_deadline - now) if self.__expiry_deadline is not None else 0.0
+        self.__background_refresh_deadline = now + min(backoff, time_left / 2.0)
+
+    def __is_background_refresh_delayed(self):
+        return self.__background_refresh_deadline is not None and monotonic() < self.__background_refresh_deadline
+
+    def __is_expired(self):
+        return self.__expiry_deadline is None or self.__expiry_deadline <= monotonic()
+
+    def __is_within_refresh_margin(self):
+        margin = min(self.refresh_margin, self.__lifetime / 2.0) +\
+            self.__spread_fraction * min(self.refresh_spread, self.__lifetime / 4.0)
+        return self.__expiry_deadline - margin <= monotonic()
+
+
 class BlockExTradeApi(object):
-    """Implementation of  methods needed to access the BlockEx Trade API"""
+    """Implementation of  methods needed to access the BlockEx Trade API
+
+    An instance is safe to share between threads. The threads use the same pool of connections and the access
+    token is guarded by the token manager, so they never log in at the same time. Set pool_maxsize to at least the
+    number of threads making requests, otherwise the connections that do not fit in the pool are closed after use.
+    """
     LOGIN_PATH = 'oauth/token'
     LOGOUT_PATH = 'oauth/logout'
     GET_ORDERS_PATH = 'api/orders/get?'
@@ -32,7 +384,103 @@ class BlockExTradeApi(object):
     GET_TRADER_INSTRUMENTS_PATH = 'api/orders/traderinstruments'
     GET_PARTNER_INSTRUMENTS_PATH = 'api/orders/partnerinstruments?'
 
-    def __init__(self, api_url, api_id, username, password):
+    # Names of the endpoints by path, used by the rate limiter
+    ENDPOINTS = {
+        LOGIN_PATH: 'login',
+        LOGOUT_PATH: 'logout',
+        GET_ORDERS_PATH.rstrip('?'): 'get_orders',
+        GET_MARKET_ORDERS_PATH.rstrip('?'): 'get_market_orders',
+        CREATE_ORDER_PATH.rstrip('?'): 'create_order',
+        CANCEL_ORDER_PATH.rstrip('?'): 'cancel_order',
+        CANCEL_ALL_ORDERS_PATH.rstrip('?'): 'cancel_all_orders',
+        GET_TRADER_INSTRUMENTS_PATH: 'get_trader_instruments',
+        GET_PARTNER_INSTRUMENTS_PATH.rstrip('?'): 'get_partner_instruments',
+    }
+
+    def __init__(
+            self,
+            api_url,
+            api_id,
+            username,
+            password,
+            pool_connections=DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize=DEFAULT_POOL_MAXSIZE,
+            pool_block=False,
+            keep_alive=True,
+            token_refresh_margin=DEFAULT_TOKEN_REFRESH_MARGIN,
+            order_factory=None,
+            instrument_factory=None,
+            json_decoder=None,
+            rate_limiter=None,
+            retry_policy=None,
+            read_coalescer=None,
+            metrics=None,
+            order_validator=None,
+            session=None,
+            token_store=None,
+            token_refresh_spread=0):
+        """Creates a Trade API client.
+
+        All requests of the client go through a single HTTP session whose connections are kept alive and reused,
+        so consecutive calls do not pay for new TCP and TLS handshakes. Call close() or use the client as a context
+        manager to release the pooled connections.
+
+        :param pool_connections: Number of per-host connection pools to cache. Optional.
+        :type pool_connections: int
+        :param pool_maxsize: Maximum number of connections kept alive per host. Optional.
+        :type pool_maxsize: int
+        :param pool_block: Sets whether to wait for a free connection instead of opening a new one when all
+            pool_maxsize connections of a host are in use. Optional.
+        :type pool_block: boolean
+        :param keep_alive: Sets whether to keep the connections alive between requests. Optional.
+        :type keep_alive: boolean
+        :param token_refresh_margin: Seconds before the expiry of the access token when it is refreshed in the
+            background, at most half of the lifetime of the token. Optional.
+        :type token_refresh_margin: float
+        :param order_factory: Callable creating the returned order objects from the decoded order dicts, e.g.
+            blockex.models.Order.from_dict. By default the number fields of the dicts are converted in place.
+            Optional.
+        :type order_factory: callable
+        :param instrument_factory: Callable creating the returned instrument objects from the decoded instrument
+            dicts, e.g. blockex.models.Instrument.from_dict. By default the number fields of the dicts are converted
+            in place. Optional.
+        :type instrument_factory: callable
+        :param json_decoder: Decoder of the response bodies, e.g. blockex.decoding.JsonDecoder(decimal.Decimal) to
+            decode the JSON numbers straight to Decimal. By default orjson is used when installed and the standard
+            library otherwise. Optional.
+        :type json_decoder: blockex.decoding.JsonDecoder
+        :param rate_limiter: Limiter all the requests of the client wait for, e.g. a blockex.ratelimit.RateLimiter
+            giving the cancellations priority over the market data polls. The limiter can be shared by many clients.
+            Optional.
+        :type rate_limiter: blockex.ratelimit.RateLimiter
+        :param retry_policy: Policy retrying the requests that failed with a connection error or a transient error
+            response, e.g. a blockex.retry.RetryPolicy. By default the failures are raised at once. Optional.
+        :type retry_policy: blockex.retry.RetryPolicy
+        :param read_coalescer: Coalescer sharing one request and its converted result between the identical
+            concurrent calls of get_orders(), get_market_orders(), get_trader_instruments() and
+            get_partner_instruments(), e.g. a blockex.coalescing.RequestCoalescer. The shared results must not be
+            modified. Optional.
+        :type read_coalescer: blockex.coalescing.RequestCoalescer
+        :param metrics: Sink of the metrics of the client, e.g. a blockex.metrics.MetricsRegistry. The client reports
+            the duration of the requests by endpoint and status code, of the decoding and of the conversions, and
+            counts the logins, the repeated requests after a rejected token and the errors. Optional.
+        :type metrics: blockex.metrics.MetricsRegistry
+        :param order_validator: Validator checking the orders of create_order(), create_orders() and the prepared
+            orders against the cached instruments before they are sent, e.g. a blockex.validation.OrderValidator. The
+            orders it rejects fail with an OrderValidationError without a request. Optional.
+        :type order_validator: blockex.validation.OrderValidator
+        :param session: HTTP session to send the requests with, e.g. one created by create_session() and shared by
+            the clients of many traders, so they use the same pooled connections. The session is not closed by
+            close() and the pool arguments are ignored. By default the client creates its own session. Optional.
+        :type session: requests.Session
+        :param token_store: Store sharing the access token with the other processes of the same trader, e.g. a
+            blockex.tokenstore.FileTokenStore. A stored valid token is used instead of logging in, and only one
+            process at a time logs in when the token has to be refreshed. Optional.
+        :type token_store: blockex.tokenstore.FileTokenStore
+        :param token_refresh_spread: Maximum number of seconds randomly added to token_refresh_margin, at most a quarter
+            of the lifetime of the token, e.g. to spread out the refreshes of many clients logged in together. Optional.
+        :type token_refresh_spread: float
+        """
         assert api_url
         assert api_id
         assert username
@@ -42,8 +490,51 @@ class BlockExTradeApi(object):
         self.api_id = api_id
         self.username = username
         self.password = password
-        self.access_token = None
-        self.access_token_expiry_time = None
+        self.order_factory = order_factory
+        self.instrument_factory = instrument_factory
+        self.json_decoder = json_decoder or create_default_json_decoder()
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.read_coalescer = read_coalescer
+        self.metrics = metrics
+        self.order_validator = order_validator
+        # The access token with the headers of the authorized requests built for it, reused while it is valid
+        self.__authorization = (None, None)
+        self.token_manager = AccessTokenManager(
+            self.__get_access_token,
+            refresh_margin=token_refresh_margin,
+            token_store=token_store,
+            token_key='{api_url}|{api_id}|{username}'.format(api_url=api_url, api_id=api_id, username=username),
+            refresh_spread=token_refresh_spread)
+        self.owns_session = session is None
+        if session is None:
+            session = create_session(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block,
+                keep_alive=keep_alive)
+        self.session = session
+
+    @property
+    def access_token(self):
+        """The access token of the logged in trader or None."""
+        return self.token_manager.access_token
+
+    @property
+    def access_token_expiry_time(self):
+        """The local time when the access token expires or None."""
+        return self.token_manager.access_token_expiry_time
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the HTTP session and all of its pooled connections, unless the session was passed to the client."""
+        if self.owns_session:
+            self.session.close()
 
     def get_access_token(self):
         """Gets the access token."""
@@ -54,7 +545,7 @@ class BlockExTradeApi(object):
             'client_id': self.api_id
         }
 
-        response = requests.post(self.api_url + self.LOGIN_PATH, data=data)
+        response = self.__send_request('post', self.api_url + self.LOGIN_PATH, data=data)
         if response.status_code == 200:
             return response.json()
         else:
@@ -63,18 +554,15 @@ class BlockExTradeApi(object):
             raise RequestException(exception_message)
 
     def login(self):
-        """Performs a login and stores the received access token.
+        """Performs a login and stores the received access token. With a token store a valid token stored by
+        another process is used instead of logging in.
 
         :returns: The access token of the logged in trader
         :rtype: dict
         :raises: RequestException
         """
 
-        access_token = self.get_access_token()
-        self.access_token = access_token['access_token']
-        self.access_token_expiry_time = datetime.datetime.now() +\
-            datetime.timedelta(seconds=access_token['expires_in'])
-        return self.access_token
+        return self.token_manager.refresh(force=True)
 
     def logout(self):
         """Performs a logout when logged in and deletes the stored access token.
@@ -82,13 +570,15 @@ class BlockExTradeApi(object):
         :raises: RequestException
         """
 
-        if self.access_token is not None:
-            headers = {'Authorization': 'Bearer ' + self.access_token}
-            response = requests.post(
+        access_token = self.access_token
+        if access_token is not None:
+            headers = {'Authorization': 'Bearer ' + access_token}
+            response = self.__send_request(
+                'post',
                 self.api_url + self.LOGOUT_PATH,
                 headers=headers)
             if response.status_code == 200:
-                self.access_token = None
+                self.token_manager.clear(access_token)
             else:
                 exception_message = 'Logout failed. {error_message}'.format(
                     error_message=get_error_message(response))
@@ -101,7 +591,8 @@ class BlockExTradeApi(object):
             offer_type=None,
             status=None,
             load_executions=None,
-            max_count=None):
+            max_count=None,
+            order_factory=None):
         """Gets the orders of the trader with the ability to apply filters.
 
         :param instrument_id: Instrument identifier. Use get_trader_instruments() to retrieve them. Optional.
@@ -117,6 +608,9 @@ class BlockExTradeApi(object):
         :type load_executions: boolean
         :param max_count: Maximum number of items returned. Default value is 100. Optional.
         :type max_count: int
+        :param order_factory: Callable creating the returned order objects from the decoded order dicts. Overrides
+            the order_factory of the client. Optional.
+        :type order_factory: callable
         :returns: The list of orders.
         :rtype: list of dict. Each element has the following data:\n
             orderID (string)\n
@@ -132,38 +626,104 @@ class BlockExTradeApi(object):
             trades (list of dict)
         :raises: RequestException
         """
-        data = {}
-        if instrument_id is not None:
-            data['instrumentID'] = instrument_id
-        if order_type is not None:
-            if not isinstance(order_type, OrderType):
-                raise ValueError('order_type must be of type OrderType')
-            data['orderType'] = order_type.value
-        if offer_type is not None:
-            if not isinstance(offer_type, OfferType):
-                raise ValueError('offer_type must be of type OfferType')
-            data['offerType'] = offer_type.value
-        if status is not None:
-            data['status'] = status
-        if load_executions is not None:
-            data['loadExecutions'] = load_executions
-        if max_count is not None:
-            data['maxCount'] = max_count
+        data = get_orders_data(instrument_id, order_type, offer_type, status, load_executions, max_count)
+        order_factory = order_factory or self.order_factory
 
-        query_string = urlencode(data)
-        response = self.__make_authorized_request(
-            'get',
-            self.api_url + self.GET_ORDERS_PATH + query_string)
+        def load():
+            response = self.__get_orders_response(data)
+            orders = self.__decode(response)
+            return self.__convert_orders(orders, order_factory)
 
-        if response.status_code == 200:
-            orders = response.json()
-            for order in orders:
-                convert_order_number_fields(order)
-            return orders
-        else:
-            exception_message = 'Failed to get the orders. {error_message}'.format(
-                error_message=get_error_message(response))
-            raise RequestException(exception_message)
+        return self.__coalesce(load, self.GET_ORDERS_PATH, data, order_factory, authorized=True)
+
+    def get_orders_columnar(
+            self,
+            instrument_id=None,
+            order_type=None,
+            offer_type=None,
+            status=None,
+            load_executions=None,
+            max_count=None):
+        """Gets the orders of the trader as a NumPy structured array. Requires NumPy.
+
+        The arguments are the same as the ones of get_orders(). The decoded orders are converted column by column
+        without converting their number fields to Decimal, see blockex.columnar.orders_to_array().
+
+        :returns: The orders with the fields orderID, price, quantity, initialQuantity, offerType, type, status and
+            instrumentID.
+        :rtype: numpy.ndarray
+        :raises: RequestException
+        """
+        # NumPy is an optional dependency needed only by the columnar methods
+        from blockex.columnar import orders_to_array
+
+        response = self.__get_orders_response(get_orders_data(
+            instrument_id, order_type, offer_type, status, load_executions, max_count))
+        return orders_to_array(self.__decode(response))
+
+    def iter_orders(
+            self,
+            instrument_id=None,
+            order_type=None,
+            offer_type=None,
+            status=None,
+            load_executions=None,
+            max_count=None,
+            order_factory=None,
+            chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+        """Gets the orders of the trader like get_orders(), but yields each order as soon as it is received.
+
+        The response is read and parsed incrementally, so the first orders are available before the whole response
+        arrives and the memory use does not grow with the number of orders. The JSON numbers with fractions are
+        decoded with the parse_float of the client json_decoder when it has one.
+
+        The request is sent on the first iteration. Its pooled connection is released when the iterator is exhausted
+        or closed, so an iterator that is left before its end should be closed, e.g. with contextlib.closing().
+
+        :param chunk_size: Number of bytes read from the response at a time. Optional.
+        :type chunk_size: int
+        :returns: Iterator of the orders, converted like the ones returned by get_orders().
+        :raises: RequestException
+        """
+        data = get_orders_data(instrument_id, order_type, offer_type, status, load_executions, max_count)
+        return self.__iter_orders(
+            lambda: self.__get_orders_response(data, stream=True), order_factory or self.order_factory, chunk_size)
+
+    def iter_all_orders(
+            self,
+            instrument_id=None,
+            order_type=None,
+            offer_type=None,
+            status=None,
+            load_executions=None,
+            max_count=None,
+            page_size=DEFAULT_PAGE_SIZE,
+            prefetch=True,
+            order_factory=None):
+        """Gets all the orders of the trader matching the filters, page by page.
+
+        The arguments are the same as the ones of get_orders(), except that max_count is not limited to a single
+        request. The pages are fetched with a growing maxCount as described in blockex.pagination. With prefetch the
+        next page is requested in the background while the current one is consumed.
+
+        :param max_count: Maximum number of orders returned in total. By default all the orders are returned.
+            Optional.
+        :type max_count: int
+        :param page_size: Number of orders requested by the first request. Optional.
+        :type page_size: int
+        :param prefetch: Sets whether to request the next page while the current one is consumed. Optional.
+        :type prefetch: boolean
+        :returns: Iterator of the orders, converted like the ones returned by get_orders().
+        :raises: RequestException
+        """
+        data = get_orders_data(instrument_id, order_type, offer_type, status, load_executions)
+
+        def get_page(count):
+            response = self.__get_orders_response(dict(data, maxCount=count))
+            return self.__decode(response)
+
+        pages = iter_pages(get_page, get_order_id, page_size, max_count=max_count, prefetch=prefetch)
+        return self.__iter_pages(pages, order_factory or self.order_factory)
 
     def get_market_orders(
             self,
@@ -171,7 +731,8 @@ class BlockExTradeApi(object):
             order_type=None,
             offer_type=None,
             status=None,
-            max_count=None):
+            max_count=None,
+            order_factory=None):
         """Gets the market orders with the ability to apply filters.
 
         :param instrument_id: Instrument identifier. Use get_trader_instruments() to retrieve them. Optional.
@@ -185,6 +746,9 @@ class BlockExTradeApi(object):
         :type status: string
         :param max_count: Maximum number of items returned. Default value is 100. Optional.
         :type max_count: int
+        :param order_factory: Callable creating the returned order objects from the decoded order dicts. Overrides
+            the order_factory of the client. Optional.
+        :type order_factory: callable
         :returns: The list of orders.
         :rtype: list of dict. Each element has the following data:\n
             orderID (string)\n
@@ -200,36 +764,137 @@ class BlockExTradeApi(object):
             trades (list of dict)
         :raises: RequestException
         """
-        data = {
-            'apiID': self.api_id,
-            'instrumentID': instrument_id
-        }
-        if order_type is not None:
-            if not isinstance(order_type, OrderType):
-                raise ValueError('order_type must be of type OrderType')
-            data['orderType'] = order_type.value
-        if offer_type is not None:
-            if not isinstance(offer_type, OfferType):
-                raise ValueError('offer_type must be of type OfferType')
-            data['offerType'] = offer_type.value
-        if status is not None:
-            data['status'] = status
-        if max_count is not None:
-            data['maxCount'] = max_count
+        data = get_market_orders_data(self.api_id, instrument_id, order_type, offer_type, status, max_count)
+        order_factory = order_factory or self.order_factory
 
-        query_string = urlencode(data)
-        response = requests.get(
-            self.api_url + self.GET_MARKET_ORDERS_PATH + query_string)
-        if response.status_code == 200:
-            orders = response.json()
-            for order in orders:
-                convert_order_number_fields(order)
-            return orders
-        else:
+        def load():
+            response = self.__get_market_orders_response(data)
+            orders = self.__decode(response)
+            return self.__convert_orders(orders, order_factory)
+
+        return self.__coalesce(load, self.GET_MARKET_ORDERS_PATH, data, order_factory)
+
+    def get_market_orders_columnar(
+            self,
+            instrument_id,
+            order_type=None,
+            offer_type=None,
+            status=None,
+            max_count=None):
+        """Gets the market orders as a NumPy structured array. Requires NumPy.
+
+        The arguments are the same as the ones of get_market_orders(). The decoded orders are converted column by
+        column without converting their number fields to Decimal, see blockex.columnar.orders_to_array().
+
+        :returns: The orders with the fields orderID, price, quantity, initialQuantity, offerType, type, status and
+            instrumentID.
+        :rtype: numpy.ndarray
+        :raises: RequestException
+        """
+        from blockex.columnar import orders_to_array
+
+        response = self.__get_market_orders_response(get_market_orders_data(
+            self.api_id, instrument_id, order_type, offer_type, status, max_count))
+        return orders_to_array(self.__decode(response))
+
+    def get_market_orders_if_changed(
+            self,
+            instrument_id,
+            order_type=None,
+            offer_type=None,
+            status=None,
+            max_count=None,
+            validator=None,
+            order_factory=None):
+        """Gets the market orders like get_market_orders(), unless they did not change since a previous call.
+
+        The request carries the If-None-Match and If-Modified-Since headers built from the ETag and Last-Modified
+        headers of the previous response, so a server supporting them answers with an empty 304 Not Modified
+        response. Otherwise an unchanged response is detected by the digest of its body before it is decoded.
+
+        :param validator: The validator returned by the previous call for the same filters. Optional.
+        :type validator: CacheValidator
+        :returns: The list of orders or None when they did not change, and the validator to pass to the next call.
+        :rtype: tuple
+        :raises: RequestException
+        """
+        data = get_market_orders_data(self.api_id, instrument_id, order_type, offer_type, status, max_count)
+        headers = validator.get_headers() if validator is not None else {}
+        response = self.__send_request(
+            'get',
+            self.api_url + self.GET_MARKET_ORDERS_PATH + urlencode(data),
+            headers=headers)
+
+        if response.status_code == 304:
+            return None, validator
+        if response.status_code != 200:
             exception_message = 'Failed to get the market orders. {error_message}'.format(
                 error_message=get_error_message(response))
             raise RequestException(exception_message)
 
+        new_validator = CacheValidator.from_response(response)
+        if validator is not None and validator.digest == new_validator.digest:
+            return None, new_validator
+        orders = self.__decode(response)
+        return self.__convert_orders(orders, order_factory or self.order_factory), new_validator
+
+    def iter_market_orders(
+            self,
+            instrument_id,
+            order_type=None,
+            offer_type=None,
+            status=None,
+            max_count=None,
+            order_factory=None,
+            chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+        """Gets the market orders like get_market_orders(), but yields each order as soon as it is received.
+
+        See iter_orders().
+
+        :param chunk_size: Number of bytes read from the response at a time. Optional.
+        :type chunk_size: int
+        :returns: Iterator of the orders, converted like the ones returned by get_market_orders().
+        :raises: RequestException
+        """
+        data = get_market_orders_data(self.api_id, instrument_id, order_type, offer_type, status, max_count)
+        return self.__iter_orders(
+            lambda: self.__get_market_orders_response(data, stream=True),
+            order_factory or self.order_factory,
+            chunk_size)
+
+    def iter_all_market_orders(
+            self,
+            instrument_id,
+            order_type=None,
+            offer_type=None,
+            status=None,
+            max_count=None,
+            page_size=DEFAULT_PAGE_SIZE,
+            prefetch=True,
+            order_factory=None):
+        """Gets all the market orders matching the filters, page by page.
+
+        See iter_all_orders().
+
+        :param max_count: Maximum number of orders returned in total. By default all the orders are returned.
+            Optional.
+        :type max_count: int
+        :param page_size: Number of orders requested by the first request. Optional.
+        :type page_size: int
+        :param prefetch: Sets whether to request the next page while the current one is consumed. Optional.
+        :type prefetch: boolean
+        :returns: Iterator of the orders, converted like the ones returned by get_market_orders().
+        :raises: RequestException
+        """
+        data = get_market_orders_data(self.api_id, instrument_id, order_type, offer_type, status)
+
+        def get_page(count):
+            response = self.__get_market_orders_response(dict(data, maxCount=count))
+            return self.__decode(response)
+
+        pages = iter_pages(get_page, get_order_id, page_size, max_count=max_count, prefetch=prefetch)
+        return self.__iter_pages(pages, order_factory or self.order_factory)
+
     def create_order(
             self,
             offer_type,
@@ -251,30 +916,55 @@ class BlockExTradeApi(object):
         :type quantity: float
         :raises: RequestException
         """
-        if not isinstance(order_type, OrderType):
-            raise ValueError('order_type must be of type OrderType')
-
-        if not isinstance(offer_type, OfferType):
-            raise ValueError('offer_type must be of type OfferType')
-
-        data = {
-            'offerType': offer_type.value,
-            'orderType': order_type.value,
-            'instrumentID': instrument_id,
-            'price': price,
-            'quantity': quantity
-        }
-
-        query_string = urlencode(data)
-        response = self.__make_authorized_request(
-            'post',
-            self.api_url + self.CREATE_ORDER_PATH + query_string)
+        response = self.__send_create_order(offer_type, order_type, instrument_id, price, quantity)
 
         if response.status_code != 200:
             exception_message = 'Failed to create an order. {error_message}'.format(
                 error_message=get_error_message(response))
             raise RequestException(exception_message)
 
+    def prepare_order(self, offer_type, order_type, instrument_id):
+        """Prepares the orders of an instrument and offer type, so placing each of them costs less than create_order().
+
+        The arguments are validated and the URL of the request is built once, and the headers of the requests are
+        reused while the access token is valid. PreparedOrder.send(price, quantity) then places an order exactly like
+        create_order() with the same arguments, including the login and the retry of a rejected access token.
+
+        :param offer_type: Offer type. Possible values OfferType.BID and OfferType.ASK.
+        :type offer_type: OfferType
+        :param order_type: Order type. Possible values OrderType.LIMIT, OrderType.MARKET and OrderType.STOP.
+        :type order_type: OrderType
+        :param instrument_id: Instrument identifier. Use get_trader_instruments() to retrieve them.
+        :type instrument_id: int
+        :rtype: PreparedOrder
+        """
+        data = create_order_data(offer_type, order_type, instrument_id, None, None)
+        static_data = [(name, value) for name, value in data.items() if name not in ('price', 'quantity')]
+        return PreparedOrder(
+            self.__send_prepared_order,
+            self.api_url + self.CREATE_ORDER_PATH + urlencode(static_data) + '&',
+            offer_type,
+            order_type,
+            instrument_id,
+            self.order_validator)
+
+    def create_orders(self, specs, max_in_flight=DEFAULT_POOL_MAXSIZE):
+        """Places many orders concurrently over the pooled connections.
+
+        A failure of an order does not abort the batch. Each order gets its own result instead.
+
+        :param specs: Order specifications. Each one is either a dict of create_order() keyword arguments or a tuple
+            of its positional arguments.
+        :type specs: list
+        :param max_in_flight: Maximum number of orders being placed at the same time. Optional.
+        :type max_in_flight: int
+        :returns: The results of the orders in the order of specs.
+        :rtype: list of BatchResult
+        :raises: RequestException when the login fails
+        """
+        self.token_manager.get_valid_access_token()
+        return self.__run_batch(self.__create_order_result, specs, max_in_flight)
+
     def cancel_order(self, order_id):
         """Cancels a specific order.
 
@@ -282,17 +972,31 @@ class BlockExTradeApi(object):
         :type order_id: int
         :raises: RequestException
         """
-        data = {'orderID': order_id}
-        query_string = urlencode(data)
         response = self.__make_authorized_request(
             'post',
-            self.api_url + self.CANCEL_ORDER_PATH + query_string)
+            self.api_url + self.CANCEL_ORDER_PATH + 'orderID=' + quote_plus(str(order_id)))
 
         if response.status_code != 200:
             exception_message = 'Failed to cancel the order. {error_message}'.format(
                 error_message=get_error_message(response))
             raise RequestException(exception_message)
 
+    def cancel_orders(self, order_ids, max_in_flight=DEFAULT_POOL_MAXSIZE):
+        """Cancels many orders concurrently over the pooled connections.
+
+        A failure to cancel an order does not abort the batch. Each order gets its own result instead.
+
+        :param order_ids: Order identifiers
+        :type order_ids: list of int
+        :param max_in_flight: Maximum number of orders being cancelled at the same time. Optional.
+        :type max_in_flight: int
+        :returns: The results of the cancellations in the order of order_ids.
+        :rtype: list of BatchResult
+        :raises: RequestException when the login fails
+        """
+        self.token_manager.get_valid_access_token()
+        return self.__run_batch(self.__cancel_order_result, order_ids, max_in_flight)
+
     def cancel_all_orders(self, instrument_id):
         """Cancels all the orders of the trader for a specific instrument.
 
@@ -311,7 +1015,7 @@ class BlockExTradeApi(object):
                 error_message=get_error_message(response))
             raise RequestException(exception_message)
 
-    def get_trader_instruments(self):
+    def get_trader_instruments(self, instrument_factory=None):
         """Gets the available instruments for the trader.
 
         :returns: The list of instruments.
@@ -325,22 +1029,28 @@ class BlockExTradeApi(object):
             will be rejected.\n
             commissionFeePercent (float) - The percent of the commission fee when trading this instrument.
             The value is a decimal between 0 and 1.
+        :param instrument_factory: Callable creating the returned instrument objects from the decoded instrument
+            dicts. Overrides the instrument_factory of the client. Optional.
+        :type instrument_factory: callable
         :raises: RequestException
         """
-        response = self.__make_authorized_request(
-            'get',
-            self.api_url + self.GET_TRADER_INSTRUMENTS_PATH)
-        if response.status_code == 200:
-            instruments = response.json()
-            for instrument in instruments:
-                convert_instrument_number_fields(instrument)
-            return instruments
-        else:
-            exception_message = 'Failed to get the trader instruments. {error_message}'.format(
-                error_message=get_error_message(response))
-            raise RequestException(exception_message)
+        instrument_factory = instrument_factory or self.instrument_factory
 
-    def get_partner_instruments(self):
+        def load():
+            response = self.__make_authorized_request(
+                'get',
+                self.api_url + self.GET_TRADER_INSTRUMENTS_PATH)
+            if response.status_code == 200:
+                instruments = self.__decode(response)
+                return self.__convert_instruments(instruments, instrument_factory)
+            else:
+                exception_message = 'Failed to get the trader instruments. {error_message}'.format(
+                    error_message=get_error_message(response))
+                raise RequestException(exception_message)
+
+        return self.__coalesce(load, self.GET_TRADER_INSTRUMENTS_PATH, None, instrument_factory, authorized=True)
+
+    def get_partner_instruments(self, instrument_factory=None):
         """Gets the available instruments for the partner.
 
         :returns: The list of instruments.
@@ -354,48 +1064,340 @@ class BlockExTradeApi(object):
             will be rejected.\n
             commissionFeePercent (float) - The percent of the commission fee when trading this instrument.
             The value is a decimal between 0 and 1.
+        :param instrument_factory: Callable creating the returned instrument objects from the decoded instrument
+            dicts. Overrides the instrument_factory of the client. Optional.
+        :type instrument_factory: callable
         :raises: RequestException
         """
         data = {'apiID': self.api_id}
-        query_string = urlencode(data)
-        response = requests.get(
-            self.api_url + self.GET_PARTNER_INSTRUMENTS_PATH + query_string)
-        if response.status_code == 200:
-            instruments = response.json()
-            for instrument in instruments:
-                convert_instrument_number_fields(instrument)
-            return instruments
-        else:
-            exception_message = 'Failed to get the partner instruments. {error_message}'.format(
+        instrument_factory = instrument_factory or self.instrument_factory
+
+        def load():
+            query_string = urlencode(data)
+            response = self.__send_request(
+                'get',
+                self.api_url + self.GET_PARTNER_INSTRUMENTS_PATH + query_string)
+            if response.status_code == 200:
+                instruments = self.__decode(response)
+                return self.__convert_instruments(instruments, instrument_factory)
+            else:
+                exception_message = 'Failed to get the partner instruments. {error_message}'.format(
+                    error_message=get_error_message(response))
+                raise RequestException(exception_message)
+
+        return self.__coalesce(load, self.GET_PARTNER_INSTRUMENTS_PATH, data, instrument_factory)
+
+    def __get_orders_response(self, data, **kwargs):
+        response = self.__make_authorized_request(
+            'get',
+            self.api_url + self.GET_ORDERS_PATH + urlencode(data),
+            **kwargs)
+
+        if response.status_code != 200:
+            exception_message = 'Failed to get the orders. {error_message}'.format(
                 error_message=get_error_message(response))
             raise RequestException(exception_message)
+        return response
+
+    def __get_market_orders_response(self, data, **kwargs):
+        response = self.__send_request(
+            'get',
+            self.api_url + self.GET_MARKET_ORDERS_PATH + urlencode(data),
+            **kwargs)
 
-    def __make_authorized_request(self, request_type, url):
+        if response.status_code != 200:
+            exception_message = 'Failed to get the market orders. {error_message}'.format(
+                error_message=get_error_message(response))
+            raise RequestException(exception_message)
+        return response
+
+    def __iter_orders(self, get_response, order_factory, chunk_size):
+        # A generator, so the request is sent only when the iteration starts and an iterator that is never used
+        # does not hold a pooled connection
+        response = get_response()
+        parse_float = getattr(self.json_decoder, 'parse_float', None)
+        try:
+            for order in iter_json_array(response.iter_content(chunk_size), parse_float):
+                if order_factory is not None:
+                    yield order_factory(order)
+                else:
+                    convert_order_number_fields(order)
+                    yield order
+        finally:
+            response.close()
+
+    def __iter_pages(self, pages, order_factory):
+        for orders in pages:
+            for order in self.__convert_orders(orders, order_factory):
+                yield order
+
+    def __make_authorized_request(self, request_type, url, **kwargs):
         request_type = request_type.lower()
         assert request_type in ('get', 'post')
 
-        # Not logged in or the access token has expired
-        current_time = datetime.datetime.now()
-        if self.access_token is None or self.access_token_expiry_time < current_time:
-            self.login()
-
-        bearer = self.access_token if self.access_token else ''
-        headers = {'Authorization': 'Bearer ' + bearer}
-        if request_type == 'get':
-            response = requests.get(url, headers=headers)
-        elif request_type == 'post':
-            response = requests.post(url, headers=headers)
+        bearer = self.token_manager.get_valid_access_token()
+        response = self.__send_request(request_type, url, headers=self.__get_authorization_headers(bearer), **kwargs)
 
         if is_unauthorized_response(response):
-            self.login()
-            bearer = self.access_token if self.access_token else ''
+            if self.metrics is not None:
+                self.metrics.increment(REAUTHENTICATIONS)
+            # Shares the refresh with the other callers that got their requests rejected with the same token
+            bearer = self.token_manager.refresh(stale_access_token=bearer)
+            headers = self.__get_authorization_headers(bearer)
+            response = self.__send_request(request_type, url, headers=headers, **kwargs)
+
+        if request_type == 'post' and self.read_coalescer is not None:
+            # The orders kept by the coalescer may no longer be current after an order was placed or cancelled
+            self.read_coalescer.invalidate()
+        return response
+
+    def __send_prepared_order(self, url):
+        return self.__make_authorized_request('post', url)
+
+    def __get_authorization_headers(self, bearer):
+        access_token, headers = self.__authorization
+        if access_token != bearer:
             headers = {'Authorization': 'Bearer ' + bearer}
+            self.__authorization = (bearer, headers)
+        return headers
+
+    def __coalesce(self, load, path, data, factory, authorized=False):
+        if self.read_coalescer is None:
+            return load()
+
+        # The authorized reads of different traders sharing the coalescer must not share the results
+        key = (
+            self.username if authorized else None,
+            self.api_url + path + (urlencode(data) if data else ''),
+            factory)
+        return self.read_coalescer.get(key, load)
+
+    def __get_access_token(self):
+        if self.metrics is not None:
+            self.metrics.increment(LOGINS)
+        return self.get_access_token()
+
+    def __run_batch(self, get_result, items, max_in_flight):
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_in_flight, len(items))) as executor:
+            return list(executor.map(get_result, items))
+
+    def __create_order_result(self, spec):
+        def send_request():
+            if isinstance(spec, dict):
+                return self.__send_create_order(**spec)
+            return self.__send_create_order(*spec)
+
+        return get_batch_result(spec, send_request, 'Failed to create an order.')
+
+    def __send_create_order(self, offer_type, order_type, instrument_id, price, quantity):
+        if self.order_validator is not None:
+            price, quantity = self.order_validator.validate(offer_type, order_type, instrument_id, price, quantity)
+        query_string = urlencode(create_order_data(
+            offer_type, order_type, instrument_id, price, quantity))
+        return self.__make_authorized_request(
+            'post',
+            self.api_url + self.CREATE_ORDER_PATH + query_string)
+
+    def __cancel_order_result(self, order_id):
+        def send_request():
+            return self.__make_authorized_request(
+                'post',
+                self.api_url + self.CANCEL_ORDER_PATH + urlencode({'orderID': order_id}))
+
+        return get_batch_result(order_id, send_request, 'Failed to cancel the order.')
+
+    def __get_endpoint(self, url):
+        path = url[len(self.api_url):].split('?', 1)[0]
+        return self.ENDPOINTS.get(path, path)
+
+    def __send_request(self, request_type, url, **kwargs):
+        endpoint = self.__get_endpoint(url)
+        if self.retry_policy is not None:
+            return self.retry_policy.call(
+                endpoint,
+                lambda: self.__send_request_once(request_type, url, endpoint, **kwargs))
+        return self.__send_request_once(request_type, url, endpoint, **kwargs)
+
+    def __send_request_once(self, request_type, url, endpoint, **kwargs):
+        if self.rate_limiter is not None:
+            throttled_time = self.rate_limiter.acquire(endpoint)
+            if self.metrics is not None and throttled_time > 0:
+                self.metrics.observe(THROTTLED_DURATION, throttled_time, (('endpoint', endpoint),))
+        if self.metrics is None:
             if request_type == 'get':
-                response = requests.get(url, headers=headers)
-            elif request_type == 'post':
-                response = requests.post(url, headers=headers)
+                return self.session.get(url, **kwargs)
+            return self.session.post(url, **kwargs)
 
-        return response
+        start_time = default_timer()
+        status_code = None
+        try:
+            if request_type == 'get':
+                response = self.session.get(url, **kwargs)
+            else:
+                response = self.session.post(url, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            # The requests failing without a response are reported with the error status
+            self.metrics.observe(
+                REQUEST_DURATION,
+                default_timer() - start_time,
+                (('endpoint', endpoint), ('status', 'error' if status_code is None else str(status_code))))
+            if status_code is None or status_code >= 400:
+                self.metrics.increment(ERRORS, (('endpoint', endpoint),))
+
+    def __decode(self, response):
+        if self.metrics is None:
+            return self.json_decoder.decode(response.content)
+        start_time = default_timer()
+        decoded = self.json_decoder.decode(response.content)
+        self.metrics.observe(DECODE_DURATION, default_timer() - start_time)
+        return decoded
+
+    def __convert_orders(self, orders, order_factory):
+        if self.metrics is None:
+            return convert_orders(orders, order_factory)
+        start_time = default_timer()
+        orders = convert_orders(orders, order_factory)
+        self.metrics.observe(CONVERT_DURATION, default_timer() - start_time, (('kind', 'orders'),))
+        return orders
+
+    def __convert_instruments(self, instruments, instrument_factory):
+        if self.metrics is None:
+            return convert_instruments(instruments, instrument_factory)
+        start_time = default_timer()
+        instruments = convert_instruments(instruments, instrument_factory)
+        self.metrics.observe(CONVERT_DURATION, default_timer() - start_time, (('kind', 'instruments'),))
+        return instruments
+
+def create_session(
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        pool_block=False,
+        keep_alive=True):
+    """Creates an HTTP session with a pool of reusable connections.
+
+    :param pool_connections: Number of per-host connection pools to cache.
+    :type pool_connections: int
+    :param pool_maxsize: Maximum number of connections kept alive per host.
+    :type pool_maxsize: int
+    :param pool_block: Sets whether to wait for a free connection when the pool of a host is exhausted.
+    :type pool_block: boolean
+    :param keep_alive: Sets whether to keep the connections alive between requests.
+    :type keep_alive: boolean
+    :returns: The HTTP session.
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+def get_orders_data(
+        instrument_id=None,
+        order_type=None,
+        offer_type=None,
+        status=None,
+        load_executions=None,
+        max_count=None):
+    """Builds the query data of a get orders request. See BlockExTradeApi.get_orders() for the arguments."""
+    data = {}
+    if instrument_id is not None:
+        data['instrumentID'] = instrument_id
+    if order_type is not None:
+        if not isinstance(order_type, OrderType):
+            raise ValueError('order_type must be of type OrderType')
+        data['orderType'] = order_type.value
+    if offer_type is not None:
+        if not isinstance(offer_type, OfferType):
+            raise ValueError('offer_type must be of type OfferType')
+        data['offerType'] = offer_type.value
+    if status is not None:
+        data['status'] = status
+    if load_executions is not None:
+        data['loadExecutions'] = load_executions
+    if max_count is not None:
+        data['maxCount'] = max_count
+    return data
+
+def get_market_orders_data(
+        api_id,
+        instrument_id,
+        order_type=None,
+        offer_type=None,
+        status=None,
+        max_count=None):
+    """Builds the query data of a get market orders request. See BlockExTradeApi.get_market_orders() for the
+    arguments."""
+    data = {
+        'apiID': api_id,
+        'instrumentID': instrument_id
+    }
+    if order_type is not None:
+        if not isinstance(order_type, OrderType):
+            raise ValueError('order_type must be of type OrderType')
+        data['orderType'] = order_type.value
+    if offer_type is not None:
+        if not isinstance(offer_type, OfferType):
+            raise ValueError('offer_type must be of type OfferType')
+        data['offerType'] = offer_type.value
+    if status is not None:
+        data['status'] = status
+    if max_count is not None:
+        data['maxCount'] = max_count
+    return data
+
+def create_order_data(offer_type, order_type, instrument_id, price, quantity):
+    """Builds the query data of a create order request. See BlockExTradeApi.create_order() for the arguments."""
+    if not isinstance(order_type, OrderType):
+        raise ValueError('order_type must be of type OrderType')
+
+    if not isinstance(offer_type, OfferType):
+        raise ValueError('offer_type must be of type OfferType')
+
+    return {
+        'offerType': offer_type.value,
+        'orderType': order_type.value,
+        'instrumentID': instrument_id,
+        'price': price,
+        'quantity': quantity
+    }
+
+def get_batch_result(item, send_request, failure_message):
+    """Makes the request of a batch item and converts its outcome to a BatchResult instead of raising.
+
+    :param item: The batch item.
+    :param send_request: Callable making the request and returning the response.
+    :param failure_message: Message prefix of the error when the response is unsuccessful.
+    :rtype: BatchResult
+    """
+    result = BatchResult(item)
+    start_time = default_timer()
+    try:
+        response = send_request()
+        result.status_code = response.status_code
+        if response.status_code != 200:
+            result.message = get_error_message(response)
+            result.error = RequestException('{failure_message} {error_message}'.format(
+                failure_message=failure_message, error_message=result.message))
+    except Exception as err:
+        # Any error, e.g. a TypeError of a malformed spec, is kept with its item, so the results of the other items
+        # that were already sent are not lost
+        result.error = err
+    result.elapsed = default_timer() - start_time
+    return result
 
 def is_unauthorized_response(response):
     """Checks if a response is unauthorized."""
@@ -420,6 +1422,53 @@ def get_error_message(response):
 
     return error_message
 
+def convert_orders(orders, order_factory=None):
+    """Converts decoded orders.
+
+    :param orders: The decoded orders
+    :type orders: list of dict
+    :param order_factory: Callable creating an order object from a decoded order dict. Without one, the number
+        fields of the dicts are converted in place.
+    :type order_factory: callable
+    :rtype: list
+    """
+    if order_factory is not None:
+        # Replaces the dicts one by one, so each can be freed as soon as its object is created
+        for index, order in enumerate(orders):
+            orders[index] = order_factory(order)
+        return orders
+
+    # Same as convert_order_number_fields(), with the context method looked up once for the whole list
+    create_decimal = decimal.getcontext().create_decimal
+    for order in orders:
+        order['orderID'] = int(order['orderID'])
+        order['initialQuantity'] = create_decimal(order['initialQuantity'])
+        order['price'] = create_decimal(order['price'])
+        order['quantity'] = create_decimal(order['quantity'])
+    return orders
+
+def get_order_id(order):
+    """Gets the identifier of a decoded order dict."""
+    return order['orderID']
+
+def convert_instruments(instruments, instrument_factory=None):
+    """Converts decoded instruments.
+
+    :param instruments: The decoded instruments
+    :type instruments: list of dict
+    :param instrument_factory: Callable creating an instrument object from a decoded instrument dict. Without one,
+        the number fields of the dicts are converted in place.
+    :type instrument_factory: callable
+    :rtype: list
+    """
+    if instrument_factory is not None:
+        for index, instrument in enumerate(instruments):
+            instruments[index] = instrument_factory(instrument)
+        return instruments
+    for instrument in instruments:
+        convert_instrument_number_fields(instrument)
+    return instruments
+
 def convert_instrument_number_fields(instrument):
     instrument['minOrderAmount'] = \
         decimal.getcontext().create_decimal(instrument['minOrderAmount'])
@@ -0,0 +1,223 @@
+"""Local pre-trade validation of the BlockEx Trade API orders against the cached instruments
+
+An OrderValidator checks an order against the instrument metadata of an InstrumentCache before it is sent, so an
+order the server would reject fails in microseconds instead of after a round trip:
+
+    validator = OrderValidator(InstrumentCache(trade_api), price_decimals=2)
+    trade_api = BlockExTradeApi(api_url, api_id, username, password, order_validator=validator)
+"""
+import decimal
+import math
+import numbers
+from requests import RequestException
+from blockex.instruments import get_field
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderType
+
+# Messages of the orders rejected by the validator. They are local messages, the server may reject the same orders
+# with other messages.
+INVALID_INSTRUMENT_MESSAGE = 'Invalid instrument.'
+INVALID_PRICE_MESSAGE = 'The price must be greater than zero.'
+MIN_ORDER_AMOUNT_MESSAGE = 'The quantity is less than the minimum order amount.'
+PRICE_DECIMALS_MESSAGE = 'The price must have at most {decimals} decimal places.'
+QUANTITY_DECIMALS_MESSAGE = 'The quantity must have at most {decimals} decimal places.'
+PRICE_NOT_A_NUMBER_MESSAGE = 'The price must be a number.'
+QUANTITY_NOT_A_NUMBER_MESSAGE = 'The quantity must be a number.'
+
+# Field of the minimum order amount in the instrument dicts and in the instrument objects of blockex.models
+MIN_ORDER_AMOUNT_FIELDS = {True: 'minOrderAmount', False: 'min_order_amount'}
+
+
+class OrderValidationError(RequestException):
+    """Raised instead of sending an order the server would reject.
+
+    It is a RequestException like the one raised by create_order() for an error response, so the same handler
+    catches both, but no request was sent and the message is a local one.
+
+    :ivar message: The local message, one of the messages of this module.
+    """
+
+    def __init__(self, message):
+        super(OrderValidationError, self).__init__(
+            'Failed to create an order. Rejected by the local validation: {message}'.format(message=message))
+        self.message = message
+
+
+class ValidationResult(object):
+    """Outcome of the validation of an order of a batch.
+
+    :ivar item: The order specification.
+    :ivar price: The price to send, normalized when the validator normalizes the orders. None when invalid.
+    :ivar quantity: The quantity to send, normalized when the validator normalizes the orders. None when invalid.
+    :ivar error: The OrderValidationError or ValueError describing why the order is invalid, or None.
+    """
+
+    def __init__(self, item, price=None, quantity=None, error=None):
+        self.item = item
+        self.price = price
+        self.quantity = quantity
+        self.error = error
+
+    @property
+    def valid(self):
+        return self.error is None
+
+    def __repr__(self):
+        return 'ValidationResult(item={item!r}, price={price!r}, quantity={quantity!r}, error={error!r})'.format(
+            item=self.item, price=self.price, quantity=self.quantity, error=self.error)
+
+
+class InstrumentRules(object):
+    """Limits of the orders of an instrument, parsed once from its metadata"""
+
+    def __init__(self, instrument, price_decimals, quantity_decimals):
+        self.instrument = instrument
+        min_order_amount = get_field(instrument, MIN_ORDER_AMOUNT_FIELDS[isinstance(instrument, dict)])
+        self.min_order_amount = to_decimal(min_order_amount)
+        self.price_decimals = price_decimals
+        self.quantity_decimals = quantity_decimals
+        self.price_step = None if price_decimals is None else decimal.Decimal(1).scaleb(-price_decimals)
+        self.quantity_step = None if quantity_decimals is None else decimal.Decimal(1).scaleb(-quantity_decimals)
+
+
+class OrderValidator(object):
+    """Checks the orders against the metadata of their instruments before they are sent.
+
+    An order is rejected when its instrument is unknown, its quantity is less than the minOrderAmount of the
+    instrument or, except for a market order, its price is not greater than zero. With price_decimals or
+    quantity_decimals the orders with more decimal places are rejected as well, unless normalize is set: then the
+    price is rounded away from the other side of the book, i.e. down for a bid and up for an ask, and the quantity
+    is rounded down. The instruments are read from an InstrumentCache, so the checks do not make requests while the
+    cache is fresh.
+    """
+
+    def __init__(self, instruments, price_decimals=None, quantity_decimals=None, normalize=False):
+        """Creates a validator.
+
+        :param instruments: The cache of the instruments the orders are checked against.
+        :type instruments: blockex.instruments.InstrumentCache
+        :param price_decimals: Maximum number of decimal places of the prices, either for all the instruments or by
+            instrument identifier. By default not checked. Optional.
+        :type price_decimals: int or dict
+        :param quantity_decimals: Maximum number of decimal places of the quantities, either for all the instruments
+            or by instrument identifier. By default not checked. Optional.
+        :type quantity_decimals: int or dict
+        :param normalize: Sets whether to round the prices and quantities with too many decimal places instead of
+            rejecting the orders. Optional.
+        :type normalize: boolean
+        """
+        self.instruments = instruments
+        self.price_decimals = price_decimals
+        self.quantity_decimals = quantity_decimals
+        self.normalize = normalize
+        self.__rules = {}
+
+    def validate(self, offer_type, order_type, instrument_id, price, quantity):
+        """Checks an order. See BlockExTradeApi.create_order() for the arguments.
+
+        :returns: The price and the quantity to send. They are the given ones unless they were normalized.
+        :rtype: tuple
+        :raises: OrderValidationError when the server would reject the order, ValueError when the offer type or the
+            order type is invalid, RequestException when the instruments fail to load.
+        """
+        if not isinstance(offer_type, OfferType):
+            raise ValueError('offer_type must be of type OfferType')
+        if not isinstance(order_type, OrderType):
+            raise ValueError('order_type must be of type OrderType')
+
+        rules = self.__get_rules(instrument_id)
+        if rules is None:
+            raise OrderValidationError(INVALID_INSTRUMENT_MESSAGE)
+        if not is_finite_number(quantity):
+            raise OrderValidationError(QUANTITY_NOT_A_NUMBER_MESSAGE)
+        # The price of a market order is ignored
+        if order_type is not OrderType.MARKET and not is_finite_number(price):
+            raise OrderValidationError(PRICE_NOT_A_NUMBER_MESSAGE)
+
+        quantity_value = to_decimal(quantity)
+        if rules.quantity_step is not None:
+            rounded_quantity = quantity_value.quantize(rules.quantity_step, decimal.ROUND_DOWN)
+            if rounded_quantity != quantity_value:
+                if not self.normalize:
+                    raise OrderValidationError(QUANTITY_DECIMALS_MESSAGE.format(decimals=rules.quantity_decimals))
+                quantity = quantity_value = rounded_quantity
+        if quantity_value < rules.min_order_amount:
+            raise OrderValidationError(MIN_ORDER_AMOUNT_MESSAGE)
+
+        if order_type is not OrderType.MARKET:
+            if price <= 0:
+                raise OrderValidationError(INVALID_PRICE_MESSAGE)
+            if rules.price_step is not None:
+                price_value = to_decimal(price)
+                rounding = decimal.ROUND_DOWN if offer_type is OfferType.BID else decimal.ROUND_UP
+                rounded_price = price_value.quantize(rules.price_step, rounding)
+                if rounded_price != price_value:
+                    if not self.normalize:
+                        raise OrderValidationError(PRICE_DECIMALS_MESSAGE.format(decimals=rules.price_decimals))
+                    if rounded_price <= 0:
+                        raise OrderValidationError(INVALID_PRICE_MESSAGE)
+                    price = rounded_price
+        return price, quantity
+
+    def validate_orders(self, specs):
+        """Checks many orders at once. A rejected order does not stop the batch.
+
+        :param specs: Order specifications. Each one is either a dict of create_order() keyword arguments or a tuple
+            of its positional arguments.
+        :type specs: list
+        :returns: The results of the orders in the order of specs.
+        :rtype: list of ValidationResult
+        :raises: RequestException when the instruments fail to load
+        """
+        # Loads the instruments once for the whole batch
+        self.instruments.get_instruments()
+        results = []
+        for spec in specs:
+            try:
+                if isinstance(spec, dict):
+                    price, quantity = self.validate(**spec)
+                else:
+                    price, quantity = self.validate(*spec)
+            except (OrderValidationError, ValueError, TypeError) as err:
+                results.append(ValidationResult(spec, error=err))
+            else:
+                results.append(ValidationResult(spec, price, quantity))
+        return results
+
+    def __get_rules(self, instrument_id):
+        instrument = self.instruments.get_by_id(instrument_id)
+        if instrument is None:
+            return None
+        rules = self.__rules.get(instrument_id)
+        # The rules are parsed again when the cache has reloaded the instruments
+        if rules is None or rules.instrument is not instrument:
+            rules = InstrumentRules(
+                instrument,
+                get_decimals(self.price_decimals, instrument_id),
+                get_decimals(self.quantity_decimals, instrument_id))
+            self.__rules[instrument_id] = rules
+        return rules
+
+
+def get_decimals(decimals, instrument_id):
+    if isinstance(decimals, dict):
+        return decimals.get(instrument_id)
+    return decimals
+
+
+def is_finite_number(value):
+    """Checks whether a price or a quantity is a finite int, float or Decimal."""
+    if isinstance(value, decimal.Decimal):
+        return value.is_finite()
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return not (math.isinf(value) or math.isnan(value))
+    return False
+
+
+def to_decimal(value):
+    """Converts a price or a quantity to Decimal, the floats by their shortest representation."""
+    if isinstance(value, decimal.Decimal):
+        return value
+    if isinstance(value, float):
+        return decimal.Decimal(repr(value))
+    return decimal.Decimal(value)
@@ -0,0 +1,60 @@
+"""Helpers shared by the unit tests"""
+import threading
+from mock import Mock
+from blockex.mockexchange import ThreadingHTTPServer
+from blockex.tradeapi import convert_order_number_fields
+
+
+def create_response(status_code, content=b'[]', json=None, headers=None):
+    """Creates a mock of a response of the requests session."""
+    response = Mock()
+    response.status_code = status_code
+    response.content = content
+    response.headers = headers or {}
+    response.json = Mock(return_value=json or {})
+    return response
+
+
+def make_order(order_id=32592, offer_type=1, price='13.40', quantity='32.50', status=20, instrument_id=1):
+    """Makes an order as it is decoded from a response of the API, i.e. with its number fields as strings."""
+    return {
+        'orderID': str(order_id),
+        'price': str(price),
+        'initialQuantity': '32.50',
+        'quantity': str(quantity),
+        'dateCreated': '2017-10-09T09:32:24.735659+00:00',
+        'offerType': offer_type,
+        'type': 1,
+        'status': status,
+        'instrumentID': instrument_id,
+        'trades': None,
+    }
+
+
+def make_converted_order(*args, **kwargs):
+    """Makes an order like make_order(), converted like the ones returned by the client."""
+    order = make_order(*args, **kwargs)
+    convert_order_number_fields(order)
+    return order
+
+
+def start_server(handler_class):
+    """Starts an HTTP server with the given request handler on a free local port.
+
+    The server counts the requests its handler records in request_count.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+    server.request_count = 0
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+    return server
+
+
+def get_server_url(server):
+    return 'http://127.0.0.1:{port}/'.format(port=server.server_address[1])
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,336 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest import TestCase
+from requests import RequestException
+from six.moves.urllib.parse import urlencode
+from mock import AsyncMock
+from mock import MagicMock
+from mock import Mock
+from yarl import URL
+from blockex.asynctradeapi import AsyncBlockExTradeApi
+from blockex.asynctradeapi import AsyncResponse
+from blockex.tradeapi import OrderType
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import convert_instrument_number_fields
+from blockex.tradeapi import convert_order_number_fields
+
+
+ORDERS_LIST = """
+    [{"orderID": "32592",
+    "price": "13.40",
+    "initialQuantity": "32.50",
+    "quantity": "32.50",
+    "dateCreated": "2017-10-09T09:32:24.735659+00:00",
+    "offerType": 1,
+    "type": 1,
+    "status": 15,
+    "instrumentID": 1,
+    "trades": null}]"""
+
+INSTRUMENTS_LIST = """
+    [{"id": 1,
+    "description": "Bitcoin/Euro",
+    "name": "BTC/EUR",
+    "baseCurrencyID": 43,
+    "quoteCurrencyID": 2,
+    "minOrderAmount": "0.020000000000",
+    "commissionFeePercent": 0.020000000000}]"""
+
+
+def create_session_mock(*responses):
+    """Creates a mock of aiohttp.ClientSession returning the given (status, content) responses in order."""
+    contexts = []
+    for status, content in responses:
+        response = Mock()
+        response.status = status
+        response.read = AsyncMock(return_value=content.encode())
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=response)
+        context.__aexit__ = AsyncMock(return_value=False)
+        contexts.append(context)
+
+    session = Mock()
+    session.request = Mock(side_effect=contexts)
+    session.close = AsyncMock()
+    return session
+
+
+# Unit tests
+class TestAsyncTradeApi(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.get_access_token_mock = AsyncMock(return_value=
+            {
+                'access_token': 'SomeAccessToken',
+                'expires_in': 86399,
+            })
+
+        self.trade_api = AsyncBlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword')
+        self.trade_api.get_access_token = self.get_access_token_mock
+
+    def assert_requested(self, session, request_type, url, **kwargs):
+        session.request.assert_called_once_with(
+            request_type,
+            URL(url, encoded=True),
+            headers=kwargs.get('headers'),
+            data=kwargs.get('data'))
+
+
+class TestAsyncTradeApiLogin(TestAsyncTradeApi):
+    async def test_authorized_login(self):
+        del self.trade_api.get_access_token
+        self.trade_api.session = create_session_mock(
+            (200, '{"access_token":"SomeAccessToken", "expires_in":86399}'))
+
+        login_response = await self.trade_api.login()
+
+        self.assert_requested(
+            self.trade_api.session,
+            'post',
+            'https://test.api.url/oauth/token',
+            data={
+                'grant_type': 'password',
+                'username': 'CorrectUsername',
+                'password': 'CorrectPassword',
+                'client_id': 'CorrectApiID'
+            })
+        self.assertEqual(login_response, 'SomeAccessToken')
+
+    async def test_unauthorized_login(self):
+        del self.trade_api.get_access_token
+        self.trade_api.session = create_session_mock((400, '{"error":"invalid_client"}'))
+
+        with self.assertRaises(RequestException):
+            await self.trade_api.login()
+
+    async def test_logout_when_logged_in(self):
+        await self.trade_api.login()
+        self.trade_api.session = create_session_mock((200, ''))
+
+        await self.trade_api.logout()
+
+        self.assert_requested(
+            self.trade_api.session,
+            'post',
+            'https://test.api.url/oauth/logout',
+            headers={'Authorization': 'Bearer SomeAccessToken'})
+        self.assertIsNone(self.trade_api.access_token)
+
+    async def test_close(self):
+        session = create_session_mock()
+        self.trade_api.session = session
+
+        async with self.trade_api:
+            pass
+
+        session.close.assert_called_once_with()
+        self.assertIsNone(self.trade_api.session)
+
+
+class TestAsyncTradeApiOrders(TestAsyncTradeApi):
+    async def test_successful_get_orders_with_filter(self):
+        self.trade_api.session = create_session_mock((200, ORDERS_LIST))
+
+        orders = await self.trade_api.get_orders(
+            1, OrderType.LIMIT, OfferType.BID, '10,20', True, 50)
+
+        query_string = urlencode({
+            'instrumentID': 1,
+            'orderType': 'Limit',
+            'offerType': 'Bid',
+            'status': '10,20',
+            'loadExecutions': True,
+            'maxCount': 50
+        })
+        self.assert_requested(
+            self.trade_api.session,
+            'get',
+            'https://test.api.url/api/orders/get?' + query_string,
+            headers={'Authorization': 'Bearer SomeAccessToken'})
+
+        expected_orders = AsyncResponse(200, ORDERS_LIST.encode()).json()
+        for order in expected_orders:
+            convert_order_number_fields(order)
+        self.assertEqual(orders, expected_orders)
+
+    async def test_successful_get_market_orders(self):
+        self.trade_api.session = create_session_mock((200, ORDERS_LIST))
+
+        orders = await self.trade_api.get_market_orders(1)
+
+        self.assert_requested(
+            self.trade_api.session,
+            'get',
+            'https://test.api.url/api/orders/getMarketOrders?apiID=CorrectApiID&instrumentID=1')
+        self.assertEqual(orders[0]['orderID'], 32592)
+        self.get_access_token_mock.assert_not_called()
+
+    async def test_unsuccessful_get_orders(self):
+        self.trade_api.session = create_session_mock((400, '{"message": "Unknown trader"}'))
+
+        with self.assertRaises(RequestException):
+            await self.trade_api.get_orders()
+
+    async def test_successful_create_order(self):
+        self.trade_api.session = create_session_mock((200, ''))
+
+        await self.trade_api.create_order(OfferType.BID, OrderType.LIMIT, 1, 15.2, 3.7)
+
+        query_string = urlencode({
+            'offerType': 'Bid',
+            'orderType': 'Limit',
+            'instrumentID': 1,
+            'price': 15.2,
+            'quantity': 3.7
+        })
+        self.assert_requested(
+            self.trade_api.session,
+            'post',
+            'https://test.api.url/api/orders/create?' + query_string,
+            headers={'Authorization': 'Bearer SomeAccessToken'})
+
+    async def test_create_orders_with_a_rejected_order(self):
+        self.trade_api.session = create_session_mock(
+            (200, ''),
+            (400, '{"message": "Invalid price"}'))
+
+        results = await self.trade_api.create_orders(
+            [
+                (OfferType.BID, OrderType.LIMIT, 1, 15.2, 3.7),
+                {
+                    'offer_type': OfferType.ASK,
+                    'order_type': OrderType.LIMIT,
+                    'instrument_id': 1,
+                    'price': 0,
+                    'quantity': 3.7
+                },
+                ('Bid', OrderType.LIMIT, 1, 15.2, 3.7),
+            ],
+            max_in_flight=1)
+
+        self.get_access_token_mock.assert_called_once_with()
+        self.assertEqual([result.success for result in results], [True, False, False])
+        self.assertEqual(results[1].message, ' Message: Invalid price')
+        self.assertIsInstance(results[1].error, RequestException)
+        self.assertIsInstance(results[2].error, ValueError)
+
+    async def test_create_orders_with_a_malformed_spec(self):
+        self.trade_api.session = create_session_mock((200, ''), (200, ''))
+
+        results = await self.trade_api.create_orders(
+            [
+                (OfferType.BID, OrderType.LIMIT, 1, 15.2, 3.7),
+                (OfferType.BID, OrderType.LIMIT, 1),
+                (OfferType.ASK, OrderType.LIMIT, 1, 16.1, 2),
+            ],
+            max_in_flight=1)
+
+        self.assertEqual(self.trade_api.session.request.call_count, 2)
+        self.assertEqual([result.success for result in results], [True, False, True])
+        self.assertIsInstance(results[1].error, TypeError)
+
+    async def test_unsuccessful_cancel_order(self):
+        self.trade_api.session = create_session_mock((400, '{"message": "Unknown trader"}'))
+
+        with self.assertRaises(RequestException):
+            await self.trade_api.cancel_order(32598)
+
+        self.assert_requested(
+            self.trade_api.session,
+            'post',
+            'https://test.api.url/api/orders/cancel?orderID=32598',
+            headers={'Authorization': 'Bearer SomeAccessToken'})
+
+    async def test_cancel_orders_with_a_failed_cancellation(self):
+        self.trade_api.session = create_session_mock(
+            (400, '{"message": "Order not found"}'),
+            (200, ''))
+
+        results = await self.trade_api.cancel_orders([32598, 32599], max_in_flight=1)
+
+        self.assertEqual([result.item for result in results], [32598, 32599])
+        self.assertEqual([result.success for result in results], [False, True])
+        self.assertEqual(results[0].message, ' Message: Order not found')
+
+    async def test_successful_cancel_all_orders(self):
+        self.trade_api.session = create_session_mock((200, ''))
+
+        await self.trade_api.cancel_all_orders(1)
+
+        self.assert_requested(
+            self.trade_api.session,
+            'post',
+            'https://test.api.url/api/orders/cancelall?instrumentID=1',
+            headers={'Authorization': 'Bearer SomeAccessToken'})
+
+
+class TestAsyncTradeApiInstruments(TestAsyncTradeApi):
+    async def test_successful_get_trader_instruments(self):
+        self.trade_api.session = create_session_mock((200, INSTRUMENTS_LIST))
+
+        instruments = await self.trade_api.get_trader_instruments()
+
+        expected_instruments = AsyncResponse(200, INSTRUMENTS_LIST.encode()).json()
+        for instrument in expected_instruments:
+            convert_instrument_number_fields(instrument)
+        self.assertEqual(instruments, expected_instruments)
+
+    async def test_successful_get_partner_instruments(self):
+        self.trade_api.session = create_session_mock((200, INSTRUMENTS_LIST))
+
+        await self.trade_api.get_partner_instruments()
+
+        self.assert_requested(
+            self.trade_api.session,
+            'get',
+            'https://test.api.url/api/orders/partnerinstruments?apiID=CorrectApiID')
+
+
+class TestAsyncTradeApiMakeAuthorizedRequest(TestAsyncTradeApi):
+    async def test_concurrent_requests_share_one_login(self):
+        self.trade_api.session = create_session_mock(*[(200, '')] * 10)
+
+        await asyncio.gather(*[self.trade_api.cancel_order(order_id) for order_id in range(10)])
+
+        self.get_access_token_mock.assert_called_once_with()
+        self.assertEqual(self.trade_api.session.request.call_count, 10)
+
+    async def test_unauthorized_response_refreshes_the_token(self):
+        await self.trade_api.login()
+        self.trade_api.session = create_session_mock(
+            (401, '{"message": "Authorization has been denied for this request."}'),
+            (200, ''))
+
+        await self.trade_api.cancel_all_orders(1)
+
+        self.assertEqual(self.get_access_token_mock.call_count, 2)
+        self.assertEqual(self.trade_api.session.request.call_count, 2)
+
+
+class TestAsyncTradeApiEventLoop(TestCase):
+    def test_client_created_outside_the_loop(self):
+        # The usual pattern: the client is created before asyncio.run() starts the loop of its requests
+        trade_api = AsyncBlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword')
+        login_count = []
+
+        async def get_access_token():
+            login_count.append(1)
+            await asyncio.sleep(0.01)
+            return {'access_token': 'SomeAccessToken', 'expires_in': 86399}
+
+        trade_api.get_access_token = get_access_token
+
+        async def cancel_orders():
+            trade_api.session = create_session_mock((200, ''), (200, ''))
+            await asyncio.gather(trade_api.cancel_order(1), trade_api.cancel_order(2))
+
+        asyncio.run(cancel_orders())
+
+        self.assertEqual(login_count, [1])
@@ -0,0 +1,97 @@
+from unittest import TestCase
+from requests import RequestException
+from blockex.clientpool import ClientPool
+from blockex.metrics import LOGINS
+from blockex.metrics import REQUEST_DURATION
+from blockex.mockexchange import MockExchange
+from blockex.mockexchange import MockExchangeServer
+from blockex.tradeapi import DEFAULT_TOKEN_REFRESH_MARGIN
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderType
+
+ACCOUNTS = dict(('Trader{0}'.format(index), 'Password{0}'.format(index)) for index in range(5))
+
+
+class TestClientPool(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockExchangeServer(MockExchange(api_id='PartnerApiID', traders=ACCOUNTS)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.pool = ClientPool(self.server.url, 'PartnerApiID', ACCOUNTS, login_rate=100, login_burst=1)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_accounts_share_the_session(self):
+        self.assertEqual(len(self.pool), 5)
+        self.assertEqual(sorted(self.pool), sorted(ACCOUNTS))
+        for username in self.pool:
+            client = self.pool[username]
+            self.assertEqual(client.username, username)
+            self.assertIs(client.session, self.pool.session)
+            self.assertIs(client.rate_limiter, self.pool.rate_limiter)
+            self.assertIs(client.metrics, self.pool.metrics)
+            self.assertEqual(client.token_manager.refresh_margin, DEFAULT_TOKEN_REFRESH_MARGIN)
+            self.assertEqual(client.token_manager.refresh_spread, 300)
+
+    def test_calls_are_routed_by_account(self):
+        self.pool['Trader0'].create_order(OfferType.BID, OrderType.LIMIT, 1, 99, 1)
+        self.pool['Trader1'].create_order(OfferType.ASK, OrderType.LIMIT, 1, 101, 2)
+
+        self.assertEqual(len(self.pool['Trader0'].get_orders()), 1)
+        self.assertEqual(self.pool['Trader1'].get_orders()[0]['offerType'], 2)
+        self.assertEqual(self.pool['Trader2'].get_orders(), [])
+        with self.assertRaises(KeyError):
+            self.pool['Trader9']
+
+    def test_login_all_is_staggered(self):
+        results = self.pool.login_all()
+
+        self.assertEqual(sorted(results), sorted(ACCOUNTS))
+        self.assertTrue(all(result.success for result in results.values()))
+        self.assertTrue(all(self.pool[username].access_token for username in ACCOUNTS))
+        # With a burst of one login all but the first waited
+        self.assertEqual(self.pool.rate_limiter.get_throttled_count('login'), 4)
+
+        # The valid tokens are reused
+        self.pool.login_all()
+        self.assertEqual(self.pool.metrics.get_counter(LOGINS), 5)
+
+    def test_failed_login(self):
+        self.pool.add_account('Intruder', 'WrongPassword')
+
+        results = self.pool.login_all()
+
+        self.assertIsInstance(results['Intruder'].error, RequestException)
+        self.assertTrue(results['Trader0'].success)
+
+    def test_metrics_are_aggregated(self):
+        for username in ACCOUNTS:
+            self.pool[username].get_orders()
+
+        histogram = self.pool.metrics.get_histogram(REQUEST_DURATION, (('endpoint', 'get_orders'), ('status', '200')))
+        self.assertEqual(histogram.count, 5)
+
+    def test_add_and_remove_account(self):
+        with self.assertRaises(ValueError):
+            self.pool.add_account('Trader0', 'Password0')
+
+        self.pool.remove_account('Trader0')
+
+        self.assertNotIn('Trader0', self.pool)
+        self.assertEqual(len(self.pool), 4)
+
+    def test_closing_a_client_keeps_the_session(self):
+        self.pool['Trader0'].close()
+
+        self.assertEqual(self.pool['Trader3'].get_orders(), [])
+
+    def test_arguments_set_by_the_pool(self):
+        for client_kwargs in ({'session': self.pool.session}, {'token_refresh_spread': 60}):
+            with self.assertRaises(ValueError):
+                ClientPool(self.server.url, 'PartnerApiID', ACCOUNTS, **client_kwargs)
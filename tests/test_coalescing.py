@@ -0,0 +1,159 @@
+from unittest import TestCase
+import threading
+import time
+from requests import RequestException
+from mock import Mock
+from blockex.coalescing import RequestCoalescer
+from blockex.tradeapi import BlockExTradeApi
+from helpers import create_response
+
+
+def call_concurrently(target, count):
+    """Calls the target from many threads at once and returns the results and the errors."""
+    results = []
+    errors = []
+
+    def call():
+        try:
+            results.append(target())
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+class TestRequestCoalescer(TestCase):
+    def setUp(self):
+        self.coalescer = RequestCoalescer()
+        self.release = threading.Event()
+        self.load = Mock(side_effect=lambda: self.release.wait(1) and ['result'])
+
+    def test_concurrent_calls_share_one_load(self):
+        threads, results, errors = call_concurrently(lambda: self.coalescer.get('key', self.load), 5)
+        time.sleep(0.05)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.load.assert_called_once_with()
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(errors, [])
+
+    def test_concurrent_calls_share_the_error(self):
+        def raise_error():
+            self.release.wait(1)
+            raise RequestException('Failed to get the orders.')
+
+        load = Mock(side_effect=raise_error)
+        threads, results, errors = call_concurrently(lambda: self.coalescer.get('key', load), 3)
+        time.sleep(0.05)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        load.assert_called_once_with()
+        self.assertEqual(len(errors), 3)
+
+        # The errors are not kept
+        self.assertEqual(self.coalescer.get('key', lambda: ['result']), ['result'])
+
+    def test_sequential_calls_without_ttl(self):
+        self.release.set()
+
+        self.coalescer.get('key', self.load)
+        self.coalescer.get('key', self.load)
+
+        self.assertEqual(self.load.call_count, 2)
+
+    def test_result_is_kept_for_ttl(self):
+        self.release.set()
+        coalescer = RequestCoalescer(ttl=0.05)
+
+        coalescer.get('key', self.load)
+        coalescer.get('key', self.load)
+        coalescer.get('other key', self.load)
+        self.assertEqual(self.load.call_count, 2)
+
+        time.sleep(0.06)
+        coalescer.get('key', self.load)
+        self.assertEqual(self.load.call_count, 3)
+
+    def test_expired_results_are_dropped(self):
+        self.release.set()
+        coalescer = RequestCoalescer(ttl=0.05)
+
+        for offset in range(100):
+            coalescer.get(('orders', offset), self.load)
+        self.assertEqual(coalescer.get_kept_count(), 100)
+
+        time.sleep(0.06)
+        coalescer.get(('orders', 100), self.load)
+        self.assertEqual(coalescer.get_kept_count(), 1)
+
+    def test_invalidate(self):
+        self.release.set()
+        coalescer = RequestCoalescer(ttl=60)
+        coalescer.get('key', self.load)
+
+        coalescer.invalidate()
+        coalescer.get('key', self.load)
+
+        self.assertEqual(self.load.call_count, 2)
+
+
+class TestTradeApiReadCoalescer(TestCase):
+    def setUp(self):
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            read_coalescer=RequestCoalescer(ttl=60))
+        self.trade_api.get_access_token = Mock(return_value={
+            'access_token': 'SomeAccessToken',
+            'expires_in': 86399,
+        })
+        self.trade_api.session.get = Mock(return_value=create_response(200))
+        self.trade_api.session.post = Mock(return_value=create_response(200))
+
+    def test_identical_reads_share_the_result(self):
+        orders = self.trade_api.get_market_orders(1)
+
+        self.assertIs(self.trade_api.get_market_orders(1), orders)
+        self.trade_api.get_market_orders(2)
+        self.trade_api.get_market_orders(1, max_count=10)
+        self.assertEqual(self.trade_api.session.get.call_count, 3)
+
+    def test_concurrent_get_trader_instruments(self):
+        release = threading.Event()
+        self.trade_api.session.get = Mock(side_effect=lambda *args, **kwargs: release.wait(1) and create_response(200))
+
+        threads, results, errors = call_concurrently(self.trade_api.get_trader_instruments, 4)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.trade_api.session.get.assert_called_once()
+        self.assertEqual(len(results), 4)
+
+    def test_placing_an_order_drops_the_kept_orders(self):
+        self.trade_api.get_orders()
+        self.trade_api.cancel_order(32598)
+
+        self.trade_api.get_orders()
+
+        self.assertEqual(self.trade_api.session.get.call_count, 2)
+
+    def test_failed_reads_are_not_kept(self):
+        self.trade_api.session.get = Mock(return_value=create_response(400))
+
+        for _ in range(2):
+            with self.assertRaises(RequestException):
+                self.trade_api.get_partner_instruments()
+
+        self.assertEqual(self.trade_api.session.get.call_count, 2)
@@ -0,0 +1,82 @@
+from unittest import TestCase
+from requests import Response
+from mock import Mock
+import numpy
+from blockex.columnar import orders_to_array
+from blockex.tradeapi import BlockExTradeApi
+
+
+ORDERS_LIST = """
+    [{"orderID": "32592",
+    "price": "13.40",
+    "initialQuantity": "32.50",
+    "quantity": "30.50",
+    "dateCreated": "2017-10-09T09:32:24.735659+00:00",
+    "offerType": 1,
+    "type": 1,
+    "status": 50,
+    "instrumentID": 1,
+    "trades": null},
+    {"orderID": "32593",
+    "price": 11.34,
+    "initialQuantity": "26.00",
+    "quantity": "26.00",
+    "dateCreated": "2017-10-09T09:35:10.61228+00:00",
+    "offerType": 2,
+    "type": 3,
+    "status": 20,
+    "instrumentID": 2,
+    "trades": null}]"""
+
+
+# Unit tests
+class TestColumnar(TestCase):
+    def setUp(self):
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword')
+        self.trade_api.get_access_token = Mock(return_value={
+            'access_token': 'SomeAccessToken',
+            'expires_in': 86399,
+        })
+
+        response = Response()
+        response.status_code = 200
+        response._content = ORDERS_LIST.encode()
+        self.get_mock = Mock(return_value=response)
+        self.trade_api.session.get = self.get_mock
+
+    def assert_orders_array(self, orders):
+        self.assertEqual(orders.dtype.names, (
+            'orderID', 'price', 'quantity', 'initialQuantity', 'offerType', 'type', 'status', 'instrumentID'))
+        numpy.testing.assert_array_equal(orders['orderID'], [32592, 32593])
+        numpy.testing.assert_array_equal(orders['price'], [13.40, 11.34])
+        numpy.testing.assert_array_equal(orders['quantity'], [30.5, 26])
+        numpy.testing.assert_array_equal(orders['initialQuantity'], [32.5, 26])
+        numpy.testing.assert_array_equal(orders['offerType'], [1, 2])
+        numpy.testing.assert_array_equal(orders['type'], [1, 3])
+        numpy.testing.assert_array_equal(orders['status'], [50, 20])
+        numpy.testing.assert_array_equal(orders['instrumentID'], [1, 2])
+
+    def test_get_orders_columnar(self):
+        orders = self.trade_api.get_orders_columnar(max_count=2)
+
+        self.get_mock.assert_called_once_with(
+            'https://test.api.url/api/orders/get?maxCount=2',
+            headers={'Authorization': 'Bearer SomeAccessToken'})
+        self.assert_orders_array(orders)
+
+    def test_get_market_orders_columnar(self):
+        orders = self.trade_api.get_market_orders_columnar(1)
+
+        self.get_mock.assert_called_once_with(
+            'https://test.api.url/api/orders/getMarketOrders?apiID=CorrectApiID&instrumentID=1')
+        self.assert_orders_array(orders)
+
+    def test_empty_orders(self):
+        orders = orders_to_array([])
+
+        self.assertEqual(len(orders), 0)
+        self.assertEqual(len(orders.dtype.names), 8)
@@ -0,0 +1,72 @@
+from unittest import TestCase
+import decimal
+from requests import Response
+from mock import Mock
+from mock import patch
+from blockex import decoding
+from blockex.decoding import JsonDecoder
+from blockex.decoding import OrjsonDecoder
+from blockex.decoding import create_default_json_decoder
+from blockex.tradeapi import BlockExTradeApi
+
+
+INSTRUMENTS_LIST = """
+    [{"id": 1,
+    "description": "Bitcoin/Euro",
+    "name": "BTC/EUR",
+    "baseCurrencyID": 43,
+    "quoteCurrencyID": 2,
+    "minOrderAmount": 0.123456789012345678,
+    "commissionFeePercent": 0.020000000000}]"""
+
+
+# Unit tests
+class TestDecoding(TestCase):
+    def test_json_decoder(self):
+        instruments = JsonDecoder().decode(INSTRUMENTS_LIST.encode())
+
+        self.assertEqual(instruments[0]['name'], 'BTC/EUR')
+        self.assertEqual(instruments[0]['commissionFeePercent'], 0.02)
+
+    def test_json_decoder_with_decimal_numbers(self):
+        instruments = JsonDecoder(parse_float=decimal.Decimal).decode(INSTRUMENTS_LIST.encode())
+
+        self.assertEqual(instruments[0]['minOrderAmount'], decimal.Decimal('0.123456789012345678'))
+        self.assertEqual(instruments[0]['commissionFeePercent'], decimal.Decimal('0.02'))
+        self.assertEqual(instruments[0]['id'], 1)
+
+    def test_orjson_decoder_decodes_as_json_decoder(self):
+        if decoding.orjson is None:
+            self.skipTest('orjson is not installed')
+
+        self.assertEqual(
+            OrjsonDecoder().decode(INSTRUMENTS_LIST.encode()),
+            JsonDecoder().decode(INSTRUMENTS_LIST.encode()))
+
+    def test_invalid_json(self):
+        for decoder in (JsonDecoder(), create_default_json_decoder()):
+            with self.assertRaises(ValueError):
+                decoder.decode(b'[{"id": ')
+
+    def test_default_json_decoder_without_orjson(self):
+        with patch.object(decoding, 'orjson', None):
+            self.assertIsInstance(create_default_json_decoder(), JsonDecoder)
+            with self.assertRaises(ImportError):
+                OrjsonDecoder()
+
+    def test_trade_api_with_decimal_decoder(self):
+        trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            json_decoder=JsonDecoder(parse_float=decimal.Decimal))
+        response = Response()
+        response.status_code = 200
+        response._content = INSTRUMENTS_LIST.encode()
+        trade_api.session.get = Mock(return_value=response)
+
+        instruments = trade_api.get_partner_instruments()
+
+        self.assertEqual(instruments[0]['minOrderAmount'], decimal.Decimal('0.123456789012345678'))
+        self.assertEqual(instruments[0]['commissionFeePercent'], decimal.Decimal('0.02'))
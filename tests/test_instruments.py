@@ -0,0 +1,97 @@
+from unittest import TestCase
+import decimal
+import threading
+import time
+from mock import Mock
+from blockex.instruments import InstrumentCache
+
+
+INSTRUMENTS = [
+    {
+        'id': 1,
+        'description': 'Bitcoin/Euro',
+        'name': 'BTC/EUR',
+        'baseCurrencyID': 43,
+        'quoteCurrencyID': 2,
+        'minOrderAmount': decimal.Decimal('0.020000000000'),
+        'commissionFeePercent': 0.02
+    },
+    {
+        'id': 2,
+        'description': 'Ethereum/Euro',
+        'name': 'ETH/EUR',
+        'baseCurrencyID': 46,
+        'quoteCurrencyID': 2,
+        'minOrderAmount': decimal.Decimal('9.000000000000'),
+        'commissionFeePercent': 0.025
+    },
+]
+
+
+# Unit tests
+class TestInstrumentCache(TestCase):
+    def setUp(self):
+        self.trade_api = Mock()
+        self.trade_api.get_trader_instruments = Mock(return_value=INSTRUMENTS)
+        self.trade_api.get_partner_instruments = Mock(return_value=INSTRUMENTS[:1])
+
+    def test_lookups_load_the_instruments_once(self):
+        cache = InstrumentCache(self.trade_api)
+
+        self.assertEqual(cache.get_instruments(), INSTRUMENTS)
+        self.assertEqual(cache.get_by_id(2)['name'], 'ETH/EUR')
+        self.assertEqual(cache.get_by_name('BTC/EUR')['minOrderAmount'], decimal.Decimal('0.02'))
+        self.assertIsNone(cache.get_by_id(3))
+        self.assertIsNone(cache.get_by_name('XTN/EUR'))
+
+        self.trade_api.get_trader_instruments.assert_called_once_with()
+        self.trade_api.get_partner_instruments.assert_not_called()
+
+    def test_partner_instruments(self):
+        cache = InstrumentCache(self.trade_api, partner=True)
+
+        self.assertEqual(cache.get_by_id(1)['name'], 'BTC/EUR')
+        self.assertIsNone(cache.get_by_id(2))
+
+        self.trade_api.get_partner_instruments.assert_called_once_with()
+        self.trade_api.get_trader_instruments.assert_not_called()
+
+    def test_expired_instruments_are_reloaded(self):
+        cache = InstrumentCache(self.trade_api, ttl=0)
+
+        cache.get_by_id(1)
+        cache.get_by_id(1)
+
+        self.assertEqual(self.trade_api.get_trader_instruments.call_count, 2)
+
+    def test_invalidate(self):
+        cache = InstrumentCache(self.trade_api)
+
+        cache.get_by_id(1)
+        cache.invalidate()
+        cache.get_by_id(1)
+
+        self.assertEqual(self.trade_api.get_trader_instruments.call_count, 2)
+
+    def test_concurrent_lookups_share_one_load(self):
+        def get_trader_instruments():
+            time.sleep(0.05)
+            return INSTRUMENTS
+
+        self.trade_api.get_trader_instruments.side_effect = get_trader_instruments
+        cache = InstrumentCache(self.trade_api)
+
+        threads = [threading.Thread(target=cache.get_by_id, args=(1,)) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.trade_api.get_trader_instruments.assert_called_once_with()
+
+    def test_background_refresh(self):
+        with InstrumentCache(self.trade_api, ttl=0.01, background_refresh=True) as cache:
+            time.sleep(0.1)
+            self.assertEqual(cache.get_by_name('ETH/EUR')['id'], 2)
+
+        self.assertGreater(self.trade_api.get_trader_instruments.call_count, 2)
@@ -0,0 +1,145 @@
+from unittest import TestCase
+from requests import RequestException
+from requests.exceptions import ConnectionError
+from six.moves.urllib.request import urlopen
+from mock import Mock
+from blockex.metrics import CONVERT_DURATION
+from blockex.metrics import DECODE_DURATION
+from blockex.metrics import ERRORS
+from blockex.metrics import LOGINS
+from blockex.metrics import REAUTHENTICATIONS
+from blockex.metrics import REQUEST_DURATION
+from blockex.metrics import THROTTLED_DURATION
+from blockex.metrics import MetricsRegistry
+from blockex.metrics import generate_prometheus_text
+from blockex.metrics import start_prometheus_server
+from blockex.ratelimit import RateLimiter
+from blockex.tradeapi import BlockExTradeApi
+from helpers import create_response
+
+
+class TestMetricsRegistry(TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(buckets=(0.1, 1.0))
+
+    def test_histogram(self):
+        for value in (0.05, 0.1, 0.5, 3):
+            self.registry.observe('duration', value, (('endpoint', 'get_orders'),))
+
+        histogram = self.registry.get_histogram('duration', (('endpoint', 'get_orders'),))
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.get_cumulative_counts(), [2, 3, 4])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 3.65)
+        self.assertIsNone(self.registry.get_histogram('duration'))
+
+    def test_counter(self):
+        self.registry.increment('logins')
+        self.registry.increment('logins', amount=2)
+
+        self.assertEqual(self.registry.get_counter('logins'), 3)
+        self.assertEqual(self.registry.get_counter('errors'), 0)
+
+    def test_prometheus_text(self):
+        self.registry.observe(REQUEST_DURATION, 0.5, (('endpoint', 'get_orders'), ('status', '200')))
+        self.registry.increment(LOGINS)
+        self.registry.increment(ERRORS, (('endpoint', 'say "hi"'),))
+
+        self.assertEqual(generate_prometheus_text(self.registry), '\n'.join([
+            '# HELP blockex_request_duration_seconds Duration of the Trade API requests by endpoint and status code.',
+            '# TYPE blockex_request_duration_seconds histogram',
+            'blockex_request_duration_seconds_bucket{endpoint="get_orders",status="200",le="0.1"} 0',
+            'blockex_request_duration_seconds_bucket{endpoint="get_orders",status="200",le="1.0"} 1',
+            'blockex_request_duration_seconds_bucket{endpoint="get_orders",status="200",le="+Inf"} 1',
+            'blockex_request_duration_seconds_sum{endpoint="get_orders",status="200"} 0.5',
+            'blockex_request_duration_seconds_count{endpoint="get_orders",status="200"} 1',
+            '# HELP blockex_errors_total Number of requests that failed with an error response or a connection error '
+            'by endpoint.',
+            '# TYPE blockex_errors_total counter',
+            'blockex_errors_total{endpoint="say \\"hi\\""} 1',
+            '# HELP blockex_logins_total Number of logins.',
+            '# TYPE blockex_logins_total counter',
+            'blockex_logins_total 1',
+        ]) + '\n')
+
+    def test_empty_prometheus_text(self):
+        self.assertEqual(generate_prometheus_text(self.registry), '')
+
+    def test_prometheus_server(self):
+        self.registry.increment(LOGINS)
+        server = start_prometheus_server(self.registry, 0, '127.0.0.1')
+        try:
+            response = urlopen('http://127.0.0.1:{0}/metrics'.format(server.server_address[1]))
+            body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertIn('blockex_logins_total 1', body)
+
+
+class TestTradeApiMetrics(TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            metrics=self.registry)
+        self.trade_api.session.post = Mock(return_value=create_response(
+            200, json={'access_token': 'SomeAccessToken', 'expires_in': 86399}))
+
+    def test_successful_requests(self):
+        self.trade_api.session.get = Mock(return_value=create_response(200))
+
+        self.trade_api.get_orders()
+        self.trade_api.get_partner_instruments()
+
+        self.assertEqual(self.registry.get_counter(LOGINS), 1)
+        self.assertEqual(
+            self.registry.get_histogram(REQUEST_DURATION, (('endpoint', 'login'), ('status', '200'))).count, 1)
+        self.assertEqual(
+            self.registry.get_histogram(REQUEST_DURATION, (('endpoint', 'get_orders'), ('status', '200'))).count, 1)
+        self.assertEqual(self.registry.get_histogram(DECODE_DURATION).count, 2)
+        self.assertEqual(self.registry.get_histogram(CONVERT_DURATION, (('kind', 'orders'),)).count, 1)
+        self.assertEqual(self.registry.get_histogram(CONVERT_DURATION, (('kind', 'instruments'),)).count, 1)
+        self.assertEqual(self.registry.get_counter(ERRORS, (('endpoint', 'get_orders'),)), 0)
+
+    def test_rejected_access_token(self):
+        self.trade_api.session.get = Mock(side_effect=[
+            create_response(401, json={'message': 'Authorization has been denied for this request.'}),
+            create_response(200)])
+
+        self.trade_api.get_orders()
+
+        self.assertEqual(self.registry.get_counter(LOGINS), 2)
+        self.assertEqual(self.registry.get_counter(REAUTHENTICATIONS), 1)
+        self.assertEqual(self.registry.get_counter(ERRORS, (('endpoint', 'get_orders'),)), 1)
+
+    def test_throttled_requests(self):
+        self.trade_api.rate_limiter = RateLimiter(endpoint_limits={'get_market_orders': (50, 1)})
+        self.trade_api.session.get = Mock(return_value=create_response(200))
+
+        self.trade_api.get_market_orders(1)
+        self.trade_api.get_market_orders(1)
+        self.trade_api.get_orders()
+
+        histogram = self.registry.get_histogram(THROTTLED_DURATION, (('endpoint', 'get_market_orders'),))
+        self.assertEqual(histogram.count, 1)
+        self.assertGreater(histogram.sum, 0)
+        self.assertIsNone(self.registry.get_histogram(THROTTLED_DURATION, (('endpoint', 'get_orders'),)))
+        self.assertIn('blockex_throttled_seconds_count{endpoint="get_market_orders"} 1',
+                      generate_prometheus_text(self.registry))
+
+    def test_failed_requests(self):
+        self.trade_api.session.get = Mock(side_effect=ConnectionError('Connection reset'))
+
+        with self.assertRaises(RequestException):
+            self.trade_api.get_market_orders(1)
+
+        self.assertEqual(self.registry.get_counter(ERRORS, (('endpoint', 'get_market_orders'),)), 1)
+        self.assertEqual(
+            self.registry.get_histogram(
+                REQUEST_DURATION, (('endpoint', 'get_market_orders'), ('status', 'error'))).count,
+            1)
@@ -0,0 +1,205 @@
+from unittest import TestCase
+from decimal import Decimal
+from requests import RequestException
+from blockex.mockexchange import ASK
+from blockex.mockexchange import BID
+from blockex.mockexchange import MockExchange
+from blockex.mockexchange import MockExchangeServer
+from blockex.mockexchange import create_instruments
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderStatus
+from blockex.tradeapi import OrderType
+
+LIMIT = 1
+MARKET = 2
+
+
+class TestMockExchange(TestCase):
+    def setUp(self):
+        self.exchange = MockExchange(create_instruments(2))
+
+    def place(self, trader, offer_type, price, quantity, order_type=LIMIT, instrument_id=1):
+        return self.exchange.create_order(
+            trader, offer_type, order_type, instrument_id, Decimal(price), Decimal(quantity))
+
+    def test_resting_orders(self):
+        bid = self.place('maker', BID, '99.5', '1')
+        ask = self.place('maker', ASK, '100.5', '2')
+
+        self.assertEqual(bid.status, OrderStatus.PLACED.value)
+        market_orders = self.exchange.get_market_orders(1)
+        self.assertEqual([order['orderID'] for order in market_orders], [str(bid.order_id), str(ask.order_id)])
+        self.assertEqual(self.exchange.get_market_orders(2), [])
+
+    def test_price_time_priority(self):
+        first = self.place('maker', ASK, '101', '1')
+        second = self.place('maker', ASK, '100', '1')
+        third = self.place('maker', ASK, '100', '1')
+
+        bid = self.place('taker', BID, '101', '2.5')
+
+        # The best price goes first and the older order first within a price, at the price of the resting orders
+        self.assertEqual(second.status, OrderStatus.EXECUTED.value)
+        self.assertEqual(third.status, OrderStatus.EXECUTED.value)
+        self.assertEqual(first.status, OrderStatus.PARTIALLY_EXECUTED.value)
+        self.assertEqual(first.quantity, Decimal('0.5'))
+        self.assertEqual(bid.status, OrderStatus.EXECUTED.value)
+        self.assertEqual([trade[1] for trade in bid.trades], [Decimal(100), Decimal(100), Decimal(101)])
+
+        trades = self.exchange.get_orders('taker', load_executions=True)[0]['trades']
+        self.assertEqual(trades[0]['price'], Decimal(100))
+        self.assertEqual(trades[2]['totalPrice'], Decimal('50.5'))
+        self.assertEqual(trades[2]['offerType'], BID)
+
+    def test_rest_of_limit_order_rests(self):
+        self.place('maker', ASK, '100', '1')
+
+        bid = self.place('taker', BID, '100', '3')
+
+        self.assertEqual(bid.status, OrderStatus.PARTIALLY_EXECUTED.value)
+        self.assertEqual(bid.quantity, Decimal(2))
+        self.assertEqual(self.exchange.get_market_orders(1)[0]['orderID'], str(bid.order_id))
+
+    def test_rest_of_market_order_is_cancelled(self):
+        self.place('maker', BID, '99', '1')
+
+        ask = self.place('taker', ASK, '0', '2', order_type=MARKET)
+
+        self.assertEqual(ask.status, OrderStatus.CANCELLED.value)
+        self.assertEqual(ask.quantity, Decimal(1))
+        self.assertEqual(self.exchange.get_market_orders(1), [])
+
+    def test_invalid_orders(self):
+        with self.assertRaises(ValueError):
+            self.place('taker', BID, '100', '1', instrument_id=3)
+        with self.assertRaises(ValueError):
+            self.place('taker', BID, '0', '1')
+        with self.assertRaises(ValueError):
+            self.place('taker', BID, '100', '0.001')
+        with self.assertRaises(ValueError):
+            self.place('taker', BID, '100', '1', order_type=3)
+
+    def test_cancel_order(self):
+        bid = self.place('maker', BID, '99', '1')
+
+        with self.assertRaises(ValueError):
+            self.exchange.cancel_order('taker', bid.order_id)
+        self.exchange.cancel_order('maker', bid.order_id)
+
+        self.assertEqual(bid.status, OrderStatus.CANCELLED.value)
+        self.assertEqual(self.exchange.get_market_orders(1), [])
+        with self.assertRaises(ValueError):
+            self.exchange.cancel_order('maker', bid.order_id)
+
+    def test_cancel_all_orders(self):
+        self.place('maker', BID, '99', '1')
+        self.place('maker', ASK, '101', '1')
+        other_instrument_bid = self.place('maker', BID, '99', '1', instrument_id=2)
+
+        self.exchange.cancel_all_orders('maker', 1)
+
+        self.assertEqual(self.exchange.get_market_orders(1), [])
+        self.assertTrue(other_instrument_bid.is_open)
+
+    def test_get_orders_filters(self):
+        self.place('maker', BID, '99', '1')
+        ask = self.place('maker', ASK, '101', '1')
+        self.place('maker', BID, '98', '1', instrument_id=2)
+        self.exchange.cancel_order('maker', ask.order_id)
+
+        orders = self.exchange.get_orders('maker')
+        self.assertEqual([order['price'] for order in orders], [Decimal(98), Decimal(101), Decimal(99)])
+        self.assertEqual(len(self.exchange.get_orders('maker', instrument_id=1)), 2)
+        self.assertEqual(len(self.exchange.get_orders('maker', offer_type=BID)), 2)
+        self.assertEqual(len(self.exchange.get_orders('maker', statuses={OrderStatus.CANCELLED.value})), 1)
+        self.assertEqual(len(self.exchange.get_orders('maker', max_count=1)), 1)
+        self.assertEqual(self.exchange.get_orders('taker'), [])
+
+    def test_closed_orders_are_dropped_over_the_limit(self):
+        exchange = MockExchange(closed_order_limit=2)
+        for _ in range(3):
+            order = exchange.create_order('maker', BID, LIMIT, 1, Decimal(99), Decimal(1))
+            exchange.cancel_order('maker', order.order_id)
+
+        self.assertEqual(len(exchange.get_orders('maker')), 2)
+
+    def test_access_tokens(self):
+        now = [0]
+        exchange = MockExchange(api_id='ApiID', traders={'trader': 'password'}, token_lifetime=60)
+        exchange.clock = lambda: now[0]
+
+        with self.assertRaises(ValueError):
+            exchange.login('trader', 'wrong password', 'ApiID')
+        with self.assertRaises(ValueError):
+            exchange.login('trader', 'password', 'OtherApiID')
+        access_token = exchange.login('trader', 'password', 'ApiID')['access_token']
+
+        self.assertEqual(exchange.authenticate(access_token), 'trader')
+        now[0] = 60
+        self.assertIsNone(exchange.authenticate(access_token))
+
+        access_token = exchange.login('trader', 'password', 'ApiID')['access_token']
+        exchange.logout(access_token)
+        self.assertIsNone(exchange.authenticate(access_token))
+
+    def test_seed(self):
+        self.exchange.seed(4)
+
+        prices = [order['price'] for order in self.exchange.get_market_orders(2)]
+        self.assertEqual(prices, [Decimal('99.95'), Decimal('99.90'), Decimal('100.05'), Decimal('100.10')])
+
+
+class TestMockExchangeServer(TestCase):
+    def setUp(self):
+        self.exchange = MockExchange(api_id='MockApiID', traders={'maker': 'password', 'taker': 'password'})
+        self.server = MockExchangeServer(self.exchange).start()
+        self.maker = BlockExTradeApi(self.server.url, 'MockApiID', 'maker', 'password')
+        self.taker = BlockExTradeApi(self.server.url, 'MockApiID', 'taker', 'password')
+
+    def tearDown(self):
+        self.maker.close()
+        self.taker.close()
+        self.server.stop()
+
+    def test_trading(self):
+        self.maker.create_order(OfferType.ASK, OrderType.LIMIT, 1, 100.5, 2)
+        self.taker.create_order(OfferType.BID, OrderType.LIMIT, 1, 101, 1.5)
+
+        market_orders = self.taker.get_market_orders(1)
+        self.assertEqual(len(market_orders), 1)
+        self.assertEqual(market_orders[0]['quantity'], Decimal('0.5'))
+
+        taker_order = self.taker.get_orders(load_executions=True)[0]
+        self.assertEqual(taker_order['status'], OrderStatus.EXECUTED.value)
+        self.assertEqual(taker_order['trades'][0]['price'], '100.5')
+
+        self.maker.cancel_order(market_orders[0]['orderID'])
+        self.assertEqual(self.maker.get_orders(status='40')[0]['status'], OrderStatus.CANCELLED.value)
+
+    def test_cancel_all_orders(self):
+        self.maker.create_order(OfferType.BID, OrderType.LIMIT, 1, 99, 1)
+        self.maker.create_order(OfferType.BID, OrderType.LIMIT, 2, 99, 1)
+
+        self.maker.cancel_all_orders(1)
+
+        self.assertEqual(self.maker.get_market_orders(1), [])
+        self.assertEqual(len(self.maker.get_market_orders(2)), 1)
+
+    def test_instruments(self):
+        self.assertEqual(len(self.maker.get_trader_instruments()), 4)
+        self.assertEqual(self.maker.get_partner_instruments()[0]['minOrderAmount'], Decimal('0.01'))
+
+    def test_errors(self):
+        with self.assertRaises(RequestException) as context:
+            self.maker.create_order(OfferType.BID, OrderType.LIMIT, 1, 99, 0.001)
+        self.assertIn('The quantity is less than the minimum order amount.', str(context.exception))
+
+        with self.assertRaises(RequestException):
+            BlockExTradeApi(self.server.url, 'MockApiID', 'maker', 'wrong password').login()
+
+    def test_expired_access_token_is_renewed(self):
+        self.maker.login()
+        self.exchange.logout(self.maker.access_token)
+
+        self.assertEqual(self.maker.get_orders(), [])
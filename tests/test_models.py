@@ -0,0 +1,137 @@
+from unittest import TestCase
+import decimal
+from requests import Response
+from mock import Mock
+from blockex.instruments import InstrumentCache
+from blockex.models import Instrument
+from blockex.models import Order
+from blockex.models import Trade
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderStatus
+from blockex.tradeapi import OrderType
+
+
+ORDER = {
+    'orderID': '32592',
+    'price': '13.40',
+    'initialQuantity': '32.50',
+    'quantity': '30.50',
+    'dateCreated': '2017-10-09T09:32:24.735659+00:00',
+    'offerType': 2,
+    'type': 1,
+    'status': 50,
+    'instrumentID': 1,
+    'trades': [{
+        'tradeID': '1012',
+        'price': '13.40',
+        'totalPrice': '26.80',
+        'quantity': '2.00',
+        'tradeDate': '2017-10-09T09:40:11.1+00:00',
+        'currencyID': 43,
+        'quoteCurrencyID': 2,
+        'instrumentID': 1,
+        'offerType': 2
+    }]
+}
+
+INSTRUMENTS_LIST = """
+    [{"id": 1,
+    "description": "Bitcoin/Euro",
+    "name": "BTC/EUR",
+    "baseCurrencyID": 43,
+    "quoteCurrencyID": 2,
+    "minOrderAmount": "0.020000000000",
+    "commissionFeePercent": 0.020000000000}]"""
+
+
+# Unit tests
+class TestModels(TestCase):
+    def test_order_from_dict(self):
+        order = Order.from_dict(ORDER)
+
+        self.assertEqual(order.order_id, 32592)
+        self.assertEqual(order.price, decimal.Decimal('13.40'))
+        self.assertEqual(order.initial_quantity, decimal.Decimal('32.50'))
+        self.assertEqual(order.quantity, decimal.Decimal('30.50'))
+        self.assertEqual(order.date_created, '2017-10-09T09:32:24.735659+00:00')
+        self.assertIs(order.offer_type, OfferType.ASK)
+        self.assertIs(order.order_type, OrderType.LIMIT)
+        self.assertIs(order.status, OrderStatus.PARTIALLY_EXECUTED)
+        self.assertEqual(order.instrument_id, 1)
+        self.assertEqual(order.trades, [Trade(
+            '1012',
+            decimal.Decimal('13.40'),
+            decimal.Decimal('26.80'),
+            decimal.Decimal('2.00'),
+            '2017-10-09T09:40:11.1+00:00',
+            43,
+            2,
+            1,
+            OfferType.ASK)])
+        self.assertFalse(hasattr(order, '__dict__'))
+
+    def test_order_from_dict_with_unknown_values(self):
+        order = dict(ORDER, offerType=9, type=9, status=99, trades=None)
+
+        order = Order.from_dict(order)
+
+        self.assertEqual(order.offer_type, 9)
+        self.assertEqual(order.order_type, 9)
+        self.assertEqual(order.status, 99)
+        self.assertIsNone(order.trades)
+
+    def test_equality(self):
+        self.assertEqual(Order.from_dict(ORDER), Order.from_dict(ORDER))
+        self.assertNotEqual(Order.from_dict(ORDER), Order.from_dict(dict(ORDER, quantity='1')))
+        self.assertIn('order_id=32592', repr(Order.from_dict(ORDER)))
+
+
+class TestTradeApiFactories(TestCase):
+    def setUp(self):
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            instrument_factory=Instrument.from_dict)
+        self.trade_api.get_access_token = Mock(return_value={
+            'access_token': 'SomeAccessToken',
+            'expires_in': 86399,
+        })
+
+        response = Response()
+        response.status_code = 200
+        response._content = INSTRUMENTS_LIST.encode()
+        self.trade_api.session.get = Mock(return_value=response)
+
+    def test_client_instrument_factory(self):
+        instruments = self.trade_api.get_trader_instruments()
+
+        self.assertEqual(instruments, [Instrument(
+            1, 'Bitcoin/Euro', 'BTC/EUR', 43, 2, decimal.Decimal('0.02'), 0.02)])
+
+    def test_call_instrument_factory(self):
+        instruments = self.trade_api.get_partner_instruments(instrument_factory=lambda instrument: instrument['id'])
+
+        self.assertEqual(instruments, [1])
+
+    def test_instrument_cache_with_models(self):
+        cache = InstrumentCache(self.trade_api)
+
+        self.assertEqual(cache.get_by_name('BTC/EUR').id, 1)
+        self.assertEqual(cache.get_by_id(1).name, 'BTC/EUR')
+
+    def test_call_order_factory(self):
+        response = Response()
+        response.status_code = 200
+        response._content = '[{"orderID": "31635", "price": "5.00", "initialQuantity": "270.00", "quantity": "0.00",' \
+            '"dateCreated": "2017-05-14T09:19:53.335+00:00", "offerType": 1, "type": 1, "status": 40,' \
+            '"instrumentID": 1, "trades": null}]'.encode()
+        self.trade_api.session.get = Mock(return_value=response)
+
+        orders = self.trade_api.get_market_orders(1, order_factory=Order.from_dict)
+
+        self.assertEqual(orders[0].order_id, 31635)
+        self.assertIs(orders[0].status, OrderStatus.CANCELLED)
+        self.assertIs(orders[0].offer_type, OfferType.BID)
@@ -0,0 +1,109 @@
+from unittest import TestCase
+from decimal import Decimal
+from mock import Mock
+from blockex.models import Order
+from blockex.orderbook import OrderBook
+from blockex.tradeapi import OfferType
+from helpers import make_converted_order
+
+
+SNAPSHOT = [
+    make_converted_order(1, 1, '13.40', '2.00'),
+    make_converted_order(2, 1, '13.40', '1.50'),
+    make_converted_order(3, 1, '13.20', '5.00'),
+    make_converted_order(4, 2, '13.60', '1.00'),
+    make_converted_order(5, 2, '13.90', '4.00'),
+]
+
+
+class TestOrderBook(TestCase):
+    def setUp(self):
+        self.order_book = OrderBook(None, 1)
+
+    def test_empty_book(self):
+        self.assertIsNone(self.order_book.best_bid())
+        self.assertIsNone(self.order_book.best_ask())
+        self.assertIsNone(self.order_book.spread())
+        self.assertEqual(self.order_book.bids(), [])
+
+    def test_apply_first_snapshot(self):
+        diff = self.order_book.apply_snapshot(SNAPSHOT)
+
+        self.assertEqual(diff.added, SNAPSHOT)
+        self.assertEqual(len(self.order_book), 5)
+        self.assertEqual(self.order_book.best_bid(), (Decimal('13.40'), Decimal('3.50')))
+        self.assertEqual(self.order_book.best_ask(), (Decimal('13.60'), Decimal('1.00')))
+        self.assertEqual(self.order_book.spread(), Decimal('0.20'))
+        self.assertEqual(
+            self.order_book.bids(),
+            [(Decimal('13.40'), Decimal('3.50')), (Decimal('13.20'), Decimal('5.00'))])
+        self.assertEqual(self.order_book.asks(depth=1), [(Decimal('13.60'), Decimal('1.00'))])
+        self.assertEqual(self.order_book.depth_at(OfferType.BID, Decimal('13.4')), Decimal('3.50'))
+        self.assertEqual(self.order_book.depth_at(OfferType.ASK, Decimal('13.4')), 0)
+
+    def test_apply_snapshot_as_diff(self):
+        self.order_book.apply_snapshot(SNAPSHOT)
+        changed_order = make_converted_order(2, 1, '13.40', '0.50')
+        added_order = make_converted_order(6, 2, '13.50', '3.00')
+
+        diff = self.order_book.apply_snapshot(
+            [SNAPSHOT[0], changed_order, SNAPSHOT[2], SNAPSHOT[4], added_order])
+
+        self.assertEqual(diff.added, [added_order])
+        self.assertEqual(diff.changed, [changed_order])
+        self.assertEqual(diff.removed, [SNAPSHOT[3]])
+        self.assertEqual(self.order_book.best_bid(), (Decimal('13.40'), Decimal('2.50')))
+        self.assertEqual(self.order_book.best_ask(), (Decimal('13.50'), Decimal('3.00')))
+        self.assertEqual(self.order_book.depth_at(OfferType.ASK, Decimal('13.60')), 0)
+        self.assertIsNone(self.order_book.get_order(4))
+
+    def test_apply_same_snapshot(self):
+        self.order_book.apply_snapshot(SNAPSHOT)
+
+        diff = self.order_book.apply_snapshot(list(SNAPSHOT))
+
+        self.assertTrue(diff.is_empty)
+
+    def test_order_moved_to_another_price(self):
+        self.order_book.apply_snapshot(SNAPSHOT)
+
+        self.order_book.apply_snapshot(SNAPSHOT[:2] + [make_converted_order(3, 1, '13.50', '5.00')] + SNAPSHOT[3:])
+
+        self.assertEqual(self.order_book.best_bid(), (Decimal('13.50'), Decimal('5.00')))
+        self.assertEqual(self.order_book.depth_at(OfferType.BID, Decimal('13.20')), 0)
+
+    def test_apply_snapshot_of_order_models(self):
+        diff = self.order_book.apply_snapshot([Order.from_dict(order) for order in SNAPSHOT])
+
+        self.assertEqual(len(diff.added), 5)
+        self.assertEqual(self.order_book.best_bid(), (Decimal('13.40'), Decimal('3.50')))
+
+    def test_unknown_offer_type(self):
+        with self.assertRaises(ValueError):
+            self.order_book.apply_snapshot([make_converted_order(1, 3, '13.40', '2.00')])
+
+    def test_orders_no_longer_open_are_left_out(self):
+        self.order_book.apply_snapshot(SNAPSHOT)
+        filled_order = make_converted_order(1, 1, '13.40', '0.00', status=60)
+        cancelled_order = make_converted_order(6, 2, '13.70', '3.00', status=40)
+        partially_filled_order = make_converted_order(7, 2, '13.80', '1.00', status=50)
+
+        diff = self.order_book.apply_snapshot(SNAPSHOT[1:] + [filled_order, cancelled_order, partially_filled_order])
+
+        self.assertEqual(diff.removed, [SNAPSHOT[0]])
+        self.assertEqual(diff.added, [partially_filled_order])
+        self.assertIsNone(self.order_book.get_order(1))
+        self.assertEqual(self.order_book.best_bid(), (Decimal('13.40'), Decimal('1.50')))
+        self.assertEqual(
+            self.order_book.asks(depth=2),
+            [(Decimal('13.60'), Decimal('1.00')), (Decimal('13.80'), Decimal('1.00'))])
+
+    def test_refresh(self):
+        trade_api = Mock()
+        trade_api.get_market_orders = Mock(return_value=SNAPSHOT)
+        order_book = OrderBook(trade_api, 1, max_count=500)
+
+        diff = order_book.refresh()
+
+        trade_api.get_market_orders.assert_called_once_with(1, status='20,50', max_count=500)
+        self.assertEqual(len(diff.added), 5)
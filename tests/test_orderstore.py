@@ -0,0 +1,108 @@
+from unittest import TestCase
+from decimal import Decimal
+import threading
+from mock import Mock
+from blockex.models import Order
+from blockex.orderstore import OrderStore
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderStatus
+from helpers import make_order
+
+
+class TestOrderStore(TestCase):
+    def setUp(self):
+        self.trade_api = Mock()
+        self.trade_api.order_factory = None
+        self.open_orders = [
+            make_order(1, status=20),
+            make_order(2, status=20, instrument_id=2),
+            make_order(3, status=50, quantity='10.00', offer_type=2),
+        ]
+        self.closed_orders = []
+        self.trade_api.iter_all_orders = Mock(side_effect=lambda **kwargs: iter(
+            [kwargs['order_factory'](dict(order)) for order in self.open_orders]))
+        self.trade_api.get_orders = Mock(side_effect=lambda **kwargs: [
+            kwargs['order_factory'](dict(order)) for order in self.closed_orders])
+        self.order_store = OrderStore(self.trade_api)
+        self.listener = Mock()
+        self.order_store.add_listener(self.listener)
+
+    def test_first_sync(self):
+        events = self.order_store.sync()
+
+        self.trade_api.iter_all_orders.assert_called_once()
+        self.assertEqual(self.trade_api.iter_all_orders.call_args[1]['status'], '10,20,50')
+        self.trade_api.get_orders.assert_not_called()
+        self.assertEqual(
+            [event.status for event in events],
+            [OrderStatus.PLACED, OrderStatus.PLACED, OrderStatus.PARTIALLY_EXECUTED])
+        self.assertEqual(self.listener.call_count, 3)
+        self.assertEqual(len(self.order_store), 3)
+        self.assertEqual(self.order_store.get_order(1)['quantity'], Decimal('32.50'))
+
+    def test_lookups(self):
+        self.order_store.sync()
+
+        self.assertEqual(len(self.order_store.get_orders()), 3)
+        self.assertEqual(
+            [order['orderID'] for order in self.order_store.get_orders(instrument_id=1)], [1, 3])
+        self.assertEqual(
+            [order['orderID'] for order in self.order_store.get_orders(instrument_id=1, status=OrderStatus.PLACED)],
+            [1])
+        self.assertEqual(
+            [order['orderID'] for order in self.order_store.get_orders(offer_type=OfferType.ASK)], [3])
+        self.assertEqual(self.order_store.get_orders(instrument_id=3), [])
+        self.assertIsNone(self.order_store.get_order(4))
+
+    def test_unchanged_orders_are_not_converted_again(self):
+        self.order_store.sync()
+        order = self.order_store.get_order(1)
+
+        events = self.order_store.sync()
+
+        self.assertEqual(events, [])
+        self.assertIs(self.order_store.get_order(1), order)
+
+    def test_changed_and_closed_orders(self):
+        self.order_store.sync()
+        self.listener.reset_mock()
+        self.open_orders = [make_order(2, status=50, quantity='5.00', instrument_id=2), make_order(4, status=10)]
+        self.closed_orders = [make_order(1, status=60, quantity='0.00'), make_order(5, status=40)]
+
+        events = self.order_store.sync()
+
+        self.trade_api.get_orders.assert_called_once()
+        self.assertEqual(self.trade_api.get_orders.call_args[1]['status'], '15,30,40,60')
+        self.assertEqual(self.trade_api.get_orders.call_args[1]['max_count'], 100)
+        self.assertEqual(
+            [(event.status, event.order['orderID']) for event in events],
+            [(OrderStatus.PARTIALLY_EXECUTED, 2), (OrderStatus.PENDING, 4), (OrderStatus.EXECUTED, 1), (None, 3)])
+        self.assertEqual(events[0].previous_order['quantity'], Decimal('32.50'))
+        self.assertEqual(self.listener.call_count, 4)
+        self.assertEqual(sorted(order['orderID'] for order in self.order_store.get_orders()), [2, 4])
+        self.assertEqual(self.order_store.get_orders(status=OrderStatus.PLACED), [])
+
+    def test_order_factory(self):
+        self.trade_api.order_factory = Order.from_dict
+
+        self.order_store.sync()
+
+        self.assertEqual(self.order_store.get_order(3).status, OrderStatus.PARTIALLY_EXECUTED)
+
+    def test_failing_listener_does_not_stop_the_others(self):
+        other_listener = Mock()
+        self.listener.side_effect = Exception('Listener failed')
+        self.order_store.add_listener(other_listener)
+
+        self.order_store.sync()
+
+        self.assertEqual(other_listener.call_count, 3)
+
+    def test_background_sync(self):
+        synced = threading.Event()
+        self.listener.side_effect = lambda event: synced.set()
+
+        with OrderStore(self.trade_api, interval=0.01, background_sync=True) as order_store:
+            order_store.add_listener(self.listener)
+            self.open_orders = [make_order(1, status=50, quantity='1.00')]
+            self.assertTrue(synced.wait(1))
@@ -0,0 +1,134 @@
+from unittest import TestCase
+import json
+import threading
+from requests import RequestException
+from six.moves.urllib.parse import urlencode
+from mock import Mock
+from blockex.models import Order
+from blockex.pagination import iter_pages
+from blockex.tradeapi import BlockExTradeApi
+from helpers import make_order
+
+
+def create_get_page(items):
+    """Creates a mock returning the first max_count of the items like the order lists of the API."""
+    return Mock(side_effect=lambda count: items[:count])
+
+
+def get_key(item):
+    return item
+
+
+class TestIterPages(TestCase):
+    def test_pages_of_a_list_with_a_partial_last_page(self):
+        get_page = create_get_page(list(range(10)))
+
+        pages = list(iter_pages(get_page, get_key, page_size=2, prefetch=False))
+
+        self.assertEqual(pages, [[0, 1], [2, 3], [4, 5, 6, 7], [8, 9]])
+        self.assertEqual([call[0][0] for call in get_page.call_args_list], [2, 4, 8, 16])
+
+    def test_pages_of_a_list_ending_on_a_full_page(self):
+        get_page = create_get_page(list(range(4)))
+
+        pages = list(iter_pages(get_page, get_key, page_size=2))
+
+        self.assertEqual(pages, [[0, 1], [2, 3]])
+        self.assertEqual(get_page.call_count, 3)
+
+    def test_pages_of_an_empty_list(self):
+        get_page = create_get_page([])
+
+        self.assertEqual(list(iter_pages(get_page, get_key)), [])
+        get_page.assert_called_once_with(100)
+
+    def test_pages_with_max_count(self):
+        get_page = create_get_page(list(range(10)))
+
+        pages = list(iter_pages(get_page, get_key, page_size=2, max_count=5, prefetch=False))
+
+        self.assertEqual(pages, [[0, 1], [2, 3], [4]])
+        self.assertEqual([call[0][0] for call in get_page.call_args_list], [2, 4, 5])
+
+    def test_items_returned_again_are_skipped(self):
+        # A new item listed first shifts the others, so the second response repeats them
+        get_page = Mock(side_effect=[[1, 2], [0, 1, 2]])
+
+        pages = list(iter_pages(get_page, get_key, page_size=2, prefetch=False))
+
+        self.assertEqual(pages, [[1, 2], [0]])
+
+    def test_next_page_is_prefetched(self):
+        requested = threading.Event()
+
+        def get_page(count):
+            if count == 4:
+                requested.set()
+            return list(range(10))[:count]
+
+        pages = iter_pages(get_page, get_key, page_size=2)
+
+        self.assertEqual(next(pages), [0, 1])
+        self.assertTrue(requested.wait(1))
+        pages.close()
+
+    def test_failed_page(self):
+        get_page = Mock(side_effect=[[0, 1], RequestException('Failed to get the orders.')])
+        pages = iter_pages(get_page, get_key, page_size=2)
+
+        self.assertEqual(next(pages), [0, 1])
+        with self.assertRaises(RequestException):
+            next(pages)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            iter_pages(Mock(), get_key, page_size=0)
+        with self.assertRaises(ValueError):
+            iter_pages(Mock(), get_key, growth=1)
+        with self.assertRaises(ValueError):
+            iter_pages(Mock(), get_key, max_count=0)
+
+
+class TestTradeApiIterAllOrders(TestCase):
+    def setUp(self):
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword')
+        self.trade_api.get_access_token = Mock(return_value={
+            'access_token': 'SomeAccessToken',
+            'expires_in': 86399,
+        })
+        self.orders = [make_order(32592 + index) for index in range(5)]
+
+        def get(url, **kwargs):
+            max_count = int(url.rsplit('maxCount=', 1)[1].split('&')[0])
+            response = Mock()
+            response.status_code = 200
+            response.content = json.dumps(self.orders[:max_count]).encode()
+            return response
+
+        self.trade_api.session.get = Mock(side_effect=get)
+
+    def test_iter_all_orders(self):
+        orders = list(self.trade_api.iter_all_orders(status='20', page_size=2))
+
+        self.assertEqual([order['orderID'] for order in orders], [32592, 32593, 32594, 32595, 32596])
+        self.assertEqual(self.trade_api.session.get.call_count, 3)
+        self.trade_api.session.get.assert_any_call(
+            'https://test.api.url/api/orders/get?' + urlencode({'status': '20', 'maxCount': 8}),
+            headers={'Authorization': 'Bearer SomeAccessToken'})
+
+    def test_iter_all_market_orders_with_order_factory(self):
+        orders = list(self.trade_api.iter_all_market_orders(
+            1, max_count=3, page_size=2, order_factory=Order.from_dict))
+
+        self.assertEqual([order.order_id for order in orders], [32592, 32593, 32594])
+        self.trade_api.session.get.assert_called_with(
+            'https://test.api.url/api/orders/getMarketOrders?' +
+            urlencode({'apiID': 'CorrectApiID', 'instrumentID': 1, 'maxCount': 3}))
+
+    def test_iter_all_orders_with_invalid_filter(self):
+        with self.assertRaises(ValueError):
+            self.trade_api.iter_all_orders(order_type='Limit')
@@ -0,0 +1,163 @@
+from unittest import TestCase
+import threading
+from requests import RequestException
+from mock import Mock
+from blockex.poller import MarketDataPoller
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import CacheValidator
+from helpers import create_response
+from helpers import make_converted_order
+
+
+ORDERS_LIST = """
+    [{"orderID": "32592",
+    "price": "13.40",
+    "initialQuantity": "32.50",
+    "quantity": "32.50",
+    "dateCreated": "2017-10-09T09:32:24.735659+00:00",
+    "offerType": 1,
+    "type": 1,
+    "status": 20,
+    "instrumentID": 1,
+    "trades": null}]"""
+
+
+class TestTradeApiGetMarketOrdersIfChanged(TestCase):
+    def setUp(self):
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword')
+
+    def test_first_request(self):
+        self.trade_api.session.get = Mock(return_value=create_response(
+            200,
+            ORDERS_LIST.encode(),
+            headers={'ETag': '"1"', 'Last-Modified': 'Mon, 09 Oct 2017 09:32:24 GMT'}))
+
+        orders, validator = self.trade_api.get_market_orders_if_changed(1)
+
+        self.trade_api.session.get.assert_called_once_with(
+            'https://test.api.url/api/orders/getMarketOrders?apiID=CorrectApiID&instrumentID=1',
+            headers={})
+        self.assertEqual(orders[0]['orderID'], 32592)
+        self.assertEqual(validator.etag, '"1"')
+        self.assertEqual(
+            validator.get_headers(),
+            {'If-None-Match': '"1"', 'If-Modified-Since': 'Mon, 09 Oct 2017 09:32:24 GMT'})
+
+    def test_not_modified_response(self):
+        validator = CacheValidator(etag='"1"')
+        self.trade_api.session.get = Mock(return_value=create_response(304))
+
+        orders, new_validator = self.trade_api.get_market_orders_if_changed(1, validator=validator)
+
+        self.trade_api.session.get.assert_called_once_with(
+            'https://test.api.url/api/orders/getMarketOrders?apiID=CorrectApiID&instrumentID=1',
+            headers={'If-None-Match': '"1"'})
+        self.assertIsNone(orders)
+        self.assertIs(new_validator, validator)
+
+    def test_unchanged_body_without_caching_headers(self):
+        self.trade_api.session.get = Mock(return_value=create_response(200, ORDERS_LIST.encode()))
+        self.trade_api.json_decoder = Mock(wraps=self.trade_api.json_decoder)
+        _, validator = self.trade_api.get_market_orders_if_changed(1)
+
+        orders, _ = self.trade_api.get_market_orders_if_changed(1, validator=validator)
+
+        self.assertIsNone(orders)
+        self.trade_api.json_decoder.decode.assert_called_once_with(ORDERS_LIST.encode())
+
+    def test_unsuccessful_request(self):
+        response = create_response(400)
+        response.json = Mock(return_value={'message': 'Unknown instrument'})
+        self.trade_api.session.get = Mock(return_value=response)
+
+        with self.assertRaises(RequestException):
+            self.trade_api.get_market_orders_if_changed(1)
+
+
+class TestMarketDataPoller(TestCase):
+    def setUp(self):
+        self.trade_api = Mock()
+        self.poller = MarketDataPoller(self.trade_api, min_interval=0.01, max_interval=0.08)
+        self.callback = Mock()
+        self.poller.subscribe(1, self.callback)
+
+    def tearDown(self):
+        self.poller.close()
+
+    def test_changed_orders_notify_the_subscribers(self):
+        self.trade_api.get_market_orders_if_changed = Mock(return_value=([make_converted_order()], CacheValidator()))
+
+        diff = self.poller.poll(1)
+
+        self.callback.assert_called_once_with(self.poller.get_order_book(1), diff)
+        self.assertEqual(len(diff.added), 1)
+        self.assertEqual(self.poller.get_interval(1), 0.01)
+
+    def test_unchanged_orders_slow_down_the_polling(self):
+        validator = CacheValidator(etag='"1"')
+        self.trade_api.get_market_orders_if_changed = Mock(side_effect=[
+            ([make_converted_order()], validator),
+            (None, validator),
+            ([make_converted_order()], validator),
+        ])
+
+        self.poller.poll(1)
+        self.assertIsNone(self.poller.poll(1))
+        self.assertIsNone(self.poller.poll(1))
+
+        self.callback.assert_called_once()
+        self.trade_api.get_market_orders_if_changed.assert_called_with(
+            1, status='20,50', max_count=None, validator=validator)
+        self.assertAlmostEqual(self.poller.get_interval(1), 0.0225)
+
+    def test_interval_limits(self):
+        self.trade_api.get_market_orders_if_changed = Mock(return_value=(None, None))
+        for _ in range(10):
+            self.poller.poll(1)
+        self.assertEqual(self.poller.get_interval(1), 0.08)
+
+        self.trade_api.get_market_orders_if_changed = Mock(side_effect=[
+            ([make_converted_order(quantity=quantity)], None) for quantity in range(1, 11)])
+        for _ in range(10):
+            self.poller.poll(1)
+        self.assertEqual(self.poller.get_interval(1), 0.01)
+
+    def test_failing_callback_does_not_stop_the_others(self):
+        other_callback = Mock()
+        self.callback.side_effect = Exception('Callback failed')
+        self.poller.subscribe(1, other_callback)
+        self.trade_api.get_market_orders_if_changed = Mock(return_value=([make_converted_order()], None))
+
+        self.poller.poll(1)
+
+        other_callback.assert_called_once()
+
+    def test_background_polling(self):
+        changed = threading.Event()
+        self.trade_api.get_market_orders_if_changed = Mock(side_effect=lambda *args, **kwargs: (
+            [make_converted_order(quantity=self.trade_api.get_market_orders_if_changed.call_count)], None))
+        self.poller.subscribe(2, lambda order_book, diff: changed.set() if diff.changed else None)
+
+        self.poller.start()
+
+        self.assertTrue(changed.wait(1))
+        self.poller.unsubscribe(2)
+        self.assertIsNone(self.poller.get_order_book(2))
+
+    def test_unsubscribe_a_callback(self):
+        other_callback = Mock()
+        self.poller.subscribe(1, other_callback)
+
+        self.poller.unsubscribe(1, self.callback)
+        self.assertIsNotNone(self.poller.get_order_book(1))
+
+        self.poller.unsubscribe(1, other_callback)
+        self.assertIsNone(self.poller.get_order_book(1))
+
+    def test_invalid_intervals(self):
+        with self.assertRaises(ValueError):
+            MarketDataPoller(self.trade_api, min_interval=1, max_interval=0.5)
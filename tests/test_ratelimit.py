@@ -0,0 +1,144 @@
+from unittest import TestCase
+import threading
+import time
+from mock import Mock
+from mock import patch
+from blockex.ratelimit import HIGH_PRIORITY
+from blockex.ratelimit import LOW_PRIORITY
+from blockex.ratelimit import RateLimiter
+from blockex.ratelimit import TokenBucket
+from blockex.tradeapi import BlockExTradeApi
+
+
+def start_thread(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+class TestTokenBucket(TestCase):
+    def test_refill(self):
+        bucket = TokenBucket(10, 5)
+        bucket.tokens = 0
+
+        bucket.refill(time.time() + 1e6)
+
+        self.assertEqual(bucket.tokens, 5)
+
+    def test_wait_time(self):
+        bucket = TokenBucket(10)
+        self.assertEqual(bucket.get_wait_time(), 0)
+
+        bucket.tokens = 0.5
+        self.assertAlmostEqual(bucket.get_wait_time(), 0.05)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+        with self.assertRaises(ValueError):
+            TokenBucket(1, 0.5)
+
+
+class TestRateLimiter(TestCase):
+    def test_unlimited_requests(self):
+        rate_limiter = RateLimiter()
+
+        self.assertEqual(rate_limiter.acquire('get_orders'), 0)
+
+    def test_burst_then_throttled(self):
+        rate_limiter = RateLimiter(rate=50, burst=2)
+
+        self.assertEqual(rate_limiter.acquire('get_orders'), 0)
+        self.assertEqual(rate_limiter.acquire('get_orders'), 0)
+        throttled_time = rate_limiter.acquire('get_orders')
+
+        self.assertGreater(throttled_time, 0.01)
+        self.assertEqual(rate_limiter.get_throttled_count(), 1)
+        self.assertEqual(rate_limiter.get_throttled_time('get_orders'), throttled_time)
+        self.assertEqual(rate_limiter.get_throttled_time('create_order'), 0)
+
+    def test_endpoint_limit(self):
+        rate_limiter = RateLimiter(endpoint_limits={'get_market_orders': (50, 1)})
+
+        rate_limiter.acquire('get_market_orders')
+        self.assertEqual(rate_limiter.acquire('cancel_order'), 0)
+        self.assertGreater(rate_limiter.acquire('get_market_orders'), 0)
+
+    def test_high_priority_requests_go_first(self):
+        rate_limiter = RateLimiter(rate=20, burst=1)
+        rate_limiter.acquire('get_market_orders')
+        served = []
+
+        def acquire(endpoint):
+            rate_limiter.acquire(endpoint)
+            served.append(endpoint)
+
+        threads = [start_thread(acquire, 'get_market_orders') for _ in range(3)]
+        time.sleep(0.01)
+        threads.append(start_thread(acquire, 'cancel_order'))
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(served[0], 'cancel_order')
+
+    def test_request_held_back_by_its_endpoint_does_not_hold_back_others(self):
+        rate_limiter = RateLimiter(rate=1000, endpoint_limits={'cancel_order': (1, 1)})
+        rate_limiter.acquire('cancel_order')
+        thread = start_thread(rate_limiter.acquire, 'cancel_order')
+        time.sleep(0.01)
+
+        throttled_time = rate_limiter.acquire('get_market_orders', LOW_PRIORITY)
+
+        self.assertLess(throttled_time, 0.5)
+        self.assertTrue(thread.is_alive())
+
+    def test_request_behind_a_waiter_is_not_throttled_when_the_tokens_suffice(self):
+        clock = [1000.0]
+        with patch('blockex.ratelimit.monotonic', side_effect=lambda: clock[0]):
+            rate_limiter = RateLimiter(rate=10, burst=2)
+            rate_limiter.acquire('get_orders')
+            rate_limiter.acquire('get_orders')
+            # Waits for 0.1 seconds of the real time for a token
+            thread = start_thread(rate_limiter.acquire, 'cancel_order')
+            time.sleep(0.02)
+            clock[0] += 0.2
+
+            # Both the waiter ahead and this request get a token
+            self.assertEqual(rate_limiter.acquire('get_market_orders', LOW_PRIORITY), 0)
+            thread.join()
+
+        self.assertEqual(rate_limiter.get_throttled_count('get_market_orders'), 0)
+        self.assertEqual(rate_limiter.get_throttled_count('cancel_order'), 1)
+
+    def test_explicit_priority(self):
+        rate_limiter = RateLimiter(rate=10, priorities={})
+
+        self.assertEqual(rate_limiter.acquire('get_market_orders', HIGH_PRIORITY), 0)
+
+
+class TestTradeApiRateLimiter(TestCase):
+    def setUp(self):
+        self.rate_limiter = Mock()
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            rate_limiter=self.rate_limiter)
+        response = Mock()
+        response.status_code = 200
+        response.content = b'[]'
+        response.json = Mock(return_value={'access_token': 'SomeAccessToken', 'expires_in': 86399})
+        self.trade_api.session.get = Mock(return_value=response)
+        self.trade_api.session.post = Mock(return_value=response)
+
+    def test_every_request_is_limited_by_endpoint(self):
+        self.trade_api.get_market_orders(1)
+        self.trade_api.cancel_order(32598)
+        self.trade_api.cancel_all_orders(1)
+        self.trade_api.get_partner_instruments()
+
+        self.assertEqual(
+            [call[0][0] for call in self.rate_limiter.acquire.call_args_list],
+            ['get_market_orders', 'login', 'cancel_order', 'cancel_all_orders', 'get_partner_instruments'])
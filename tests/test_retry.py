@@ -0,0 +1,227 @@
+from unittest import TestCase
+import threading
+from requests import RequestException
+from requests.exceptions import ConnectionError
+from requests.exceptions import ConnectTimeout
+from mock import Mock
+from mock import patch
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from blockex.retry import CircuitBreaker
+from blockex.retry import CircuitOpenError
+from blockex.retry import RetryPolicy
+from blockex.retry import CLOSED
+from blockex.retry import HALF_OPEN
+from blockex.retry import OPEN
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderType
+from helpers import create_response
+from helpers import get_server_url
+from helpers import start_server
+from helpers import stop_server
+
+
+class UnavailableOnceRequestHandler(BaseHTTPRequestHandler):
+    """Answers the first request with 503 and the next ones with an empty list over keep-alive connections"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.server.request_count == 0:
+            status, body = 503, b'{"message": "Service unavailable"}'
+        else:
+            status, body = 200, b'[]'
+        self.server.request_count += 1
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestRetryPolicy(TestCase):
+    def setUp(self):
+        self.retry_policy = RetryPolicy(max_attempts=3, failure_threshold=None)
+        self.retry_policy.sleep = Mock()
+
+    def test_successful_request(self):
+        response = create_response(200)
+        send_request = Mock(return_value=response)
+
+        self.assertIs(self.retry_policy.call('get_orders', send_request), response)
+        send_request.assert_called_once_with()
+        self.retry_policy.sleep.assert_not_called()
+
+    def test_transient_error_response_is_retried(self):
+        response = create_response(200)
+        send_request = Mock(side_effect=[create_response(503), response])
+
+        self.assertIs(self.retry_policy.call('get_orders', send_request), response)
+        self.assertEqual(send_request.call_count, 2)
+
+    def test_delays_have_jitter_and_grow(self):
+        send_request = Mock(side_effect=ConnectionError('Connection reset'))
+
+        with patch('blockex.retry.random.uniform', side_effect=lambda low, high: high) as uniform:
+            with self.assertRaises(ConnectionError):
+                self.retry_policy.call('get_market_orders', send_request)
+
+        self.assertEqual(send_request.call_count, 3)
+        self.assertEqual([call[0] for call in uniform.call_args_list], [(0, 0.1), (0, 0.2)])
+        self.assertEqual([call[0][0] for call in self.retry_policy.sleep.call_args_list], [0.1, 0.2])
+
+    def test_last_error_response_is_returned(self):
+        send_request = Mock(return_value=create_response(500))
+
+        response = self.retry_policy.call('get_orders', send_request)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(send_request.call_count, 3)
+
+    def test_client_error_response_is_not_retried(self):
+        send_request = Mock(return_value=create_response(400))
+
+        self.retry_policy.call('get_orders', send_request)
+
+        send_request.assert_called_once_with()
+
+    def test_retry_after_is_honoured(self):
+        send_request = Mock(side_effect=[create_response(429, headers={'Retry-After': '1.5'}), create_response(200)])
+
+        self.retry_policy.call('get_orders', send_request)
+
+        self.retry_policy.sleep.assert_called_once_with(1.5)
+
+    def test_no_retry_after_deadline(self):
+        self.retry_policy.deadline = 1
+        send_request = Mock(return_value=create_response(429, headers={'Retry-After': '2'}))
+
+        self.retry_policy.call('get_orders', send_request)
+
+        send_request.assert_called_once_with()
+
+    def test_create_order_is_retried_only_when_not_processed(self):
+        send_request = Mock(side_effect=[
+            ConnectTimeout('Connect timed out'),
+            create_response(429),
+            create_response(200)])
+        self.assertEqual(self.retry_policy.call('create_order', send_request).status_code, 200)
+
+        send_request = Mock(return_value=create_response(503))
+        self.assertEqual(self.retry_policy.call('create_order', send_request).status_code, 503)
+        send_request.assert_called_once_with()
+
+        send_request = Mock(side_effect=ConnectionError('Connection reset'))
+        with self.assertRaises(ConnectionError):
+            self.retry_policy.call('create_order', send_request)
+        send_request.assert_called_once_with()
+
+    def test_invalid_max_attempts(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+
+class TestCircuitBreaker(TestCase):
+    def test_opens_after_consecutive_failures(self):
+        retry_policy = RetryPolicy(max_attempts=1, failure_threshold=2, reset_timeout=60)
+        send_request = Mock(return_value=create_response(502))
+
+        retry_policy.call('get_orders', send_request)
+        retry_policy.call('get_orders', send_request)
+
+        with self.assertRaises(CircuitOpenError):
+            retry_policy.call('get_orders', send_request)
+        self.assertEqual(send_request.call_count, 2)
+        self.assertEqual(retry_policy.get_circuit_breaker('get_orders').state, OPEN)
+        self.assertEqual(retry_policy.get_circuit_breaker('cancel_order').state, CLOSED)
+
+    def test_trial_request_after_reset_timeout(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        circuit_breaker.record_failure()
+
+        circuit_breaker.before_request('get_orders')
+        self.assertEqual(circuit_breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            circuit_breaker.before_request('get_orders')
+
+        circuit_breaker.record_success()
+        self.assertEqual(circuit_breaker.state, CLOSED)
+
+    def test_failed_trial_request_opens_again(self):
+        circuit_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0)
+        for _ in range(3):
+            circuit_breaker.record_failure()
+        circuit_breaker.before_request('get_orders')
+
+        circuit_breaker.record_failure()
+
+        self.assertEqual(circuit_breaker.state, OPEN)
+
+    def test_trial_request_raising_an_unexpected_error(self):
+        retry_policy = RetryPolicy(max_attempts=1, failure_threshold=1, reset_timeout=0)
+        retry_policy.call('get_orders', Mock(return_value=create_response(502)))
+
+        with self.assertRaises(ValueError):
+            retry_policy.call('get_orders', Mock(side_effect=ValueError('Invalid JSON')))
+        self.assertEqual(retry_policy.get_circuit_breaker('get_orders').state, OPEN)
+
+        # The next trial request is let through after the reset timeout
+        self.assertEqual(retry_policy.call('get_orders', Mock(return_value=create_response(200))).status_code, 200)
+        self.assertEqual(retry_policy.get_circuit_breaker('get_orders').state, CLOSED)
+
+
+class TestTradeApiRetryPolicy(TestCase):
+    def setUp(self):
+        retry_policy = RetryPolicy()
+        retry_policy.sleep = Mock()
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            retry_policy=retry_policy)
+        self.trade_api.get_access_token = Mock(return_value={
+            'access_token': 'SomeAccessToken',
+            'expires_in': 86399,
+        })
+
+    def test_get_market_orders_is_retried(self):
+        self.trade_api.session.get = Mock(side_effect=[ConnectionError('Connection reset'), create_response(200)])
+
+        self.assertEqual(self.trade_api.get_market_orders(1), [])
+        self.assertEqual(self.trade_api.session.get.call_count, 2)
+
+    def test_create_order_is_not_retried_after_a_server_error(self):
+        self.trade_api.session.post = Mock(return_value=create_response(500))
+
+        with self.assertRaises(RequestException):
+            self.trade_api.create_order(OfferType.BID, OrderType.LIMIT, 1, 15.2, 3.7)
+        self.trade_api.session.post.assert_called_once()
+
+    def test_retried_stream_releases_its_connection(self):
+        server = start_server(UnavailableOnceRequestHandler)
+        # With a blocking pool of one connection the retry waits forever for a connection that is not released
+        trade_api = BlockExTradeApi(
+            get_server_url(server),
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            pool_maxsize=1,
+            pool_block=True,
+            retry_policy=self.trade_api.retry_policy)
+        trade_api.get_access_token = self.trade_api.get_access_token
+        market_orders = []
+        client_thread = threading.Thread(target=lambda: market_orders.extend(trade_api.iter_market_orders(1)))
+        client_thread.daemon = True
+        try:
+            client_thread.start()
+            client_thread.join(5)
+
+            self.assertFalse(client_thread.is_alive())
+            self.assertEqual(server.request_count, 2)
+            self.assertEqual(market_orders, [])
+        finally:
+            trade_api.close()
+            stop_server(server)
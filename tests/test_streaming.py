@@ -0,0 +1,187 @@
+from unittest import TestCase
+import decimal
+import io
+import json
+import threading
+from requests import RequestException
+from requests import Response
+from mock import Mock
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from blockex.models import Order
+from blockex.streaming import iter_json_array
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import convert_order_number_fields
+from helpers import get_server_url
+from helpers import start_server
+from helpers import stop_server
+
+
+ORDERS_LIST = """
+    [{"orderID": "32592",
+    "price": "13.40",
+    "initialQuantity": "32.50",
+    "quantity": "32.50",
+    "dateCreated": "2017-10-09T09:32:24.735659+00:00",
+    "offerType": 1,
+    "type": 1,
+    "status": 15,
+    "instrumentID": 1,
+    "trades": null},
+    {"orderID": "32593",
+    "price": "11.34",
+    "initialQuantity": "26.00",
+    "quantity": "26.00",
+    "dateCreated": "2017-10-09T09:35:10.61228+00:00",
+    "offerType": 1,
+    "type": 1,
+    "status": 20,
+    "instrumentID": 1,
+    "trades": null}]"""
+
+
+def split(content, size):
+    return [content[index:index + size] for index in range(0, len(content), size)]
+
+
+class OrdersRequestHandler(BaseHTTPRequestHandler):
+    """Answers every request with the orders list over keep-alive connections"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.request_count += 1
+        body = ORDERS_LIST.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Unit tests
+class TestIterJsonArray(TestCase):
+    def test_objects_in_single_byte_chunks(self):
+        content = ORDERS_LIST.encode()
+
+        self.assertEqual(list(iter_json_array(split(content, 1))), json.loads(ORDERS_LIST))
+
+    def test_scalars_split_between_chunks(self):
+        content = '[123, "Bitcoin/€", 4.5, true, null]'.encode('utf-8')
+
+        for size in (1, 2, 3, 7, len(content)):
+            self.assertEqual(list(iter_json_array(split(content, size))), [123, 'Bitcoin/€', 4.5, True, None])
+
+    def test_elements_are_yielded_before_the_end(self):
+        elements = iter_json_array(iter([b'[{"id": 1},', b' {"id"']))
+
+        self.assertEqual(next(elements), {'id': 1})
+        with self.assertRaises(ValueError):
+            next(elements)
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array([b' [ ', b'] '])), [])
+
+    def test_decimal_numbers(self):
+        elements = list(iter_json_array([b'[0.1234567890123456789]'], parse_float=decimal.Decimal))
+
+        self.assertEqual(elements, [decimal.Decimal('0.1234567890123456789')])
+
+    def test_invalid_content(self):
+        for content in (b'{"id": 1}', b'[1 2]', b'[1] 2', b'[1, 2'):
+            with self.assertRaises(ValueError):
+                list(iter_json_array([content]))
+
+
+class TestTradeApiIterOrders(TestCase):
+    def setUp(self):
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword')
+        self.trade_api.get_access_token = Mock(return_value={
+            'access_token': 'SomeAccessToken',
+            'expires_in': 86399,
+        })
+
+        response = Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(ORDERS_LIST.encode())
+        self.get_mock = Mock(return_value=response)
+        self.trade_api.session.get = self.get_mock
+
+    def test_iter_orders(self):
+        orders = list(self.trade_api.iter_orders(max_count=1000, chunk_size=16))
+
+        self.get_mock.assert_called_once_with(
+            'https://test.api.url/api/orders/get?maxCount=1000',
+            headers={'Authorization': 'Bearer SomeAccessToken'},
+            stream=True)
+        expected_orders = json.loads(ORDERS_LIST)
+        for order in expected_orders:
+            convert_order_number_fields(order)
+        self.assertEqual(orders, expected_orders)
+
+    def test_iter_market_orders_with_order_factory(self):
+        orders = list(self.trade_api.iter_market_orders(1, order_factory=Order.from_dict))
+
+        self.get_mock.assert_called_once_with(
+            'https://test.api.url/api/orders/getMarketOrders?apiID=CorrectApiID&instrumentID=1',
+            stream=True)
+        self.assertEqual([order.order_id for order in orders], [32592, 32593])
+
+    def test_unsuccessful_iter_market_orders(self):
+        response = Response()
+        response.status_code = 400
+        response._content = '{"message": "Invalid partner API id"}'.encode()
+        self.trade_api.session.get = Mock(return_value=response)
+
+        orders = self.trade_api.iter_market_orders(1)
+        with self.assertRaises(RequestException):
+            next(orders)
+
+    def test_request_is_sent_on_first_iteration(self):
+        orders = self.trade_api.iter_orders()
+        self.get_mock.assert_not_called()
+
+        next(orders)
+        self.get_mock.assert_called_once()
+
+
+class TestTradeApiIterOrdersConnection(TestCase):
+    def setUp(self):
+        self.server = start_server(OrdersRequestHandler)
+        # With a blocking pool of one connection a request waits forever for a connection that is not released
+        self.trade_api = BlockExTradeApi(
+            get_server_url(self.server),
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            pool_maxsize=1,
+            pool_block=True)
+
+    def tearDown(self):
+        self.trade_api.close()
+        stop_server(self.server)
+
+    def test_closed_partial_iteration_releases_its_connection(self):
+        market_orders = []
+
+        def iterate():
+            unused_orders = self.trade_api.iter_market_orders(1)
+            orders = self.trade_api.iter_market_orders(1, chunk_size=16)
+            market_orders.append(next(orders))
+            orders.close()
+            market_orders.extend(self.trade_api.iter_market_orders(1))
+            del unused_orders
+
+        client_thread = threading.Thread(target=iterate)
+        client_thread.daemon = True
+        client_thread.start()
+        client_thread.join(5)
+
+        self.assertFalse(client_thread.is_alive())
+        self.assertEqual(self.server.request_count, 2)
+        self.assertEqual([order['orderID'] for order in market_orders], [32592, 32592, 32593])
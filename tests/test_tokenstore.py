@@ -0,0 +1,205 @@
+from unittest import TestCase
+from unittest import skipIf
+import multiprocessing
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from mock import Mock
+from blockex import tokenstore
+from blockex.tokenstore import FileTokenStore
+from blockex.tradeapi import AccessTokenManager
+from blockex.tradeapi import BlockExTradeApi
+
+KEY = 'https://test.api.url/|CorrectApiID|CorrectUsername'
+
+
+def log_in_process(directory, logins_path):
+    """Logs in a client of a child process, recording each login request in a file"""
+    def get_access_token():
+        with open(logins_path, 'a') as logins_file:
+            logins_file.write('login\n')
+        time.sleep(0.1)
+        return {'access_token': 'ProcessAccessToken', 'expires_in': 86399}
+
+    trade_api = BlockExTradeApi(
+        'https://test.api.url/',
+        'CorrectApiID',
+        'CorrectUsername',
+        'CorrectPassword',
+        token_store=FileTokenStore(directory))
+    trade_api.get_access_token = get_access_token
+    if trade_api.login() != 'ProcessAccessToken':
+        raise AssertionError('Unexpected access token')
+
+
+class TestFileTokenStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = FileTokenStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_and_load(self):
+        self.assertIsNone(self.store.load(KEY))
+
+        self.store.save(KEY, 'SomeAccessToken', 1500000000.5)
+        self.store.save(KEY, 'OtherAccessToken', 1500000001.5)
+
+        self.assertEqual(FileTokenStore(self.directory).load(KEY), ('OtherAccessToken', 1500000001.5))
+        self.assertIsNone(self.store.load('OtherKey'))
+        token_files = [name for name in os.listdir(self.directory) if not name.endswith('.lock')]
+        self.assertEqual(len(token_files), 1)
+        mode = os.stat(os.path.join(self.directory, token_files[0])).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0o600)
+
+    def test_delete(self):
+        self.store.save(KEY, 'SomeAccessToken', 1500000000.5)
+
+        self.store.delete(KEY, 'OtherAccessToken')
+        self.assertIsNotNone(self.store.load(KEY))
+
+        self.store.delete(KEY, 'SomeAccessToken')
+        self.assertIsNone(self.store.load(KEY))
+        self.store.delete(KEY)
+
+    def test_corrupted_file(self):
+        self.store.save(KEY, 'SomeAccessToken', 1500000000.5)
+        token_file = [name for name in os.listdir(self.directory) if not name.endswith('.lock')][0]
+        with open(os.path.join(self.directory, token_file), 'w') as corrupted_file:
+            corrupted_file.write('{"key": ')
+
+        self.assertIsNone(self.store.load(KEY))
+
+
+class TestAccessTokenManagerWithStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = FileTokenStore(self.directory)
+        self.get_access_token = Mock(return_value={'access_token': 'NewAccessToken', 'expires_in': 3600})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_manager(self, get_access_token=None, store=None):
+        return AccessTokenManager(
+            get_access_token or self.get_access_token,
+            refresh_margin=60,
+            token_store=store or self.store,
+            token_key=KEY)
+
+    def test_login_stores_the_token(self):
+        self.assertEqual(self.create_manager().get_valid_access_token(), 'NewAccessToken')
+
+        access_token, expiry_time = self.store.load(KEY)
+        self.assertEqual(access_token, 'NewAccessToken')
+        self.assertAlmostEqual(expiry_time, time.time() + 3600, delta=5)
+
+    def test_stored_token_is_reused(self):
+        self.store.save(KEY, 'StoredAccessToken', time.time() + 600)
+        manager = self.create_manager()
+
+        self.assertEqual(manager.get_valid_access_token(), 'StoredAccessToken')
+        self.get_access_token.assert_not_called()
+        self.assertTrue(0 < (manager.access_token_expiry_time - manager.access_token_expiry_time.now()).seconds <= 600)
+
+    def test_stored_token_within_refresh_margin_is_not_reused(self):
+        self.store.save(KEY, 'StoredAccessToken', time.time() + 30)
+
+        self.assertEqual(self.create_manager().get_valid_access_token(), 'NewAccessToken')
+        self.assertEqual(self.store.load(KEY)[0], 'NewAccessToken')
+
+    def test_rejected_stored_token_is_not_reused(self):
+        self.store.save(KEY, 'StoredAccessToken', time.time() + 600)
+        manager = self.create_manager()
+        manager.get_valid_access_token()
+
+        self.assertEqual(manager.refresh(stale_access_token='StoredAccessToken'), 'NewAccessToken')
+        self.get_access_token.assert_called_once_with()
+
+    def test_forced_refresh_takes_a_token_of_another_process(self):
+        self.store.save(KEY, 'StoredAccessToken', time.time() + 600)
+
+        self.assertEqual(self.create_manager().refresh(force=True), 'StoredAccessToken')
+        self.get_access_token.assert_not_called()
+
+    def test_forced_refresh_replaces_the_current_token(self):
+        self.store.save(KEY, 'StoredAccessToken', time.time() + 600)
+        manager = self.create_manager()
+        manager.get_valid_access_token()
+
+        self.assertEqual(manager.refresh(force=True), 'NewAccessToken')
+        self.assertEqual(self.store.load(KEY)[0], 'NewAccessToken')
+
+    def test_clear_deletes_the_stored_token(self):
+        manager = self.create_manager()
+        manager.get_valid_access_token()
+
+        manager.clear('NewAccessToken')
+
+        self.assertIsNone(self.store.load(KEY))
+
+    def test_concurrent_processes_log_in_once(self):
+        def get_access_token():
+            time.sleep(0.1)
+            return {'access_token': 'NewAccessToken', 'expires_in': 3600}
+
+        get_access_token_mock = Mock(side_effect=get_access_token)
+        # Separate stores share only the file locks, like the stores of separate processes
+        managers = [self.create_manager(get_access_token_mock, FileTokenStore(self.directory)) for _ in range(3)]
+        tokens = []
+        threads = [
+            threading.Thread(target=lambda manager=manager: tokens.append(manager.get_valid_access_token()))
+            for manager in managers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        get_access_token_mock.assert_called_once_with()
+        self.assertEqual(tokens, ['NewAccessToken'] * 3)
+
+
+class TestTradeApiTokenStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_trade_api(self):
+        trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            token_store=FileTokenStore(self.directory))
+        trade_api.get_access_token = Mock(return_value={'access_token': 'SomeAccessToken', 'expires_in': 86399})
+        return trade_api
+
+    @skipIf(tokenstore.fcntl is None, 'The file lock coordinates processes only with fcntl')
+    def test_processes_logging_in_share_one_login(self):
+        logins_path = os.path.join(self.directory, 'logins.txt')
+        processes = [
+            multiprocessing.Process(target=log_in_process, args=(self.directory, logins_path)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(10)
+
+        self.assertEqual([process.exitcode for process in processes], [0] * 3)
+        with open(logins_path) as logins_file:
+            self.assertEqual(logins_file.read(), 'login\n')
+
+    def test_restarted_client_reuses_the_token(self):
+        first_trade_api = self.create_trade_api()
+        first_trade_api.token_manager.get_valid_access_token()
+
+        second_trade_api = self.create_trade_api()
+        self.assertEqual(second_trade_api.token_manager.get_valid_access_token(), 'SomeAccessToken')
+
+        first_trade_api.get_access_token.assert_called_once_with()
+        second_trade_api.get_access_token.assert_not_called()
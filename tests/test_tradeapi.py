@@ -1,14 +1,19 @@
 from unittest import TestCase
-import requests
+from decimal import Decimal
+import threading
+import time
 from requests import Response
 from requests import RequestException
 from six.moves.urllib.parse import urlencode
 from mock import Mock
+from mock import patch
+from blockex.tradeapi import AccessTokenManager
 from blockex.tradeapi import BlockExTradeApi
 from blockex.tradeapi import OrderType
 from blockex.tradeapi import OfferType
 from blockex.tradeapi import convert_instrument_number_fields
 from blockex.tradeapi import convert_order_number_fields
+from blockex.tradeapi import monotonic
 
 
 # Unit tests
@@ -37,6 +42,57 @@ class TestTradeApiInit(TestTradeApi):
         self.assertIsNone(self.trade_api.access_token)
 
 
+class TestTradeApiSession(TestCase):
+    def test_session_connection_pool(self):
+        trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            pool_connections=2,
+            pool_maxsize=20,
+            pool_block=True)
+
+        adapter = trade_api.session.get_adapter('https://test.api.url/')
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 20)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(trade_api.session.headers['Connection'], 'keep-alive')
+
+    def test_session_without_keep_alive(self):
+        trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            keep_alive=False)
+
+        self.assertEqual(trade_api.session.headers['Connection'], 'close')
+
+    def test_close_on_context_manager_exit(self):
+        with BlockExTradeApi(
+                'https://test.api.url/',
+                'CorrectApiID',
+                'CorrectUsername',
+                'CorrectPassword') as trade_api:
+            close_mock = Mock()
+            trade_api.session.close = close_mock
+
+        close_mock.assert_called_once_with()
+
+    def test_shared_session_is_not_closed(self):
+        session = Mock()
+        with BlockExTradeApi(
+                'https://test.api.url/',
+                'CorrectApiID',
+                'CorrectUsername',
+                'CorrectPassword',
+                session=session) as trade_api:
+            self.assertIs(trade_api.session, session)
+
+        session.close.assert_not_called()
+
+
 class TestTradeApiLogin(TestCase):
     def setUp(self):
         self.trade_api = BlockExTradeApi(
@@ -50,7 +106,7 @@ class TestTradeApiLogin(TestCase):
         response.status_code = 200
         response._content = '{"access_token":"SomeAccessToken", "expires_in":86399}'.encode()
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         login_response = self.trade_api.login()
 
@@ -76,7 +132,7 @@ class TestTradeApiLogin(TestCase):
         response.status_code = 400
         response._content = '{"error":"invalid_client"}'.encode()
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         with self.assertRaises(RequestException):
             self.trade_api.login()
@@ -99,7 +155,7 @@ class TestTradeApiLogout(TestTradeApi):
         response = Response()
         response.status_code = 200
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         self.trade_api.logout()
 
@@ -111,7 +167,7 @@ class TestTradeApiLogout(TestTradeApi):
 
     def test_logout_when_not_logged_in(self):
         post_mock = Mock()
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         self.assertIsNone(self.trade_api.access_token)
 
@@ -147,7 +203,7 @@ class TestTradeApiGetOrders(TestTradeApi):
             "trades": null}]"""
         response._content = orders_list.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         get_orders_response = self.trade_api.get_orders()
 
@@ -186,7 +242,7 @@ class TestTradeApiGetOrders(TestTradeApi):
             "trades": null}]"""
         response._content = orders_list.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         get_orders_response = self.trade_api.get_orders(
             1, OrderType.LIMIT, OfferType.BID, '10,20', True, 50)
@@ -214,7 +270,7 @@ class TestTradeApiGetOrders(TestTradeApi):
         response.status_code = 400
         response._content = '{"message": "Unknown trader"}'.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         with self.assertRaises(RequestException):
             self.trade_api.get_orders()
@@ -251,7 +307,7 @@ class TestTradeApiGetMarketOrders(TestTradeApi):
             "trades": null}]"""
         response._content = market_orders_list.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         get_market_orders_response = self.trade_api.get_market_orders(1)
 
@@ -295,7 +351,7 @@ class TestTradeApiGetMarketOrders(TestTradeApi):
             "trades": null}]"""
         response._content = market_orders_list.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         get_market_orders_response = self.trade_api.get_market_orders(
             1, OrderType.LIMIT, OfferType.BID, '10,20', 50)
@@ -323,7 +379,7 @@ class TestTradeApiGetMarketOrders(TestTradeApi):
         response.status_code = 400
         response._content = '{"message": "Invalid partner API id"}'.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         self.trade_api.api_id = 'IncorrectApiID'
 
@@ -345,7 +401,7 @@ class TestTradeApiCreateOrder(TestTradeApi):
         response = Response()
         response.status_code = 200
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         self.trade_api.create_order(OfferType.BID,
                                     OrderType.LIMIT,
@@ -371,7 +427,7 @@ class TestTradeApiCreateOrder(TestTradeApi):
         response.status_code = 400
         response._content = '{"message": "Unknown trader"}'.encode()
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         with self.assertRaises(RequestException):
             self.trade_api.create_order(OfferType.BID,
@@ -394,12 +450,156 @@ class TestTradeApiCreateOrder(TestTradeApi):
             headers={'Authorization': 'Bearer SomeAccessToken'})
 
 
+class TestTradeApiCreateOrders(TestTradeApi):
+    def test_create_orders_with_a_rejected_order(self):
+        def post(url, headers):
+            response = Response()
+            if 'price=0' in url:
+                response.status_code = 400
+                response._content = '{"message": "Invalid price"}'.encode()
+            else:
+                response.status_code = 200
+            return response
+
+        post_mock = Mock(side_effect=post)
+        self.trade_api.session.post = post_mock
+
+        results = self.trade_api.create_orders(
+            [
+                {
+                    'offer_type': OfferType.BID,
+                    'order_type': OrderType.LIMIT,
+                    'instrument_id': 1,
+                    'price': 15.2,
+                    'quantity': 3.7
+                },
+                (OfferType.BID, OrderType.LIMIT, 1, 0, 3.7),
+                (OfferType.ASK, OrderType.LIMIT, 1, 16.1, 2),
+            ],
+            max_in_flight=2)
+
+        self.get_access_token_mock.assert_called_once_with()
+        self.assertEqual(post_mock.call_count, 3)
+        self.assertEqual([result.success for result in results], [True, False, True])
+        self.assertEqual([result.status_code for result in results], [200, 400, 200])
+        self.assertEqual(results[1].item, (OfferType.BID, OrderType.LIMIT, 1, 0, 3.7))
+        self.assertEqual(results[1].message, ' Message: Invalid price')
+        self.assertIsInstance(results[1].error, RequestException)
+        self.assertIsNone(results[0].error)
+        self.assertGreaterEqual(results[0].elapsed, 0)
+
+    def test_create_orders_with_an_invalid_spec(self):
+        response = Response()
+        response.status_code = 200
+        post_mock = Mock(return_value=response)
+        self.trade_api.session.post = post_mock
+
+        results = self.trade_api.create_orders([
+            ('Bid', OrderType.LIMIT, 1, 15.2, 3.7),
+            (OfferType.BID, OrderType.LIMIT, 1, 15.2, 3.7),
+        ])
+
+        post_mock.assert_called_once_with(
+            'https://test.api.url/api/orders/create?' + urlencode({
+                'offerType': 'Bid',
+                'orderType': 'Limit',
+                'instrumentID': 1,
+                'price': 15.2,
+                'quantity': 3.7
+            }),
+            headers={'Authorization': 'Bearer SomeAccessToken'})
+        self.assertIsInstance(results[0].error, ValueError)
+        self.assertIsNone(results[0].status_code)
+        self.assertTrue(results[1].success)
+
+    def test_create_orders_with_a_malformed_spec(self):
+        response = Response()
+        response.status_code = 200
+        post_mock = Mock(return_value=response)
+        self.trade_api.session.post = post_mock
+
+        results = self.trade_api.create_orders(
+            [
+                (OfferType.BID, OrderType.LIMIT, 1, 15.2, 3.7),
+                (OfferType.BID, OrderType.LIMIT, 1),
+                {'offer_type': OfferType.ASK, 'order_type': OrderType.LIMIT, 'instrument_id': 1, 'amount': 2},
+                (OfferType.ASK, OrderType.LIMIT, 1, 16.1, 2),
+            ],
+            max_in_flight=1)
+
+        self.assertEqual(post_mock.call_count, 2)
+        self.assertEqual([result.success for result in results], [True, False, False, True])
+        self.assertIsInstance(results[1].error, TypeError)
+        self.assertIsInstance(results[2].error, TypeError)
+
+    def test_create_orders_with_invalid_max_in_flight(self):
+        with self.assertRaises(ValueError):
+            self.trade_api.create_orders([], max_in_flight=0)
+
+
+class TestTradeApiPrepareOrder(TestTradeApi):
+    def test_send_prepared_order(self):
+        response = Response()
+        response.status_code = 200
+        post_mock = Mock(return_value=response)
+        self.trade_api.session.post = post_mock
+
+        prepared_order = self.trade_api.prepare_order(OfferType.ASK, OrderType.LIMIT, 1)
+        prepared_order.send(15.2, 3.7)
+        prepared_order.send(Decimal('1E+2'), 1)
+
+        data = {
+            'offerType': 'Ask',
+            'orderType': 'Limit',
+            'instrumentID': 1,
+            'price': Decimal('1E+2'),
+            'quantity': 1
+        }
+        # The requests are the same as the ones of create_order()
+        self.trade_api.create_order(OfferType.ASK, OrderType.LIMIT, 1, 15.2, 3.7)
+        self.assertEqual(post_mock.call_args_list[0], post_mock.call_args_list[2])
+        self.assertEqual(
+            post_mock.call_args_list[1][0][0],
+            'https://test.api.url/api/orders/create?' + urlencode(data))
+        self.get_access_token_mock.assert_called_once()
+
+    def test_unsuccessful_send_prepared_order(self):
+        response = Response()
+        response.status_code = 400
+        response._content = '{"message": "Unknown trader"}'.encode()
+        self.trade_api.session.post = Mock(return_value=response)
+
+        prepared_order = self.trade_api.prepare_order(OfferType.BID, OrderType.MARKET, 1)
+
+        with self.assertRaises(RequestException):
+            prepared_order.send(15.2, 3.7)
+
+    def test_send_prepared_order_with_rejected_access_token(self):
+        unauthorized_response = Response()
+        unauthorized_response.status_code = 401
+        unauthorized_response._content = '{"message": "Authorization has been denied for this request."}'.encode()
+        response = Response()
+        response.status_code = 200
+        post_mock = Mock(side_effect=[unauthorized_response, response])
+        self.trade_api.session.post = post_mock
+        prepared_order = self.trade_api.prepare_order(OfferType.BID, OrderType.LIMIT, 1)
+
+        prepared_order.send(15.2, 3.7)
+
+        self.assertEqual(self.get_access_token_mock.call_count, 2)
+        self.assertEqual(post_mock.call_count, 2)
+
+    def test_prepare_order_with_invalid_offer_type(self):
+        with self.assertRaises(ValueError):
+            self.trade_api.prepare_order('Bid', OrderType.LIMIT, 1)
+
+
 class TestTradeApiCancelOrder(TestTradeApi):
     def test_successful_cancel_order(self):
         response = Response()
         response.status_code = 200
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         self.trade_api.cancel_order(32598)
 
@@ -412,7 +612,7 @@ class TestTradeApiCancelOrder(TestTradeApi):
         response.status_code = 400
         response._content = '{"message": "Unknown trader"}'.encode()
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         with self.assertRaises(RequestException):
             self.trade_api.cancel_order(32598)
@@ -422,12 +622,49 @@ class TestTradeApiCancelOrder(TestTradeApi):
             headers={'Authorization': 'Bearer SomeAccessToken'})
 
 
+class TestTradeApiCancelOrders(TestTradeApi):
+    def test_cancel_orders_with_a_failed_cancellation(self):
+        def post(url, headers):
+            response = Response()
+            if url.endswith('orderID=32599'):
+                response.status_code = 400
+                response._content = '{"message": "Order not found"}'.encode()
+            else:
+                response.status_code = 200
+            return response
+
+        post_mock = Mock(side_effect=post)
+        self.trade_api.session.post = post_mock
+
+        results = self.trade_api.cancel_orders([32598, 32599, 32600], max_in_flight=3)
+
+        self.get_access_token_mock.assert_called_once_with()
+        self.assertEqual(
+            sorted(call[0][0] for call in post_mock.call_args_list),
+            [
+                'https://test.api.url/api/orders/cancel?orderID=32598',
+                'https://test.api.url/api/orders/cancel?orderID=32599',
+                'https://test.api.url/api/orders/cancel?orderID=32600',
+            ])
+        self.assertEqual([result.item for result in results], [32598, 32599, 32600])
+        self.assertEqual([result.success for result in results], [True, False, True])
+        self.assertEqual(results[1].message, ' Message: Order not found')
+
+    def test_cancel_no_orders(self):
+        post_mock = Mock()
+        self.trade_api.session.post = post_mock
+
+        self.assertEqual(self.trade_api.cancel_orders([]), [])
+
+        post_mock.assert_not_called()
+
+
 class TestTradeApiCancelAllOrders(TestTradeApi):
     def test_successful_cancel_all_orders(self):
         response = Response()
         response.status_code = 200
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         self.trade_api.cancel_all_orders(1)
 
@@ -440,7 +677,7 @@ class TestTradeApiCancelAllOrders(TestTradeApi):
         response.status_code = 400
         response._content = '{"message": "Unknown trader"}'.encode()
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         with self.assertRaises(RequestException):
             self.trade_api.cancel_all_orders(1)
@@ -471,7 +708,7 @@ class TestTradeApiGetTraderInstruments(TestTradeApi):
             "commissionFeePercent": 0.025000000000}]"""
         response._content = instruments_list.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         get_trader_instruments_response =\
             self.trade_api.get_trader_instruments()
@@ -490,7 +727,7 @@ class TestTradeApiGetTraderInstruments(TestTradeApi):
         response.status_code = 400
         response._content = '{"message": "Unknown trader"}'.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         with self.assertRaises(RequestException):
             self.trade_api.get_trader_instruments()
@@ -521,7 +758,7 @@ class TestTradeApiGetPartnerInstruments(TestTradeApi):
             "commissionFeePercent": 0.025000000000}]"""
         response._content = instruments_list.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         get_partner_instruments_response =\
             self.trade_api.get_partner_instruments()
@@ -540,7 +777,7 @@ class TestTradeApiGetPartnerInstruments(TestTradeApi):
         response.status_code = 400
         response._content = '{"message": "Invalid partner"}'.encode()
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         self.trade_api.api_id = 'IncorrectApiID'
         with self.assertRaises(RequestException):
@@ -556,7 +793,7 @@ class TestTradeApiMakeAuthorizedRequest(TestTradeApi):
         response = Response()
         response.status_code = 200
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         make_authorized_request_response =\
             self.trade_api._BlockExTradeApi__make_authorized_request(
@@ -575,7 +812,7 @@ class TestTradeApiMakeAuthorizedRequest(TestTradeApi):
         response = Response()
         response.status_code = 200
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         make_authorized_request_response =\
             self.trade_api._BlockExTradeApi__make_authorized_request(
@@ -606,7 +843,7 @@ class TestTradeApiMakeAuthorizedRequest(TestTradeApi):
         response = Response()
         response.status_code = 200
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         make_authorized_request_response =\
             self.trade_api._BlockExTradeApi__make_authorized_request(
@@ -628,7 +865,7 @@ class TestTradeApiMakeAuthorizedRequest(TestTradeApi):
         response = Response()
         response.status_code = 200
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         make_authorized_request_response =\
             self.trade_api._BlockExTradeApi__make_authorized_request(
@@ -662,7 +899,7 @@ class TestTradeApiMakeAuthorizedRequest(TestTradeApi):
         response = Response()
         response.status_code = 200
         get_mock = Mock(return_value=response)
-        requests.get = get_mock
+        self.trade_api.session.get = get_mock
 
         make_authorized_request_response =\
             self.trade_api._BlockExTradeApi__make_authorized_request(
@@ -685,7 +922,7 @@ class TestTradeApiMakeAuthorizedRequest(TestTradeApi):
         response = Response()
         response.status_code = 200
         post_mock = Mock(return_value=response)
-        requests.post = post_mock
+        self.trade_api.session.post = post_mock
 
         make_authorized_request_response =\
             self.trade_api._BlockExTradeApi__make_authorized_request(
@@ -699,3 +936,202 @@ class TestTradeApiMakeAuthorizedRequest(TestTradeApi):
             headers={'Authorization': 'Bearer SomeAccessToken'})
         self.assertEqual(post_mock.call_count, 1)
         self.assertEqual(make_authorized_request_response.status_code, 200)
+
+    def test_make_authorized_request_when_unauthorized(self):
+        self.trade_api.login()
+
+        unauthorized_response = Response()
+        unauthorized_response.status_code = 401
+        unauthorized_response._content =\
+            '{"message": "Authorization has been denied for this request."}'.encode()
+        response = Response()
+        response.status_code = 200
+        get_mock = Mock(side_effect=[unauthorized_response, response])
+        self.trade_api.session.get = get_mock
+
+        make_authorized_request_response =\
+            self.trade_api._BlockExTradeApi__make_authorized_request(
+                'get',
+                'ResourceURL')
+
+        self.assertEqual(self.get_access_token_mock.call_count, 2)
+        self.assertEqual(get_mock.call_count, 2)
+        self.assertEqual(make_authorized_request_response.status_code, 200)
+
+
+class TestTradeApiThreadSafety(TestTradeApi):
+    def test_shared_instance_logs_in_once(self):
+        response = Response()
+        response.status_code = 200
+        response._content = '[]'.encode()
+        get_mock = Mock(return_value=response)
+        self.trade_api.session.get = get_mock
+
+        threads = [threading.Thread(target=self.trade_api.get_orders) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.get_access_token_mock.assert_called_once_with()
+        self.assertEqual(get_mock.call_count, 20)
+
+    def test_logout_keeps_a_token_obtained_meanwhile(self):
+        self.trade_api.login()
+        self.get_access_token_mock.return_value = {
+            'access_token': 'OtherAccessToken',
+            'expires_in': 86399,
+        }
+
+        def post(url, headers):
+            self.trade_api.token_manager.refresh(force=True)
+            response = Response()
+            response.status_code = 200
+            return response
+
+        self.trade_api.session.post = Mock(side_effect=post)
+
+        self.trade_api.logout()
+
+        self.assertEqual(self.trade_api.access_token, 'OtherAccessToken')
+        self.assertEqual(self.get_access_token_mock.call_count, 2)
+
+
+class TestAccessTokenManager(TestCase):
+    def setUp(self):
+        self.tokens = iter(['Token1', 'Token2', 'Token3'])
+        self.expires_in = 86399
+        self.login_event = threading.Event()
+        self.login_event.set()
+        self.get_access_token_mock = Mock(side_effect=self.get_access_token)
+
+    def get_access_token(self):
+        self.login_event.wait()
+        return {'access_token': next(self.tokens), 'expires_in': self.expires_in}
+
+    def test_get_valid_access_token_logs_in_once(self):
+        token_manager = AccessTokenManager(self.get_access_token_mock)
+
+        self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+        self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+
+        self.get_access_token_mock.assert_called_once_with()
+        self.assertIsNotNone(token_manager.access_token_expiry_time)
+
+    def test_concurrent_callers_share_one_login(self):
+        token_manager = AccessTokenManager(self.get_access_token_mock)
+        self.login_event.clear()
+        access_tokens = []
+
+        def get_token():
+            access_tokens.append(token_manager.get_valid_access_token())
+
+        threads = [threading.Thread(target=get_token) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        self.login_event.set()
+        for thread in threads:
+            thread.join()
+
+        self.get_access_token_mock.assert_called_once_with()
+        self.assertEqual(access_tokens, ['Token1'] * 10)
+
+    def test_expired_access_token_is_refreshed(self):
+        self.expires_in = 0
+        token_manager = AccessTokenManager(self.get_access_token_mock)
+
+        self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+        self.assertEqual(token_manager.get_valid_access_token(), 'Token2')
+
+    def test_access_token_within_refresh_margin_is_refreshed_in_background(self):
+        self.expires_in = 100
+        token_manager = AccessTokenManager(self.get_access_token_mock, refresh_margin=30)
+        token_manager.get_valid_access_token()
+        self.login_event.clear()
+
+        with patch('blockex.tradeapi.monotonic', return_value=monotonic() + 80):
+            self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+            self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+
+        self.login_event.set()
+        self.assertEqual(token_manager.refresh(stale_access_token='Token1'), 'Token2')
+        self.assertEqual(self.get_access_token_mock.call_count, 2)
+
+    def test_access_token_shorter_than_refresh_margin(self):
+        self.expires_in = 30
+        token_manager = AccessTokenManager(self.get_access_token_mock, refresh_margin=60)
+        token_manager.get_valid_access_token()
+
+        with patch('blockex.tradeapi.monotonic', return_value=monotonic() + 10):
+            for _ in range(200):
+                self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+        self.get_access_token_mock.assert_called_once_with()
+
+        # Half of the lifetime is left
+        with patch('blockex.tradeapi.monotonic', return_value=monotonic() + 16):
+            self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+        self.assertEqual(token_manager.refresh(stale_access_token='Token1'), 'Token2')
+        self.assertEqual(self.get_access_token_mock.call_count, 2)
+
+    def test_refresh_spread_of_a_short_access_token(self):
+        self.expires_in = 40
+        token_manager = AccessTokenManager(self.get_access_token_mock, refresh_margin=60, refresh_spread=300)
+        token_manager.get_valid_access_token()
+
+        # The margin is at most half of the lifetime plus a quarter of it
+        with patch('blockex.tradeapi.monotonic', return_value=monotonic() + 9):
+            for _ in range(200):
+                self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+        self.get_access_token_mock.assert_called_once_with()
+
+        with patch('blockex.tradeapi.monotonic', return_value=monotonic() + 21):
+            self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+        self.assertEqual(token_manager.refresh(stale_access_token='Token1'), 'Token2')
+        self.assertEqual(self.get_access_token_mock.call_count, 2)
+
+    def test_failed_background_refresh_is_delayed(self):
+        self.expires_in = 100
+        token_manager = AccessTokenManager(self.get_access_token_mock, refresh_margin=30)
+        token_manager.get_valid_access_token()
+        self.get_access_token_mock.side_effect = RequestException('Login failed.')
+        start_time = monotonic()
+
+        def get_tokens(elapsed):
+            with patch('blockex.tradeapi.monotonic', return_value=start_time + elapsed):
+                for _ in range(100):
+                    self.assertEqual(token_manager.get_valid_access_token(), 'Token1')
+                    time.sleep(0.0005)
+
+        # The first retry waits a second, the next one two
+        get_tokens(80)
+        self.assertEqual(self.get_access_token_mock.call_count, 2)
+        get_tokens(80.9)
+        self.assertEqual(self.get_access_token_mock.call_count, 2)
+        get_tokens(81.1)
+        self.assertEqual(self.get_access_token_mock.call_count, 3)
+        get_tokens(82.9)
+        self.assertEqual(self.get_access_token_mock.call_count, 3)
+        # Close to the expiry the delay is half of the time left
+        get_tokens(99)
+        self.assertEqual(self.get_access_token_mock.call_count, 4)
+        get_tokens(99.4)
+        self.assertEqual(self.get_access_token_mock.call_count, 4)
+
+    def test_refresh_of_an_already_refreshed_token(self):
+        token_manager = AccessTokenManager(self.get_access_token_mock)
+        token_manager.get_valid_access_token()
+
+        self.assertEqual(token_manager.refresh(stale_access_token='Token1'), 'Token2')
+        self.assertEqual(token_manager.refresh(stale_access_token='Token1'), 'Token2')
+        self.assertEqual(token_manager.refresh(force=True), 'Token3')
+        self.assertEqual(self.get_access_token_mock.call_count, 3)
+
+    def test_failed_refresh(self):
+        self.get_access_token_mock.side_effect = RequestException('Login failed.')
+        token_manager = AccessTokenManager(self.get_access_token_mock)
+
+        with self.assertRaises(RequestException):
+            token_manager.get_valid_access_token()
+
+        self.assertIsNone(token_manager.access_token)
@@ -0,0 +1,176 @@
+from unittest import TestCase
+from decimal import Decimal
+from requests import Response
+from mock import Mock
+from blockex.instruments import InstrumentCache
+from blockex.models import Instrument
+from blockex.tradeapi import BlockExTradeApi
+from blockex.tradeapi import OfferType
+from blockex.tradeapi import OrderType
+from blockex.validation import OrderValidationError
+from blockex.validation import OrderValidator
+
+INSTRUMENTS = [
+    {
+        'id': 1,
+        'description': 'Bitcoin/Euro',
+        'name': 'BTC/EUR',
+        'baseCurrencyID': 43,
+        'quoteCurrencyID': 2,
+        'minOrderAmount': Decimal('0.01'),
+        'commissionFeePercent': 0.002,
+    },
+    {
+        'id': 2,
+        'description': 'Ether/Euro',
+        'name': 'ETH/EUR',
+        'baseCurrencyID': 44,
+        'quoteCurrencyID': 2,
+        'minOrderAmount': Decimal('0.29'),
+        'commissionFeePercent': 0.002,
+    },
+]
+
+
+def create_instrument_cache(instruments=INSTRUMENTS):
+    trade_api = Mock()
+    trade_api.get_trader_instruments = Mock(return_value=instruments)
+    return InstrumentCache(trade_api)
+
+
+class TestOrderValidator(TestCase):
+    def setUp(self):
+        self.instruments = create_instrument_cache()
+        self.validator = OrderValidator(self.instruments, price_decimals=2, quantity_decimals={1: 4})
+
+    def assert_rejected(self, message, *args):
+        with self.assertRaises(OrderValidationError) as context:
+            self.validator.validate(*args)
+        self.assertEqual(context.exception.message, message)
+        self.assertEqual(
+            str(context.exception), 'Failed to create an order. Rejected by the local validation: ' + message)
+
+    def test_valid_orders_are_unchanged(self):
+        self.assertEqual(self.validator.validate(OfferType.BID, OrderType.LIMIT, 1, 15.25, 0.01), (15.25, 0.01))
+        # The float 0.29 is slightly less than Decimal('0.29')
+        self.assertEqual(self.validator.validate(OfferType.ASK, OrderType.LIMIT, 2, 15, 0.29), (15, 0.29))
+        self.assertEqual(self.validator.validate(OfferType.ASK, OrderType.MARKET, 1, 0, 1), (0, 1))
+        self.instruments.trade_api.get_trader_instruments.assert_called_once_with()
+
+    def test_rejected_orders(self):
+        self.assert_rejected('Invalid instrument.', OfferType.BID, OrderType.LIMIT, 3, 15.2, 1)
+        self.assert_rejected(
+            'The quantity is less than the minimum order amount.', OfferType.BID, OrderType.LIMIT, 1, 15.2, 0.009)
+        self.assert_rejected('The price must be greater than zero.', OfferType.BID, OrderType.LIMIT, 1, 0, 1)
+        self.assert_rejected(
+            'The price must have at most 2 decimal places.', OfferType.BID, OrderType.LIMIT, 1, 15.255, 1)
+        self.assert_rejected(
+            'The quantity must have at most 4 decimal places.', OfferType.BID, OrderType.LIMIT, 1, 15.2, 1.00001)
+
+    def test_non_numeric_price_and_quantity(self):
+        self.assert_rejected('The price must be a number.', OfferType.BID, OrderType.LIMIT, 1, None, 1)
+        self.assert_rejected('The price must be a number.', OfferType.BID, OrderType.LIMIT, 1, '15.2', 1)
+        self.assert_rejected('The price must be a number.', OfferType.BID, OrderType.LIMIT, 1, float('nan'), 1)
+        self.assert_rejected('The quantity must be a number.', OfferType.BID, OrderType.LIMIT, 1, 15.2, None)
+        self.assert_rejected('The quantity must be a number.', OfferType.BID, OrderType.LIMIT, 1, 15.2, 'abc')
+        self.assert_rejected(
+            'The quantity must be a number.', OfferType.BID, OrderType.LIMIT, 1, 15.2, Decimal('Infinity'))
+        self.assert_rejected('The quantity must be a number.', OfferType.BID, OrderType.LIMIT, 1, 15.2, True)
+        self.assertEqual(self.validator.validate(OfferType.ASK, OrderType.MARKET, 1, None, 1), (None, 1))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.validator.validate('Bid', OrderType.LIMIT, 1, 15.2, 1)
+        with self.assertRaises(ValueError):
+            self.validator.validate(OfferType.BID, 'Limit', 1, 15.2, 1)
+
+    def test_normalize(self):
+        validator = OrderValidator(self.instruments, price_decimals=2, quantity_decimals=4, normalize=True)
+
+        self.assertEqual(
+            validator.validate(OfferType.BID, OrderType.LIMIT, 1, 15.259, 1.00009),
+            (Decimal('15.25'), Decimal('1.0000')))
+        self.assertEqual(
+            validator.validate(OfferType.ASK, OrderType.LIMIT, 1, Decimal('15.251'), 1),
+            (Decimal('15.26'), 1))
+        with self.assertRaises(OrderValidationError):
+            validator.validate(OfferType.BID, OrderType.LIMIT, 1, 0.001, 1)
+        with self.assertRaises(OrderValidationError):
+            validator.validate(OfferType.BID, OrderType.LIMIT, 1, 15.2, 0.00999)
+
+    def test_instrument_models(self):
+        validator = OrderValidator(create_instrument_cache([Instrument.from_dict(INSTRUMENTS[0])]))
+
+        with self.assertRaises(OrderValidationError):
+            validator.validate(OfferType.BID, OrderType.LIMIT, 1, 15.2, 0.001)
+
+    def test_reloaded_instruments(self):
+        self.validator.validate(OfferType.BID, OrderType.LIMIT, 2, 15.2, 0.3)
+        changed_instrument = dict(INSTRUMENTS[1], minOrderAmount=Decimal('0.5'))
+        self.instruments.trade_api.get_trader_instruments.return_value = [INSTRUMENTS[0], changed_instrument]
+
+        self.instruments.refresh()
+
+        with self.assertRaises(OrderValidationError):
+            self.validator.validate(OfferType.BID, OrderType.LIMIT, 2, 15.2, 0.3)
+
+    def test_validate_orders(self):
+        results = self.validator.validate_orders([
+            (OfferType.BID, OrderType.LIMIT, 1, 15.2, 1),
+            {'offer_type': OfferType.ASK, 'order_type': OrderType.LIMIT, 'instrument_id': 1, 'price': 15.2,
+             'quantity': 0.001},
+            ('Bid', OrderType.LIMIT, 1, 15.2, 1),
+            (OfferType.BID, OrderType.LIMIT, 1),
+            (OfferType.BID, OrderType.LIMIT, 1, None, 1),
+        ])
+
+        self.assertEqual([result.valid for result in results], [True, False, False, False, False])
+        self.assertEqual((results[0].price, results[0].quantity), (15.2, 1))
+        self.assertIsInstance(results[1].error, OrderValidationError)
+        self.assertIsInstance(results[2].error, ValueError)
+        self.assertIsInstance(results[3].error, TypeError)
+        self.assertIsInstance(results[4].error, OrderValidationError)
+
+
+class TestTradeApiOrderValidator(TestCase):
+    def setUp(self):
+        self.trade_api = BlockExTradeApi(
+            'https://test.api.url/',
+            'CorrectApiID',
+            'CorrectUsername',
+            'CorrectPassword',
+            order_validator=OrderValidator(create_instrument_cache(), price_decimals=2, normalize=True))
+        self.trade_api.get_access_token = Mock(return_value={
+            'access_token': 'SomeAccessToken',
+            'expires_in': 86399,
+        })
+        response = Response()
+        response.status_code = 200
+        self.trade_api.session.post = Mock(return_value=response)
+
+    def test_rejected_order_is_not_sent(self):
+        with self.assertRaises(OrderValidationError):
+            self.trade_api.create_order(OfferType.BID, OrderType.LIMIT, 1, 15.2, 0.001)
+        with self.assertRaises(OrderValidationError):
+            self.trade_api.prepare_order(OfferType.BID, OrderType.LIMIT, 1).send(15.2, 0.001)
+        with self.assertRaises(OrderValidationError):
+            self.trade_api.create_order(OfferType.BID, OrderType.LIMIT, 1, None, 1)
+
+        self.trade_api.session.post.assert_not_called()
+
+    def test_normalized_order_is_sent(self):
+        self.trade_api.create_order(OfferType.BID, OrderType.LIMIT, 1, 15.209, 1)
+        self.trade_api.prepare_order(OfferType.BID, OrderType.LIMIT, 1).send(15.209, 1)
+
+        for call in self.trade_api.session.post.call_args_list:
+            self.assertIn('price=15.20&', call[0][0])
+
+    def test_create_orders(self):
+        results = self.trade_api.create_orders([
+            (OfferType.BID, OrderType.LIMIT, 1, 15.2, 1),
+            (OfferType.BID, OrderType.LIMIT, 1, 15.2, 0.001),
+        ])
+
+        self.assertTrue(results[0].success)
+        self.assertIsInstance(results[1].error, OrderValidationError)
+        self.trade_api.session.post.assert_called_once()